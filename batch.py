@@ -0,0 +1,195 @@
+from contextlib import redirect_stdout
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+
+from lexer import scan
+from parser import Parser
+from tokens import INT, MAIN, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACE
+
+# Kinds of the tokens of the program header 'int main ( ) {'
+HEADER_KINDS = (INT, MAIN, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACE)
+
+# Batch front-end for checking many source files at once
+# Lexing and parsing are fanned out over a pool of worker processes, and every file gets its own Lexer and Parser state
+# The process pool, the cache, and JSON output are imported only when a run uses them, since importing the process pool alone takes longer than checking a small file
+
+# Cache of parse results used by checkFile() in this process, if the batch was given a cache directory
+# Every worker process opens its own cache over the same directory
+fileCache = None
+
+# Open the cache that checkFile() uses in this process, over the given directory
+def useCache(directory):
+    global fileCache
+    fileCache = None
+    if directory is not None:
+        from cache import ParseCache
+        fileCache = ParseCache(directory)
+
+# Expand a list of files, directories, and glob patterns into a sorted list of file names without duplicates
+# Directories are searched recursively for files that match the given pattern
+def findFiles(paths, pattern = '*.txt'):
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(glob.glob(os.path.join(glob.escape(path), '**', pattern), recursive = True))
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            files.update(name for name in glob.glob(path, recursive = True) if os.path.isfile(name))
+    return sorted(files)
+
+# Lex and parse a single file, and return the results in a structured form that can be sent back from a worker process
+# The error stack is a list of errors from the bottom of the stack to the top, so the last error is the first one that parserOutput() would print
+# With a cache, a file that has been checked before is not lexed or parsed again
+def checkFile(fileName):
+    result = {'file': fileName, 'bytes': 0, 'tokens': 0, 'errors': []}
+    try:
+        if fileCache is not None:
+            with redirect_stdout(io.StringIO()):
+                cachedResult(result, fileCache.check(fileName))
+            result['stat'] = fileCache.stats.get(os.path.abspath(fileName))     # Handed back to the main process, which keeps the index of modification times for the next run
+            result['bytes'] = result['stat'][1] if result['stat'] is not None else os.path.getsize(fileName)
+            return result
+        with open(fileName, 'r') as file:
+            result['bytes'] = os.fstat(file.fileno()).st_size
+            text = file.read()
+    except (OSError, UnicodeDecodeError) as error:
+        result['errors'].append({'line': None, 'word': None, 'message': 'Unreadable file: ' + str(error)})
+        return result
+
+    tokens = list(scan(text))
+    result['tokens'] = len(tokens)
+    checkHeader(result, tokens)
+
+    # The parser runs past the last token of a file that ends in the middle of a construct, which is reported on the last token
+    try:
+        with redirect_stdout(io.StringIO()):
+            errors = Parser(tokens).errorStack()
+    except IndexError:
+        result['errors'].append(errorRecord(tokens[-1] if len(tokens) > 0 else None, 'End of file'))
+        return result
+
+    for error in errors:
+        result['errors'].append(errorRecord(error.token(), error.message()))
+    return result
+
+# Return the structured form of an error in the result of a file
+# An error may have no token, such as the error of a program that stops before its closing brace, in which case its line and word are None
+def errorRecord(token, message):
+    return {'line': token and token.lineNumber(), 'word': token and token.word(), 'message': message}
+
+# Record a bad program header in the result of a file
+# The parser prints a bad program header instead of recording it, so the header is checked here and the parser's output is kept out of the batch's output
+def checkHeader(result, tokens):
+    for token, kind in zip(tokens, HEADER_KINDS):
+        if token.kind() != kind:
+            result['errors'].append(errorRecord(token, 'Program header'))
+            break
+
+# Fill in the result of a file from a cached ParseResult
+# The source of a result has its line breaks normalized, so the size of the file is filled in by the caller
+def cachedResult(result, parseResult):
+    tokens = parseResult.tokens()
+    result['tokens'] = len(tokens)
+    checkHeader(result, tokens)
+    for error in parseResult.errorStack():
+        result['errors'].append(errorRecord(error.token(), error.message()))
+    return result
+
+# Check a list of files over a pool of worker processes and return a list of results, in the same order as the files, along with a summary of the run
+# Files are handed to the workers in chunks, so the cost of sending work between processes is paid once per chunk instead of once per file
+# With a single worker the files are checked in this process, without starting a pool
+# With a cache directory, every process keeps its results in the directory, so later runs only lex and parse the files that have changed
+def checkFiles(fileNames, workers = None, chunkSize = None, cacheDirectory = None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunkSize is None:
+        chunkSize = max(1, len(fileNames) // (workers * 4))     # A few chunks per worker keeps the workers evenly loaded when some files are larger than others
+
+    start = time.perf_counter()
+    if workers == 1:
+        useCache(cacheDirectory)
+        results = [checkFile(fileName) for fileName in fileNames]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers = workers, initializer = useCache, initargs = (cacheDirectory,)) as executor:
+            results = list(executor.map(checkFile, fileNames, chunksize = chunkSize))
+    seconds = time.perf_counter() - start
+
+    # The workers cannot safely write the index of modification times at the same time, so it is written once, here
+    if cacheDirectory is not None:
+        from cache import ParseCache
+        cache = ParseCache(cacheDirectory)
+        for fileName, result in zip(fileNames, results):
+            stat = result.pop('stat', None)
+            if stat is not None:
+                cache.stats[os.path.abspath(fileName)] = stat
+        cache.flush()
+
+    return results, summarize(results, seconds, workers)
+
+# Summarize the results of a run, including its throughput
+def summarize(results, seconds, workers):
+    totalBytes = sum(result['bytes'] for result in results)
+    totalTokens = sum(result['tokens'] for result in results)
+    seconds = max(seconds, 1e-9)
+    return {
+        'files': len(results),
+        'filesWithErrors': sum(1 for result in results if len(result['errors']) > 0),
+        'bytes': totalBytes,
+        'tokens': totalTokens,
+        'workers': workers,
+        'seconds': seconds,
+        'filesPerSecond': len(results) / seconds,
+        'tokensPerSecond': totalTokens / seconds,
+        'megabytesPerSecond': totalBytes / seconds / 1e6
+    }
+
+# Print the results of a run, with the error stack of each file printed from the top, as parserOutput() prints it
+def batchOutput(results, summary):
+    for result in results:
+        errors = result['errors']
+        if len(errors) == 0:
+            continue
+        print(result['file'])
+        # An error without a line is an unreadable file, or a syntax error at the end of a file that has no token to report
+        for error in reversed(errors):
+            if error['line'] is not None:
+                print('    Syntax error in line', error['line'], ', encountered', error['word'], 'while parsing a(n)', error['message'])
+            elif error['message'].startswith('Unreadable file'):
+                print('   ', error['message'])
+            else:
+                print('    Syntax error at the end of the file, while parsing a(n)', error['message'])
+
+    print('Checked {files} files ({filesWithErrors} with errors), {tokens} tokens in {seconds:.3f} seconds with {workers} workers'.format(**summary))
+    print('{filesPerSecond:.1f} files/s, {tokensPerSecond:.0f} tokens/s, {megabytesPerSecond:.2f} MB/s'.format(**summary))
+
+# Main method of the batch front-end
+# The exit status is 1 if any file has syntax errors, so the batch can fail a CI run
+def main(arguments = None):
+    argumentParser = argparse.ArgumentParser(description = 'Lex and parse many source files in parallel')
+    argumentParser.add_argument('paths', nargs = '+', help = 'source files, directories, or glob patterns')
+    argumentParser.add_argument('--pattern', default = '*.txt', help = 'pattern of the files to check inside directories')
+    argumentParser.add_argument('--workers', type = int, default = None, help = 'number of worker processes')
+    argumentParser.add_argument('--chunk-size', type = int, default = None, help = 'number of files handed to a worker at a time')
+    argumentParser.add_argument('--json', action = 'store_true', help = 'print the results and summary as JSON')
+    argumentParser.add_argument('--cache', default = None, help = 'directory to cache parse results in, so unchanged files are not checked again')
+    options = argumentParser.parse_args(arguments)
+
+    results, summary = checkFiles(findFiles(options.paths, options.pattern), options.workers, options.chunk_size, options.cache)
+    if options.json:
+        import json
+        json.dump({'results': results, 'summary': summary}, sys.stdout, indent = 1)
+        print()
+    else:
+        batchOutput(results, summary)
+
+    return 1 if summary['filesWithErrors'] > 0 else 0
+
+# Execute the main method of the batch front-end
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+import argparse
+import compileall
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from lexer import Lexer
+from parser import Parser
+
+try:
+    import resource     # Only available on Unix, where it is used to report the peak memory of the process
+except ImportError:
+    resource = None
+
+# Benchmark suite for the lexer and parser
+# Programs of any size are produced by a generator that follows the grammar of the language, then lexed and parsed at several scales
+
+# Most milliseconds that importing each front-end module may take in a fresh interpreter with its bytecode already compiled, including every module that it imports
+# Short-lived runs, such as a check in a commit hook, pay this on every run, on top of the startup of the interpreter itself
+# The budgets leave about a quarter more than the slowest of several measurements taken when they were set, and less than twice the fastest, so an import that becomes twice as slow is over its budget
+STARTUP_BUDGETS = {'lexer': 15, 'parser': 15, 'semantic': 15, 'grammar': 40, 'testMain': 20, 'batch': 22, 'cache': 23, 'server': 115}
+
+# Levels of the expression grammar, from expression down to term, with the operators that join their parts and whether more than two parts are allowed
+# An equality or relation has at most one operator, so a < b < c is not a valid expression, and != is left out since the lexer splits it into ! and =
+EXPRESSION_LEVELS = (
+    (('||',), True),
+    (('&&',), True),
+    (('==',), False),
+    (('<', '<=', '>', '>='), False),
+    (('+', '-'), True),
+    (('*', '/', '%'), True)
+)
+
+# ProgramGenerator class
+# Generates random programs from the grammar of the language
+# Character literals are left out of expressions, since the parser treats any single character as a character literal
+# For the same reason, an opening parenthesis on its own is read as a character literal, so sub-expressions are grouped by casts instead of parentheses
+class ProgramGenerator:
+
+    # ProgramGenerator class constructor
+    # depth is the deepest that blocks, if statements, and while statements are nested, and expressionLength is the largest number of operands in an expression
+    def __init__(self, seed = 0, depth = 3, expressionLength = 8):
+        self.random = random.Random(seed)
+        self.depth = depth
+        self.expressionLength = expressionLength
+        self.variables = ['count', 'total', 'index', 'flag', 'limit', 'value']
+        self.arrays = ['items', 'table']
+
+    # Generate a program with the given number of top-level statements
+    # An invalid program has one syntax error in a random statement
+    def program(self, statements, valid = True):
+        lines = ['int main() {']
+        lines.append('    int ' + ', '.join(self.variables) + ';')
+        lines.append('    int ' + ', '.join(name + '[100]' for name in self.arrays) + ';')
+        broken = -1 if valid else self.random.randrange(max(1, statements))
+        for i in range(statements):
+            statement = self.statement(0)
+            if i == broken:
+                statement = self.corrupt(statement)
+            self.indent(statement, 1, lines)
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    # Add the lines of a statement to a list of lines, indented by the given number of levels
+    def indent(self, statement, level, lines):
+        for line in statement:
+            lines.append('    ' * level + line)
+
+    # Generate a statement as a list of lines, nesting no deeper than the depth of the generator
+    def statement(self, depth):
+        choice = self.random.random()
+        if depth >= self.depth or choice < 0.5:
+            return [self.variable() + ' = ' + self.expression() + ';']
+        if choice < 0.7:
+            lines = ['if (' + self.expression() + ')']
+            lines.extend(self.block(depth + 1))
+            if self.random.random() < 0.4:
+                lines.append('else')
+                lines.extend(self.block(depth + 1))
+            return lines
+        if choice < 0.9:
+            return ['while (' + self.expression() + ')'] + self.block(depth + 1)
+        return self.block(depth + 1)
+
+    # Generate a block of one to three statements
+    def block(self, depth):
+        lines = ['{']
+        for i in range(self.random.randint(1, 3)):
+            self.indent(self.statement(depth), 1, lines)
+        lines.append('}')
+        return lines
+
+    # Generate a variable or array element
+    def variable(self):
+        if self.random.random() < 0.2:
+            return self.random.choice(self.arrays) + '[' + str(self.random.randrange(100)) + ']'
+        return self.random.choice(self.variables)
+
+    # Generate an expression of up to expressionLength operands
+    def expression(self):
+        return self.level(0, self.random.randint(1, self.expressionLength))
+
+    # Generate the part of an expression at the given level of the grammar, with the given number of operands
+    # The operands are split between one or more parts of the next level down, which bind more tightly, so no parentheses are needed
+    def level(self, level, operands):
+        if operands == 1:
+            return self.operand()
+        operators, repeated = EXPRESSION_LEVELS[level]
+        if level == len(EXPRESSION_LEVELS) - 1:
+            parts = operands                                    # Terms are the last level, so every operand is a factor of its own
+        else:
+            parts = self.random.randint(1, operands if repeated else min(2, operands))
+        if parts == 1:
+            return self.level(level + 1, operands)
+
+        # Split the operands between the parts, giving every part at least one
+        cuts = sorted(self.random.sample(range(1, operands), parts - 1))
+        sizes = [end - start for start, end in zip([0] + cuts, cuts + [operands])]
+        words = [self.level(level + 1, sizes[0])]
+        for size in sizes[1:]:
+            words.append(self.random.choice(operators))
+            words.append(self.level(level + 1, size))
+        return ' '.join(words)
+
+    # Generate an operand, which may be an integer or float literal, negated, or cast
+    def operand(self):
+        choice = self.random.random()
+        if choice < 0.5:
+            operand = self.variable()
+        elif choice < 0.75:
+            operand = str(self.random.randrange(1000))
+        elif choice < 0.85:
+            operand = str(self.random.randrange(1000)) + '.' + str(self.random.randrange(100))
+        elif choice < 0.9:
+            operand = self.random.choice(('true', 'false'))
+        else:
+            operand = self.random.choice(('int', 'float', 'bool')) + '(' + self.variable() + ' + ' + str(self.random.randrange(10, 1000)) + ')'
+        if self.random.random() < 0.1:
+            operand = '-' + operand
+        return operand
+
+    # Introduce a syntax error into the first line of a statement
+    # Most single characters are read as character literals, so the errors are ones that the parser is sure to reject: a comparison in place of an assignment, a missing parenthesis after if or while, or a block that starts with an operator
+    def corrupt(self, statement):
+        text = statement[0]
+        for target, replacement in ((' = ', ' == '), ('if (', 'if '), ('while (', 'while '), ('{', '{ <=')):
+            if target in text:
+                statement[0] = text.replace(target, replacement, 1)
+                break
+        return statement
+
+# Return the peak memory of the process in megabytes, or None if it cannot be measured
+def peakMemory():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024       # macOS reports bytes, and other systems report kilobytes
+
+# Return the fastest time of repeat calls of a function, along with its result
+def bestTime(function, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best, result
+
+# Time the lexer, the parser, and both together on one program
+# parserClass is the class of the parser, which is the hand-written Parser or the table-driven TableParser, and parserOptions are passed to its constructor
+# lexerOptions are passed to the constructor of the Lexer, such as compact or vectorized
+def measure(text, repeat, parserOptions, parserClass = Parser, lexerOptions = {}):
+    lexer = Lexer(**lexerOptions)
+    parser = parserClass(**parserOptions)
+    lexSeconds, tokens = bestTime(lambda: lexer.lex(text), repeat)
+    parseSeconds, errors = bestTime(lambda: parser.parse(tokens), repeat)
+    totalSeconds = bestTime(lambda: parser.parse(lexer.lex(text)), repeat)[0]
+
+    megabytes = len(text.encode('utf-8')) / 1e6
+    result = {'tokens': len(tokens), 'megabytes': megabytes, 'errors': len(errors)}
+    for phase, seconds in (('lexer', lexSeconds), ('parser', parseSeconds), ('total', totalSeconds)):
+        result[phase] = {'seconds': seconds, 'tokensPerSecond': len(tokens) / seconds, 'megabytesPerSecond': megabytes / seconds}
+    result['peakMemory'] = peakMemory()
+    return result
+
+# Run the benchmark at every size and return the results in a form that can be saved as JSON
+def runBenchmark(sizes, depth = 3, expressionLength = 8, valid = True, repeat = 3, seed = 0, parserOptions = {}, parserClass = Parser, lexerOptions = {}):
+    results = []
+    for size in sizes:
+        text = ProgramGenerator(seed, depth, expressionLength).program(size, valid)
+        result = measure(text, repeat, parserOptions, parserClass, lexerOptions)
+        result['statements'] = size
+        results.append(result)
+    return {
+        'date': datetime.datetime.now().isoformat(timespec = 'seconds'),
+        'python': platform.python_implementation() + ' ' + platform.python_version(),
+        'settings': {'depth': depth, 'expressionLength': expressionLength, 'valid': valid, 'repeat': repeat, 'seed': seed, 'parser': parserOptions, 'parserClass': parserClass.__name__, 'lexer': lexerOptions},
+        'results': results
+    }
+
+# Return the time, in milliseconds, that a fresh interpreter takes to import a module, and the time that the whole process takes to start, import it, and exit
+# The import time is read from the interpreter's own -X importtime report, and the fastest of repeat runs is kept
+def importTime(module, repeat):
+    best = None
+    for i in range(repeat):
+        milliseconds = None
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], capture_output = True, text = True,
+                                   cwd = os.path.dirname(os.path.abspath(__file__)), check = True)
+        processSeconds = time.perf_counter() - start
+        for line in completed.stderr.splitlines():
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].rstrip() == ' ' + module:        # The module itself is the only top-level entry with its name
+                milliseconds = int(fields[1]) / 1000
+        if milliseconds is None:
+            raise ValueError('No import time was reported for ' + module)
+        if best is None or milliseconds < best[0]:
+            best = (milliseconds, processSeconds * 1000)
+    return best
+
+# Measure the import time of every front-end module against its budget, and return the results in a form that can be saved as JSON
+# The modules are compiled to bytecode first, since the budgets assume it, and an interpreter that does not write bytecode (such as one run with PYTHONDONTWRITEBYTECODE) would otherwise compile every module on every import
+def runStartup(budgets = STARTUP_BUDGETS, repeat = 5):
+    compileall.compile_dir(os.path.dirname(os.path.abspath(__file__)), maxlevels = 0, quiet = 1)
+    interpreter = bestTime(lambda: subprocess.run([sys.executable, '-c', 'pass'], check = True), repeat)[0]
+
+    # The modules are measured in turn, once per round, so a stretch of time in which the machine is busy slows one run of every module instead of every run of one module
+    best = {}
+    for i in range(repeat):
+        for module in budgets:
+            measured = importTime(module, 1)
+            if module not in best or measured[0] < best[module][0]:
+                best[module] = measured
+    results = []
+    for module, budget in budgets.items():
+        milliseconds, processMilliseconds = best[module]
+        results.append({'module': module, 'importMilliseconds': milliseconds, 'processMilliseconds': processMilliseconds, 'budget': budget, 'withinBudget': milliseconds <= budget})
+    return {
+        'date': datetime.datetime.now().isoformat(timespec = 'seconds'),
+        'python': platform.python_implementation() + ' ' + platform.python_version(),
+        'interpreterMilliseconds': interpreter * 1000,
+        'results': results
+    }
+
+# Print the results of a startup measurement as a table
+def startupOutput(startup):
+    print('{:<12} {:<12} {:<12} {:<10} {:<10}'.format('Module', 'Import ms', 'Process ms', 'Budget', 'Status'))
+    print('----------------------------------------------------------')
+    for result in startup['results']:
+        print('{:<12} {:<12.1f} {:<12.1f} {:<10} {:<10}'.format(result['module'], result['importMilliseconds'], result['processMilliseconds'], result['budget'],
+              'ok' if result['withinBudget'] else 'OVER'))
+    print('An empty interpreter starts and exits in {:.1f} ms'.format(startup['interpreterMilliseconds']))
+
+# Print the results of a benchmark as a table
+def benchmarkOutput(benchmark):
+    print('{:<12} {:<10} {:<10} {:<14} {:<14} {:<14} {:<10}'.format('Statements', 'Tokens', 'MB', 'Lexer tok/s', 'Parser tok/s', 'Total tok/s', 'Peak MB'))
+    print('-------------------------------------------------------------------------------------------')
+    for result in benchmark['results']:
+        print('{:<12} {:<10} {:<10.3f} {:<14.0f} {:<14.0f} {:<14.0f} {:<10}'.format(result['statements'], result['tokens'], result['megabytes'],
+              result['lexer']['tokensPerSecond'], result['parser']['tokensPerSecond'], result['total']['tokensPerSecond'],
+              'n/a' if result['peakMemory'] is None else '{:.1f}'.format(result['peakMemory'])))
+
+# Print how the throughput of a benchmark compares to an earlier one, for every size that both of them ran
+# A ratio above 1 means the new benchmark is faster
+def compareOutput(benchmark, baseline):
+    earlier = {result['statements']: result for result in baseline['results']}
+    print('{:<12} {:<10} {:<10} {:<10}'.format('Statements', 'Lexer', 'Parser', 'Total'))
+    print('----------------------------------------------')
+    for result in benchmark['results']:
+        old = earlier.get(result['statements'])
+        if old is None:
+            continue
+        ratios = [result[phase]['tokensPerSecond'] / old[phase]['tokensPerSecond'] for phase in ('lexer', 'parser', 'total')]
+        print('{:<12} {:<10.2f} {:<10.2f} {:<10.2f}'.format(result['statements'], *ratios))
+
+# Main method of the benchmark suite
+# With --startup, the import times of the front-end modules are measured instead, and the exit status is 1 if any of them is over its budget
+def main(arguments = None):
+    argumentParser = argparse.ArgumentParser(description = 'Benchmark the lexer and parser on generated programs')
+    argumentParser.add_argument('--sizes', type = int, nargs = '+', default = [100, 1000, 10000], help = 'numbers of top-level statements to generate')
+    argumentParser.add_argument('--depth', type = int, default = 3, help = 'deepest nesting of blocks, if statements, and while statements')
+    argumentParser.add_argument('--expression-length', type = int, default = 8, help = 'largest number of operands in an expression')
+    argumentParser.add_argument('--invalid', action = 'store_true', help = 'generate programs with a syntax error')
+    argumentParser.add_argument('--repeat', type = int, default = 3, help = 'number of times each measurement is repeated; the fastest is kept')
+    argumentParser.add_argument('--seed', type = int, default = 0, help = 'seed of the program generator')
+    argumentParser.add_argument('--engine', choices = ('recursive', 'climbing', 'table'), default = None, help = 'expression engine of the parser, or table for the table-driven parser')
+    argumentParser.add_argument('--lexer', choices = ('list', 'compact', 'vectorized'), default = 'list', help = 'storage of the tokens: a list of Tokens, a TokenBuffer, or a TokenBuffer scanned with NumPy')
+    argumentParser.add_argument('--tree', action = 'store_true', help = 'build syntax trees while parsing')
+    argumentParser.add_argument('--output', help = 'file to save the results to as JSON')
+    argumentParser.add_argument('--compare', help = 'JSON file of earlier results to compare against')
+    argumentParser.add_argument('--startup', action = 'store_true', help = 'measure the import time of the front-end modules against their budgets instead')
+    options = argumentParser.parse_args(arguments)
+
+    if options.startup:
+        startup = runStartup(repeat = max(options.repeat, 15))
+        startupOutput(startup)
+        if options.output is not None:
+            with open(options.output, 'w') as file:
+                json.dump(startup, file, indent = 1)
+        return 0 if all(result['withinBudget'] for result in startup['results']) else 1
+
+    parserOptions = {'expressionEngine': options.engine, 'buildTree': options.tree}
+    parserClass = Parser
+    if options.engine == 'table':
+        from grammar import TableParser                         # Imported only when it is needed, since its grammar is compiled when it is imported
+        parserOptions = {'buildTree': options.tree}
+        parserClass = TableParser
+    lexerOptions = {} if options.lexer == 'list' else {options.lexer: True}
+    benchmark = runBenchmark(options.sizes, options.depth, options.expression_length, not options.invalid, options.repeat, options.seed, parserOptions, parserClass, lexerOptions)
+    benchmarkOutput(benchmark)
+
+    if options.output is not None:
+        with open(options.output, 'w') as file:
+            json.dump(benchmark, file, indent = 1)
+    if options.compare is not None:
+        with open(options.compare, 'r') as file:
+            compareOutput(benchmark, json.load(file))
+    return 0
+
+# Execute the main method of the benchmark suite
+if __name__ == "__main__":
+    sys.exit(main())
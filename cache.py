@@ -0,0 +1,282 @@
+from array import array
+from collections import OrderedDict, deque
+import hashlib
+import marshal
+import os
+
+from lexer import scanBuffer
+from parser import Parser, ParseError
+from tokens import TokenBuffer
+from tree import Node
+
+# Cache of the results of lexing and parsing source files, keyed by a hash of their contents
+# A file that has not changed since it was last checked costs a hash and a lookup instead of a full lex and parse
+# Results are kept in memory, from the most to the least recently used, and optionally on disk, where they outlive the process
+
+# Version of the on-disk format, which is part of every key, so results written by another version are never read
+CACHE_VERSION = 1
+MAGIC = b'PRC1'
+
+# Approximate number of bytes of memory taken by a token in a TokenBuffer and by a Node, which are used to keep the memory tier within its limit
+TOKEN_BYTES = 13
+NODE_BYTES = 64
+
+# Name of the file in the cache directory that remembers the modification time, size, and hash of every file that has been checked
+# The hashes are keyed by the options of the cache, so every set of options keeps its own index, named after a hash of its key
+STAT_INDEX = 'stat.{}.index'
+
+# ParseResult class
+# The tokens, error stack, and syntax tree of one source file, as a Lexer and Parser would produce them
+# The tokens are kept in a TokenBuffer, so a result is small in memory and on disk, and a Token is only created when it is accessed
+class ParseResult:
+    __slots__ = ('__digest', '__tokens', '__errors', '__root')
+
+    # ParseResult class constructor
+    def __init__(self, digest, tokens, errors, root):
+        self.__digest = digest
+        self.__tokens = tokens
+        self.__errors = errors
+        self.__root = root
+
+    # Return the content hash of the source, as a hexadecimal string
+    def digest(self):
+        return self.__digest
+
+    # Return the number of characters in the source
+    def length(self):
+        return len(self.__tokens.source())
+
+    # Return the TokenBuffer of the source
+    def tokens(self):
+        return self.__tokens
+
+    # Return the error stack of the parse
+    def errorStack(self):
+        return self.__errors
+
+    # Return the root of the syntax tree, or None if no tree was built
+    def tree(self):
+        return self.__root
+
+    # Return the approximate number of bytes of memory that the result takes
+    def size(self):
+        nodes = 0
+        stack = [self.__root] if self.__root is not None else []
+        while len(stack) > 0:
+            node = stack.pop()
+            nodes += 1
+            stack.extend(node.children())
+        return self.length() + len(self.__tokens) * TOKEN_BYTES + nodes * NODE_BYTES + len(self.__errors) * NODE_BYTES
+
+# Convert a result into bytes in the on-disk format
+# tokenList is the list of Tokens that the result was parsed from, which its errors and tree refer to
+# The source and the columns of the TokenBuffer are stored as they are, errors and tree nodes refer to tokens by index, and the tree is stored in postorder so it can be rebuilt without recursion
+def dumpResult(result, tokenList):
+    indexes = {id(token): index for index, token in enumerate(tokenList)}
+    columns = tuple(column.tobytes() for column in result.tokens().columns())
+    errors = tuple((error.message(), indexes.get(id(error.token()), -1)) for error in result.errorStack())
+
+    tree = None
+    if result.tree() is not None:
+        kinds = array('B')
+        tokenIndexes = array('i')
+        sizes = array('I')
+        childCounts = array('I')
+        stack = [(result.tree(), False)]
+        while len(stack) > 0:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children()))
+                continue
+            kinds.append(node.kind())
+            tokenIndexes.append(indexes.get(id(node.token()), -1))
+            sizes.append(node.size())
+            childCounts.append(len(node.children()))
+        tree = (kinds.tobytes(), tokenIndexes.tobytes(), sizes.tobytes(), childCounts.tobytes())
+
+    payload = (result.digest(), result.tokens().source().encode('utf-8'), columns, errors, tree)
+    return MAGIC + marshal.dumps(payload)
+
+# Convert bytes in the on-disk format back into a result
+# Raises ValueError if the bytes are not in the on-disk format
+def loadResult(data):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a cached parse result')
+    try:
+        digest, source, columns, errors, tree = marshal.loads(data[len(MAGIC):])
+    except (EOFError, TypeError) as error:
+        raise ValueError('Damaged cached parse result') from error
+
+    source = source.decode('utf-8')
+    tokens = TokenBuffer(source)
+    for column, columnBytes in zip(tokens.columns(), columns):
+        column.frombytes(columnBytes)
+    errorStack = deque(ParseError(message, tokens[index] if index >= 0 else None) for message, index in errors)
+
+    root = None
+    if tree is not None:
+        columns = []
+        for typeCode, column in zip('BiII', tree):
+            values = array(typeCode)
+            values.frombytes(column)
+            columns.append(values)
+        nodes = []
+        for kind, index, size, childCount in zip(*columns):
+            children = tuple(nodes[len(nodes) - childCount:]) if childCount > 0 else ()
+            if childCount > 0:
+                del nodes[len(nodes) - childCount:]
+            nodes.append(Node(kind, tokens[index] if index >= 0 else None, children, size))
+        root = nodes[0] if len(nodes) > 0 else None
+    return ParseResult(digest, tokens, errorStack, root)
+
+# ParseCache class
+# Lexes and parses source files and text, and remembers the results by a hash of the source
+# The memory tier evicts the least recently used results once their total size passes memoryLimit bytes
+# With a directory, results are also written to disk, one file per hash, and read back by any process that uses the same directory
+# With useStat, a file whose modification time and size have not changed is not even read or hashed again
+class ParseCache:
+
+    # ParseCache class constructor
+    # buildTree and recover are passed on to the Parser, and are part of every key, so results parsed with other options are never mixed up
+    def __init__(self, directory = None, memoryLimit = 64 * 1024 * 1024, buildTree = False, recover = False, useStat = True):
+        self.directory = directory
+        self.memoryLimit = memoryLimit
+        self.buildTree = buildTree
+        self.recover = recover
+        self.useStat = useStat
+        self.key = repr((CACHE_VERSION, buildTree, recover)).encode('ascii')
+        self.memory = OrderedDict()                               # Results and their sizes by hash, from the least to the most recently used
+        self.memorySize = 0
+        self.stats = {}                                           # Modification time, size, and hash of every file that has been checked with the options of this cache, by path
+        self.statIndex = STAT_INDEX.format(hashlib.blake2b(self.key, digest_size = 8).hexdigest())
+        self.counts = {'statHits': 0, 'memoryHits': 0, 'diskHits': 0, 'misses': 0}
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+            try:
+                with open(os.path.join(directory, self.statIndex), 'rb') as file:
+                    self.stats = marshal.load(file)
+            except (OSError, EOFError, ValueError, TypeError):
+                self.stats = {}
+
+    # Return the result of lexing and parsing a file, from the cache if the file has been checked before
+    def check(self, fileName):
+        stat = None
+        if self.useStat:
+            info = os.stat(fileName)
+            stat = (info.st_mtime_ns, info.st_size)
+            known = self.stats.get(os.path.abspath(fileName))
+            if known is not None and known[:2] == stat:
+                result = self.lookup(known[2])
+                if result is not None:
+                    self.counts['statHits'] += 1
+                    return result
+
+        with open(fileName, 'rb') as file:
+            data = file.read()
+        digest = self.digest(data)
+        if stat is not None:
+            self.stats[os.path.abspath(fileName)] = (stat[0], stat[1], digest)
+        return self.fetch(digest, lambda: data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n'))
+
+    # Return the result of lexing and parsing source text, from the cache if the same text has been checked before
+    def checkText(self, text):
+        return self.fetch(self.digest(text.encode('utf-8')), lambda: text)
+
+    # Return the content hash of source bytes, keyed by the version and options of the cache
+    def digest(self, data):
+        return hashlib.blake2b(data, digest_size = 20, key = self.key).hexdigest()
+
+    # Return the result for a hash from the cache, or lex and parse the text returned by readText and store its result
+    def fetch(self, digest, readText):
+        result = self.lookup(digest)
+        if result is not None:
+            return result
+        self.counts['misses'] += 1
+        result, tokenList = self.parse(digest, readText())
+        self.store(result, tokenList)
+        return result
+
+    # Lex and parse source text into a result, and return it along with the list of Tokens that its errors and tree refer to
+    # Running out of tokens in the middle of a construct is recorded as an error on the last token, as it is by Document, so every source has a result that can be cached
+    def parse(self, digest, text):
+        tokens = scanBuffer(text)
+        tokenList = list(tokens)
+        try:
+            parser = Parser(tokenList, buildTree = self.buildTree, recover = self.recover)
+        except IndexError:
+            errors = deque([ParseError('End of file', tokenList[-1] if len(tokenList) > 0 else None)])
+            return ParseResult(digest, tokens, errors, None), tokenList
+        return ParseResult(digest, tokens, parser.errorStack(), parser.tree()), tokenList
+
+    # Return the result for a hash from memory, or from disk, or None if it is in neither
+    def lookup(self, digest):
+        entry = self.memory.get(digest)
+        if entry is not None:
+            self.memory.move_to_end(digest)
+            self.counts['memoryHits'] += 1
+            return entry[0]
+
+        if self.directory is None:
+            return None
+        try:
+            with open(self.path(digest), 'rb') as file:
+                result = loadResult(file.read())
+        except (OSError, ValueError):
+            return None
+        if result.digest() != digest:
+            return None
+        self.counts['diskHits'] += 1
+        self.remember(result)
+        return result
+
+    # Store a result in memory and on disk
+    # The file is written under a temporary name and then renamed, so other processes never read a half-written result
+    def store(self, result, tokenList):
+        self.remember(result)
+        if self.directory is None:
+            return
+        path = self.path(result.digest())
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        temporary = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(dumpResult(result, tokenList))
+        os.replace(temporary, path)
+
+    # Store a result in memory, evicting the least recently used results until the memory tier fits within its limit
+    def remember(self, result):
+        size = result.size()
+        if size > self.memoryLimit:
+            return
+        previous = self.memory.pop(result.digest(), None)
+        if previous is not None:
+            self.memorySize -= previous[1]
+        self.memory[result.digest()] = (result, size)
+        self.memorySize += size
+        while self.memorySize > self.memoryLimit:
+            self.memorySize -= self.memory.popitem(last = False)[1][1]
+
+    # Return the path of the file that holds the result for a hash
+    # Files are spread over subdirectories by the first two characters of their hash, so no directory grows too large
+    def path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest + '.bin')
+
+    # Write the modification times, sizes, and hashes of the checked files to the cache directory, so the next process can use them
+    def flush(self):
+        if self.directory is None:
+            return
+        path = os.path.join(self.directory, self.statIndex)
+        temporary = path + '.' + str(os.getpid()) + '.tmp'
+        with open(temporary, 'wb') as file:
+            marshal.dump(self.stats, file)
+        os.replace(temporary, path)
+
+    # Forget every result in memory
+    def clear(self):
+        self.memory.clear()
+        self.memorySize = 0
+
+    # Return the number of results found by their modification time and size, in memory, and on disk, and the number of sources that had to be lexed and parsed
+    def statistics(self):
+        return dict(self.counts)
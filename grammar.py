@@ -0,0 +1,677 @@
+from collections import deque
+import gc
+
+from parser import ParseError, ADDITION_OPERATORS, MULTIPLICATION_OPERATORS, RELATION_OPERATORS, EQUALITY_OPERATORS, UNARY_OPERATORS, BOOLEANS, TYPES
+from tree import Node, PROGRAM, DECLARATION, DECLARATOR, BLOCK, EMPTY, ASSIGNMENT, IF as IF_NODE, WHILE as WHILE_NODE, BINARY, UNARY, CAST, VARIABLE, LITERAL
+from tokens import (IDENTIFIER, INTEGER_LITERAL, FLOAT_LITERAL, INT, MAIN, IF, ELSE, WHILE, LEFT_BRACE, RIGHT_BRACE, LEFT_PARENTHESIS,
+                   RIGHT_PARENTHESIS, LEFT_BRACKET, RIGHT_BRACKET, SEMICOLON, COMMA, ASSIGN, OR, AND)
+
+# Table-driven LL(1) parser
+# The grammar of the language is written out below as data, in the same extended Backus-Naur form as the readme
+# When this module is imported, the FIRST set of every rule is computed from the grammar, and every rule is compiled into a flat list of instructions,
+# with a predict table wherever the grammar chooses between alternatives, so choosing an alternative costs a single dictionary lookup
+# TableParser runs the instructions in one loop with an explicit stack instead of calling a method for every rule, so blocks can be nested to any depth
+#
+# The hand-written Parser never backtracks: tokens it has consumed stay consumed, and a rule that fails part-way records its error and lets its caller carry on
+# The grammar keeps the same behaviour, so TableParser finds exactly the same errors, leaves exactly the same tokens, and builds exactly the same tree:
+#   a rule records its message when any of its items fails, except when its first token does not match, which fails without an error
+#   when an alternative that starts with another rule fails part-way, the alternatives after it are tried at the current token, as statement() does
+#   a rule marked discard throws away the tree nodes it pushed when it fails
+# A parenthesized expression is left out of primary, since the hand-written parser reads any single character, including '(', as a character literal first
+
+# Kinds of the items that alternatives are made of, besides token kinds and sets of token kinds (terminals) and rule names (non-terminals)
+SAVE, END, EXPECT, CHARACTER, HEADER, OPTIONAL, REPEAT, MANY, BUILD = range(9)
+
+# Kinds of the tree nodes that BUILD items make, from the tokens kept by SAVE items and the nodes of the rules called so far
+(EMPTY_NODE, BLOCK_NODE, ASSIGNMENT_NODE, IF_STATEMENT_NODE, WHILE_STATEMENT_NODE, DECLARATION_NODE, DECLARATOR_NODE, PROGRAM_NODE, BINARY_NODE, UNARY_NODE,
+ CAST_NODE, VARIABLE_NODE, LITERAL_NODE) = range(13)
+
+# Node kinds of the BUILD items whose node gathers every node pushed since the start of their rule as its children, with the first token the rule kept
+COLLECTED_NODES = {BLOCK_NODE: BLOCK, IF_STATEMENT_NODE: IF_NODE, WHILE_STATEMENT_NODE: WHILE_NODE, DECLARATION_NODE: DECLARATION, PROGRAM_NODE: PROGRAM}
+
+# Kinds of the tokens of the program header 'int main ( ) {'
+HEADER_KINDS = (INT, MAIN, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACE)
+
+# Stand-in for any single character in FIRST sets, since a character literal is recognized by the length of its word instead of its kind
+ANY_CHARACTER = None
+
+# Rule class
+# A rule of the grammar, made of one or more alternatives, each a tuple of items
+# message is recorded on the error stack when the rule fails, discard throws away the tree nodes the rule pushed if it fails,
+# and stopsAtEnd makes the rule fail without an error when there are no tokens left, instead of raising IndexError
+class Rule:
+
+    # Rule class constructor
+    def __init__(self, *alternatives, message = None, discard = False, stopsAtEnd = False):
+        self.alternatives = alternatives
+        self.message = message
+        self.discard = discard
+        self.stopsAtEnd = stopsAtEnd
+
+# Items that are written as calls, so the grammar reads like the EBNF
+# save(kinds) matches a token and keeps it for the node being built,
+# expect(kind, message) records an error and carries on when the token does not match, and build(node) makes a tree node
+# optional(items...) is [ items ], repeat(items...) is { items }, and many(rule) repeats a rule for as long as it succeeds
+def save(kinds):
+    return (SAVE, kinds)
+
+def expect(kind, message):
+    return (EXPECT, kind, message)
+
+def optional(*items):
+    return (OPTIONAL, items)
+
+def repeat(*items):
+    return (REPEAT, items)
+
+def many(rule):
+    return (MANY, rule)
+
+def build(node):
+    return (BUILD, node)
+
+# Grammar of the language
+GRAMMAR = {
+    'program':          Rule(((HEADER,), 'declarations', 'statements', (END,), build(PROGRAM_NODE))),
+    'declarations':     Rule((many('declaration'),)),
+    'declaration':      Rule((save(TYPES), 'declarator', repeat(COMMA, 'declarator'), SEMICOLON, build(DECLARATION_NODE)), message = 'Declaration', discard = True),
+    'declarator':       Rule((expect(IDENTIFIER, 'Declaration'), optional(LEFT_BRACKET, save(INTEGER_LITERAL), RIGHT_BRACKET), build(DECLARATOR_NODE))),
+    'statements':       Rule((many('statement'),)),
+    'statement':        Rule((save(SEMICOLON), build(EMPTY_NODE)), ('block',), ('assignment',), ('ifStatement',), ('whileStatement',), discard = True, stopsAtEnd = True),
+    'block':            Rule((save(LEFT_BRACE), 'statements', RIGHT_BRACE, build(BLOCK_NODE)), message = 'Block'),
+    'assignment':       Rule((save(IDENTIFIER), optional(LEFT_BRACKET, save(INTEGER_LITERAL), RIGHT_BRACKET), save(ASSIGN), 'expression', build(ASSIGNMENT_NODE)),
+                             message = 'Assignment'),
+    'ifStatement':      Rule((save(IF), LEFT_PARENTHESIS, 'expression', RIGHT_PARENTHESIS, 'statement', optional(ELSE, 'statement'), build(IF_STATEMENT_NODE)),
+                             message = 'If statement'),
+    'whileStatement':   Rule((save(WHILE), LEFT_PARENTHESIS, 'expression', RIGHT_PARENTHESIS, 'statement', build(WHILE_STATEMENT_NODE)), message = 'While statement'),
+    'expression':       Rule(('conjunction', repeat(save(OR), 'conjunction', build(BINARY_NODE))), message = 'Expression', discard = True),
+    'conjunction':      Rule(('equality', repeat(save(AND), 'equality', build(BINARY_NODE))), message = 'Conjunction'),
+    'equality':         Rule(('relation', optional(save(EQUALITY_OPERATORS), 'relation', build(BINARY_NODE))), message = 'Equality'),
+    'relation':         Rule(('addition', optional(save(RELATION_OPERATORS), 'addition', build(BINARY_NODE))), message = 'Relation'),
+    'addition':         Rule(('term', repeat(save(ADDITION_OPERATORS), 'term', build(BINARY_NODE))), message = 'Addition'),
+    'term':             Rule(('factor', repeat(save(MULTIPLICATION_OPERATORS), 'factor', build(BINARY_NODE))), message = 'Term'),
+    'factor':           Rule((optional(save(UNARY_OPERATORS)), 'primary', build(UNARY_NODE)), message = 'Factor'),
+    'primary':          Rule((save(IDENTIFIER), optional(LEFT_BRACKET, save(INTEGER_LITERAL), RIGHT_BRACKET), build(VARIABLE_NODE)),
+                             (save(TYPES), LEFT_PARENTHESIS, 'expression', RIGHT_PARENTHESIS, build(CAST_NODE)),
+                             ('literal',), message = 'Primary'),
+    'literal':          Rule((save(FLOAT_LITERAL), build(LITERAL_NODE)), (save(INTEGER_LITERAL), build(LITERAL_NODE)), (save(BOOLEANS), build(LITERAL_NODE)),
+                             ((CHARACTER,), build(LITERAL_NODE)), message = 'Literal')
+}
+
+# Operations of the compiled instructions
+# Every instruction is a tuple whose first element is its operation, followed by its operands
+#   CALL code onFail discard        call the rule compiled into code; if it fails, onFail is either the messages to record as this rule fails too, or where to jump to
+#   RETURN                          return from the rule successfully
+#   PREDICT table default messages keep
+#                                   look up the next token kind in table, or take default; a target of 0 or more consumes the token and jumps there, and ~target jumps there without consuming it
+#   WHEN kinds next exit absent keep
+#                                   consume the next token and jump to next if it is one of kinds, or jump to exit; with absent, None is kept for the node being built when it jumps to exit
+#   LOOKAHEAD first exit atEnd      jump to exit unless the next token is in the FIRST set of a rule, or if atEnd is set and there are no tokens left
+#   MATCH kind messages keep        consume the next token if it is of the kind, or fail
+#   EXPECT_TOKEN kind message save  consume the next token if it is of the kind, or record message and carry on; with save, the token or None is kept
+#   CHARACTER_TOKEN messages        consume the next token if its word is a single ASCII character, or fail
+#   PROGRAM_HEADER                  consume the program header up to its first wrong token, and print an error if there is one
+#   PROGRAM_END                     record a Program error and carry on, unless the next token is the closing brace of the program and the last token
+#   AT_END messages                 fail if there are no tokens left
+#   JUMP target, FAIL messages      jump, or fail
+#   SAVE_PREVIOUS                   keep the token that was just consumed for the node being built
+#   BUILD_NODE node                 build a tree node
+# An instruction that fails records its messages on the next token, from the innermost rule outwards, and then the rule it belongs to fails
+# With keep, an instruction that consumes a token also keeps it for the node being built, as a SAVE_PREVIOUS after it would
+(CALL, RETURN, PREDICT, WHEN, LOOKAHEAD, MATCH, EXPECT_TOKEN, CHARACTER_TOKEN, PROGRAM_HEADER, PROGRAM_END, AT_END, JUMP, FAIL, SAVE_PREVIOUS,
+ BUILD_NODE) = range(15)
+
+# Nodes that are built from the position and the nodes of their rule when it was called, so their rules are always called instead of being inlined
+BASED_NODES = frozenset(COLLECTED_NODES) | {ASSIGNMENT_NODE}
+
+# Return the set of token kinds that a terminal item matches
+def terminalKinds(item):
+    if isinstance(item, tuple):
+        item = item[1]
+    return item if isinstance(item, frozenset) else frozenset((item,))
+
+# Return whether an item is a terminal that is consumed when it matches, whether or not it is saved
+def isTerminal(item):
+    return isinstance(item, (int, frozenset)) or (isinstance(item, tuple) and item[0] == SAVE)
+
+# Return whether an item is a terminal that is saved, or a sequence of items that contains one
+def savesToken(item):
+    if isinstance(item, tuple) and item[0] == SAVE:
+        return True
+    return isinstance(item, tuple) and (item[0] == OPTIONAL or item[0] == REPEAT) and any(savesToken(inner) for inner in item[1])
+
+# Return the messages to record for a message that may be None
+def messagesOf(message):
+    return () if message is None else (message,)
+
+# Return the FIRST set of a sequence of items, and whether the whole sequence can match without any tokens
+# firstSets holds the FIRST sets of the rules found so far
+def sequenceFirst(items, firstSets):
+    first = set()
+    for item in items:
+        if isTerminal(item):
+            return first | terminalKinds(item), False
+        if isinstance(item, str):
+            return first | firstSets[item], False
+        kind = item[0]
+        if kind == EXPECT:
+            return first | {item[1]}, False
+        if kind == CHARACTER:
+            return first | {ANY_CHARACTER}, False
+        if kind == OPTIONAL or kind == REPEAT:
+            first |= sequenceFirst(item[1], firstSets)[0]
+        elif kind == MANY:
+            first |= firstSets[item[1]]
+    return first, True
+
+# Compute the FIRST set of every rule of a grammar, repeating until no set grows any further
+def firstSets(grammar):
+    sets = {name: set() for name in grammar}
+    changed = True
+    while changed:
+        changed = False
+        for name, rule in grammar.items():
+            for alternative in rule.alternatives:
+                first = sequenceFirst(alternative, sets)[0]
+                if not first <= sets[name]:
+                    sets[name] |= first
+                    changed = True
+    return {name: frozenset(first) for name, first in sets.items()}
+
+# Build the predict table of a rule, which maps every token kind that can start one of its alternatives to the index of that alternative
+# The alternative that starts with any single character is kept under ANY_CHARACTER, and is taken for every token kind that no other alternative starts with
+# Raises ValueError if two alternatives can start with the same token kind, since the grammar would then not be LL(1)
+def predictTable(name, rule, firstSets):
+    table = {}
+    for index, alternative in enumerate(rule.alternatives):
+        for kind in sequenceFirst(alternative, firstSets)[0]:
+            if kind in table:
+                raise ValueError('The grammar is not LL(1): two alternatives of ' + name + ' can start with the same token')
+            table[kind] = index
+    return table
+
+# RuleCompiler class
+# Compiles the rules of a grammar into lists of instructions, in three passes
+# First every rule is compiled on its own, with CALL instructions that name the rules they call and a single message for the instructions that can fail
+# Then every rule that is neither discarded on failure nor builds its node from where it was called is inlined into the rules that call it,
+# so the expression rules, from expression down to literal, become one list of instructions that only calls expression again for a cast
+# Last, jumps to jumps are shortened, and a WHEN that exits to another WHEN on the same token is merged with it into one PREDICT,
+# so the operators that may follow an operand, from * up to ||, are all looked for with a single lookup
+# A grammar is compiled twice, with and without the instructions that build the tree, so a parse without a tree pays nothing for it
+class RuleCompiler:
+
+    # RuleCompiler class constructor
+    def __init__(self, grammar, firstSets, buildTree):
+        self.grammar = grammar
+        self.firstSets = firstSets
+        self.buildTree = buildTree
+        self.rules = {}                                           # Instructions of each rule on its own
+        self.codes = {name: [] for name in grammar}               # Instructions of each rule after inlining, which CALL instructions hold
+
+    # Compile every rule, and return the lists of instructions by rule name
+    def compileAll(self):
+        for name, rule in self.grammar.items():
+            self.rules[name] = []
+            self.compileRule(self.rules[name], name, rule)
+        for name, code in self.codes.items():
+            self.inlineRule(name, code, (), False, {name})
+            self.threadJumps(code)
+        return self.codes
+
+    # Compile a rule into its list of instructions
+    # A rule with a single alternative that starts with a token checks for that token first, and fails silently if it is not there
+    # A rule with several alternatives predicts which one to take from the next token
+    def compileRule(self, code, name, rule):
+        if rule.stopsAtEnd:
+            code.append((AT_END, None))
+
+        alternatives = rule.alternatives
+        if len(alternatives) == 1:
+            first = alternatives[0][0]
+            if isTerminal(first):
+                kinds = terminalKinds(first)
+                if len(kinds) == 1:
+                    code.append((MATCH, next(iter(kinds)), None))
+                else:
+                    code.append((PREDICT, dict.fromkeys(kinds, len(code) + 1), None, None))
+                if self.buildTree and isinstance(first, tuple):
+                    code.append((SAVE_PREVIOUS,))
+                self.compileItems(code, alternatives[0][1:], rule.message)
+            else:
+                self.compileItems(code, alternatives[0], rule.message)
+            code.append((RETURN,))
+            return
+
+        # Compile every alternative, leaving room for the PREDICT instruction at the start
+        # An alternative that starts with another rule calls it, and if that rule fails, goes on to predict among the alternatives after it
+        predict = predictTable(name, rule, self.firstSets)
+        predicts = [(len(code), 0)]
+        code.append(None)
+        starts = []
+        for index, alternative in enumerate(alternatives):
+            first = alternative[0]
+            starts.append(len(code))
+            if isinstance(first, str):
+                predicts.append((len(code), index + 1))
+                code.append(None)
+            elif first[0] == CHARACTER:
+                code.append((CHARACTER_TOKEN, rule.message))
+                if self.buildTree:
+                    code.append((SAVE_PREVIOUS,))
+            elif self.buildTree and first[0] == SAVE:
+                code.append((SAVE_PREVIOUS,))
+            self.compileItems(code, alternative[1:], rule.message)
+            code.append((RETURN,))
+
+        # Fill in the PREDICT instruction at the start, and the one that follows the failure of every alternative that starts with another rule
+        # When no alternatives are left after it, the rule simply fails with its message
+        for position, firstIndex in predicts:
+            table = {}
+            default = None
+            for kind, index in predict.items():
+                if index >= firstIndex:
+                    target = starts[index] if isTerminal(alternatives[index][0]) else ~starts[index]
+                    if kind is ANY_CHARACTER:
+                        default = target
+                    else:
+                        table[kind] = target
+            if firstIndex == 0:
+                code[position] = (PREDICT, table, default, rule.message)
+                continue
+            called = alternatives[firstIndex - 1][0]
+            if len(table) == 0 and default is None:
+                code[position] = (CALL, called, rule.message, self.grammar[called].discard)
+            else:
+                code[position] = (CALL, called, len(code), self.grammar[called].discard)
+                code.append((PREDICT, table, default, rule.message))
+
+    # Compile items of an alternative, which record the message of their rule when they fail
+    def compileItems(self, code, items, message):
+        for item in items:
+            if isinstance(item, str):
+                code.append((CALL, item, message, self.grammar[item].discard))
+            elif isTerminal(item):
+                kinds = terminalKinds(item)
+                if len(kinds) != 1:
+                    raise ValueError('Only the first item of an alternative, optional, or repeat can be a set of tokens')
+                code.append((MATCH, next(iter(kinds)), message))
+                if self.buildTree and isinstance(item, tuple):
+                    code.append((SAVE_PREVIOUS,))
+            elif item[0] == EXPECT:
+                code.append((EXPECT_TOKEN, item[1], item[2], self.buildTree))
+            elif item[0] == HEADER:
+                code.append((PROGRAM_HEADER,))
+            elif item[0] == END:
+                code.append((PROGRAM_END,))
+            elif item[0] == OPTIONAL or item[0] == REPEAT:
+                self.compileLoop(code, item, message)
+            elif item[0] == MANY:
+                rule = self.grammar[item[1]]
+                start = len(code)
+                if ANY_CHARACTER in self.firstSets[item[1]]:
+                    raise ValueError('A rule that is repeated must not start with any character: ' + item[1])
+                code.append((LOOKAHEAD, self.firstSets[item[1]], start + 3, rule.stopsAtEnd))
+                code.append((CALL, item[1], start + 3, rule.discard))
+                code.append((JUMP, start))
+            elif item[0] == BUILD:
+                if self.buildTree:
+                    code.append((BUILD_NODE, item[1]))
+            else:
+                raise ValueError('Item cannot be compiled here: ' + repr(item))
+
+    # Compile an optional or repeated sequence of items, which is entered when the next token is its first token
+    # A repeat checks for its first token again at its end, instead of jumping back to the check at its start
+    # When a tree is built, an optional that keeps a token for a node built after it keeps None in its place if it is left out, so the node always finds the same number of tokens
+    def compileLoop(self, code, item, message):
+        items = item[1]
+        if not isTerminal(items[0]):
+            raise ValueError('An optional or repeated sequence must start with a token')
+        absent = self.buildTree and item[0] == OPTIONAL and savesToken(item) and not any(isinstance(inner, tuple) and inner[0] == BUILD for inner in items)
+        start = len(code)
+        code.append(None)
+        if self.buildTree and isinstance(items[0], tuple):
+            code.append((SAVE_PREVIOUS,))
+        self.compileItems(code, items[1:], message)
+        if item[0] == REPEAT:
+            code.append(None)
+            code[-1] = code[start] = (WHEN, terminalKinds(items[0]), start + 1, len(code), absent)
+        else:
+            code[start] = (WHEN, terminalKinds(items[0]), start + 1, len(code), absent)
+
+    # Return whether the rule called by a CALL instruction can be inlined in place of the call
+    # The rule must not be discarded on failure or build its node from where it was called, and the caller must not jump elsewhere when it fails
+    def inlines(self, instruction):
+        rule = self.grammar[instruction[1]]
+        if rule.discard or rule.stopsAtEnd or instruction[2].__class__ is int:
+            return False
+        return not any(compiled[0] == BUILD_NODE and compiled[1] in BASED_NODES for compiled in self.rules[instruction[1]])
+
+    # Append the instructions of a rule to a list, with the rules it calls inlined where they can be
+    # failure holds the messages of the rules that the rule is inlined into, which are recorded after its own when it fails
+    # When the rule is inlined, its RETURN instructions jump past its end instead, and active holds the rules being inlined, so a cycle of rules that can all be inlined is caught
+    def inlineRule(self, name, output, failure, inlined, active):
+        rule = self.rules[name]
+        positions = []                                            # Position in the output of every instruction of the rule
+        copied = []                                               # Positions in the output of the instructions whose targets must be moved
+        for instruction in rule:
+            positions.append(len(output))
+            if inlined and instruction is rule[-1]:
+                break                                             # The last RETURN of an inlined rule would only jump to the next instruction
+            if instruction[0] == CALL and self.inlines(instruction):
+                if instruction[1] in active:
+                    raise ValueError('Rules that call each other cannot all be inlined: ' + instruction[1])
+                self.inlineRule(instruction[1], output, messagesOf(instruction[2]) + failure, True, active | {instruction[1]})
+            else:
+                copied.append(len(output))
+                output.append(instruction)
+        positions.append(len(output))
+
+        # Move every target to the output, and add the messages of the enclosing rules to every instruction that can fail
+        for position in copied:
+            instruction = output[position]
+            operation = instruction[0]
+            if operation == CALL:
+                onFail = positions[instruction[2]] if instruction[2].__class__ is int else messagesOf(instruction[2]) + failure
+                output[position] = (CALL, self.codes[instruction[1]], onFail, instruction[3])
+            elif operation == RETURN and inlined:
+                output[position] = (JUMP, len(output))
+            elif operation == PREDICT:
+                table = {kind: positions[target] if target >= 0 else ~positions[~target] for kind, target in instruction[1].items()}
+                default = instruction[2]
+                if default is not None:
+                    default = positions[default] if default >= 0 else ~positions[~default]
+                output[position] = (PREDICT, table, default, messagesOf(instruction[3]) + failure)
+            elif operation == WHEN:
+                output[position] = (WHEN, instruction[1], positions[instruction[2]], positions[instruction[3]], instruction[4])
+            elif operation == LOOKAHEAD:
+                output[position] = (LOOKAHEAD, instruction[1], positions[instruction[2]], instruction[3])
+            elif operation == JUMP:
+                output[position] = (JUMP, positions[instruction[1]])
+            elif operation == MATCH:
+                output[position] = (MATCH, instruction[1], messagesOf(instruction[2]) + failure)
+            elif operation == CHARACTER_TOKEN or operation == AT_END or operation == FAIL:
+                output[position] = (operation, messagesOf(instruction[1]) + failure)
+
+    # Shorten jumps to jumps and to RETURN instructions, and merge every WHEN that exits to other WHEN instructions on the same token into a single PREDICT
+    # A WHEN that keeps None when it exits has an effect of its own, so it is never merged
+    # An instruction whose consumed token is always kept by the SAVE_PREVIOUS after it is marked to keep the token itself, and skips the SAVE_PREVIOUS
+    def threadJumps(self, code):
+        original = list(code)
+
+        # Return where a jump to the target ends up, past any JUMP instructions
+        def follow(target):
+            while original[target][0] == JUMP:
+                target = original[target][1]
+            return target
+
+        # Return the targets of a predict table or WHEN past any JUMP instructions, whether every target that consumes a token keeps it, and the targets past the SAVE_PREVIOUS if so
+        def followTargets(targets):
+            targets = [follow(target) if target >= 0 else ~follow(~target) for target in targets]
+            keep = all(original[target][0] == SAVE_PREVIOUS for target in targets if target >= 0) and any(target >= 0 for target in targets)
+            return [target + 1 if keep and target >= 0 else target for target in targets], keep
+
+        for position, instruction in enumerate(original):
+            operation = instruction[0]
+            if operation == JUMP:
+                target = follow(instruction[1])
+                code[position] = (RETURN,) if original[target][0] == RETURN else (JUMP, target)
+            elif operation == MATCH:
+                code[position] = instruction + (original[position + 1][0] == SAVE_PREVIOUS,)
+            elif operation == WHEN:
+                table = {}
+                merged = instruction
+                while True:
+                    for kind in merged[1]:
+                        table.setdefault(kind, merged[2])
+                    exit = follow(merged[3])
+                    if merged[4] or original[exit][0] != WHEN or original[exit][4] or exit == position:
+                        break
+                    merged = original[exit]
+                targets, keep = followTargets(table.values())
+                if merged is instruction:
+                    code[position] = (WHEN, instruction[1], targets[0], exit, instruction[4], keep)
+                else:
+                    code[position] = (PREDICT, dict(zip(table, targets)), ~exit, (), keep)
+            elif operation == PREDICT:
+                targets, keep = followTargets(list(instruction[1].values()) + ([] if instruction[2] is None else [instruction[2]]))
+                code[position] = (PREDICT, dict(zip(instruction[1], targets)), None if instruction[2] is None else targets[-1], instruction[3], keep)
+            elif operation == LOOKAHEAD:
+                code[position] = (LOOKAHEAD, instruction[1], follow(instruction[2]), instruction[3])
+            elif operation == CALL and instruction[2].__class__ is int:
+                code[position] = (CALL, instruction[1], follow(instruction[2]), instruction[3])
+
+# FIRST sets and predict tables of the rules, and the instructions of every rule, without and with the instructions that build the tree
+FIRST_SETS = firstSets(GRAMMAR)
+PREDICT_TABLES = {name: predictTable(name, rule, FIRST_SETS) for name, rule in GRAMMAR.items()}
+RULE_CODES = RuleCompiler(GRAMMAR, FIRST_SETS, False).compileAll()
+TREE_RULE_CODES = RuleCompiler(GRAMMAR, FIRST_SETS, True).compileAll()
+
+# TableParser class
+# Parses tokens by running the compiled instructions of the grammar in a single loop, with an explicit stack of the rules being parsed
+# It accepts and rejects exactly the same programs as the Parser, records the same errors, consumes the same tokens, and builds the same tree,
+# but it never recurses, so deeply nested blocks and expressions cannot overflow Python's call stack
+# Recovery mode, debug mode, and instrumentation are only offered by the Parser
+class TableParser:
+
+    # TableParser class constructor
+    # If buildTree is True, the parser also builds an abstract syntax tree of the program, which is returned by tree()
+    # rule is the name of the grammar rule to start with, and if no token list is given, the parser is only set up, and parse() can then be called any number of times
+    def __init__(self, tokenList = None, buildTree = False, rule = 'program'):
+        self.buildTree = buildTree
+        self.codes = TREE_RULE_CODES if buildTree else RULE_CODES
+        self.errors = deque()
+        self.root = None
+        self.index = 0
+
+        if tokenList is not None:
+            self.parse(tokenList, rule)
+
+    # Parse a list or iterator of tokens, starting with the given rule, and return the error stack
+    # Running out of tokens in the middle of a construct raises IndexError, as it does in the Parser
+    def parse(self, tokenList, rule = 'program'):
+        code = self.codes.get(rule)
+        if code is None:
+            raise ValueError('Unknown grammar rule: ' + str(rule))
+        self.errors = deque()
+        self.root = None
+        self.index = 0
+
+        tokens = list(tokenList)
+        nodes = []
+        if self.buildTree and gc.isenabled():
+            gc.disable()                                          # Trees never contain reference cycles, so the collector is paused while the tree is built, as it is by the Parser
+            try:
+                parsed = self.run(code, tokens, nodes)
+            finally:
+                gc.enable()
+        else:
+            parsed = self.run(code, tokens, nodes)
+
+        if self.buildTree and parsed and len(nodes) > 0:
+            self.root = nodes.pop()
+        return self.errors
+
+    # Run the instructions of a rule over a list of tokens, and return whether the rule succeeded
+    # Each entry of the stack holds the instructions, position, and base of a calling rule, and its CALL instruction
+    # The base of a rule is the number of tree nodes, consumed tokens, and kept tokens when it was called, so a rule that fails can be unwound to it
+    def run(self, code, tokens, nodes):
+        kinds = [token.kind() for token in tokens]
+        count = len(tokens)
+        errors = self.errors
+        build = self.buildTree
+        saved = []                                                # Tokens kept for the nodes that are being built
+        stack = []
+        base = (0, 0, 0) if build else None
+        pc = 0
+        i = 0
+
+        try:
+            while True:
+                instruction = code[pc]
+                operation = instruction[0]
+                pc += 1
+
+                # The most frequent operations come first, and every operation that succeeds goes straight on to the next instruction
+                if operation == PREDICT:
+                    target = instruction[1].get(kinds[i], instruction[2])
+                    if target is not None:
+                        if target >= 0:
+                            i += 1
+                            pc = target
+                            if instruction[4]:
+                                saved.append(tokens[i - 1])
+                        else:
+                            pc = ~target
+                        continue
+                    messages = instruction[3]
+                elif operation == WHEN:
+                    if kinds[i] in instruction[1]:
+                        i += 1
+                        pc = instruction[2]
+                        if instruction[5]:
+                            saved.append(tokens[i - 1])
+                    else:
+                        if instruction[4]:
+                            saved.append(None)
+                        pc = instruction[3]
+                    continue
+                elif operation == MATCH:
+                    if kinds[i] == instruction[1]:
+                        i += 1
+                        if instruction[3]:
+                            saved.append(tokens[i - 1])
+                            pc += 1
+                        continue
+                    messages = instruction[2]
+                elif operation == CALL:
+                    stack.append((code, pc, base, instruction))
+                    code = instruction[1]
+                    pc = 0
+                    if build:
+                        base = (len(nodes), i, len(saved))
+                    continue
+                elif operation == RETURN:
+                    if len(stack) == 0:
+                        return True
+                    code, pc, base, instruction = stack.pop()
+                    continue
+                elif operation == SAVE_PREVIOUS:
+                    saved.append(tokens[i - 1])
+                    continue
+                elif operation == BUILD_NODE:
+                    node = instruction[1]
+                    if node == BINARY_NODE:                       # The nodes of expressions are the most common, so they are built here instead of in buildNode()
+                        right = nodes.pop()
+                        nodes[-1] = Node(BINARY, saved.pop(), (nodes[-1], right))
+                    elif node == LITERAL_NODE:
+                        nodes.append(Node(LITERAL, saved.pop()))
+                    elif node == UNARY_NODE:
+                        operator = saved.pop()
+                        if operator is not None:
+                            nodes[-1] = Node(UNARY, operator, (nodes[-1],))
+                    else:
+                        self.buildNode(node, nodes, saved, base, i)
+                    continue
+                elif operation == JUMP:
+                    pc = instruction[1]
+                    continue
+                elif operation == LOOKAHEAD:
+                    if (instruction[3] and i >= count) or kinds[i] not in instruction[1]:
+                        pc = instruction[2]
+                    continue
+                elif operation == CHARACTER_TOKEN:
+                    word = tokens[i].word()
+                    if len(word) == 1:
+                        if ord(word) <= 127:
+                            i += 1
+                            continue
+                        errors.append(ParseError('Char', tokens[i]))
+                    messages = instruction[1]
+                elif operation == EXPECT_TOKEN:
+                    if kinds[i] == instruction[1]:
+                        i += 1
+                        if instruction[3]:
+                            saved.append(tokens[i - 1])
+                    else:
+                        errors.append(ParseError(instruction[2], tokens[i]))
+                        if instruction[3]:
+                            saved.append(None)
+                    continue
+                elif operation == AT_END:
+                    if i < count:
+                        continue
+                    messages = instruction[1]
+                elif operation == PROGRAM_END:
+                    if i != count - 1 or kinds[i] != RIGHT_BRACE:
+                        errors.append(ParseError('Program', tokens[i] if i < count else None))
+                    continue
+                elif operation == PROGRAM_HEADER:
+                    for kind in HEADER_KINDS:
+                        i += 1
+                        if kinds[i - 1] != kind:
+                            print('Bad program header')
+                            break
+                    continue
+                else:
+                    messages = instruction[1]
+
+                # The current rule failed, so unwind the stack until a caller jumps elsewhere on failure, recording the messages of every rule that fails on the way
+                while True:
+                    for message in messages:
+                        errors.append(ParseError(message, tokens[i]))
+                    if build:
+                        del saved[base[2]:]
+                    if len(stack) == 0:
+                        return False
+                    code, pc, callerBase, instruction = stack.pop()
+                    if build and instruction[3]:
+                        del nodes[base[0]:]
+                    base = callerBase
+                    messages = instruction[2]
+                    if messages.__class__ is int:
+                        pc = messages
+                        break
+        finally:
+            self.index = i
+
+    # Build a tree node from the tokens kept and the nodes pushed by the current rule, and push it on the node stack
+    # Binary, unary, and literal nodes are built by run() itself
+    # Every node takes the tokens it was built from off the end of the kept tokens, and a node whose rule is always called also uses the base of the rule and position, the number of tokens consumed so far
+    def buildNode(self, node, nodes, saved, base, position):
+        if node == VARIABLE_NODE or node == DECLARATOR_NODE:
+            index = saved.pop()
+            name = saved.pop()
+            if name is not None:                                  # A declarator whose name is missing has no node, as in the Parser
+                nodes.append(Node(VARIABLE if node == VARIABLE_NODE else DECLARATOR, name, () if index is None else (Node(LITERAL, index),)))
+        elif node == CAST_NODE:
+            nodes[-1] = Node(CAST, saved.pop(), (nodes[-1],))
+        elif node == EMPTY_NODE:
+            nodes.append(Node(EMPTY, saved.pop(), (), 1))
+        elif node == ASSIGNMENT_NODE:
+            equals = saved.pop()
+            index = saved.pop()
+            variable = Node(VARIABLE, saved.pop(), () if index is None else (Node(LITERAL, index),))
+            nodes.append(Node(ASSIGNMENT, equals, (variable, nodes.pop()), position - base[1]))
+        else:
+            token = saved[base[2]] if len(saved) > base[2] else None
+            del saved[base[2]:]
+            children = tuple(nodes[base[0]:])
+            del nodes[base[0]:]
+            nodes.append(Node(COLLECTED_NODES[node], token, children, position - base[1]))
+
+    # Return the error stack
+    def errorStack(self):
+        return self.errors
+
+    # Return a list of error stacks, one for every independent syntax error
+    # Parsing stops at the first syntax error, so there is at most one
+    def errorStacks(self):
+        return [deque(self.errors)] if len(self.errors) > 0 else []
+
+    # Return the root of the abstract syntax tree, or None if the parser was not asked to build one
+    def tree(self):
+        return self.root
+
+    # Return the number of tokens that have been consumed so far
+    def position(self):
+        return self.index
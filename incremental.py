@@ -0,0 +1,620 @@
+from collections import deque
+from itertools import chain
+from random import random
+
+from lexer import SCANNING_PATTERN, wordCategories, classify, opensComment
+from parser import Parser, ParseError
+from tokens import Token, INT, MAIN, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACE, RIGHT_BRACE
+from tree import Node, PROGRAM, BLOCK, IF, WHILE
+
+# Kinds of the tokens of the program header 'int main ( ) {'
+HEADER_KINDS = (INT, MAIN, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACE)
+
+# Number of tokens that are first passed to the parser for a single declaration or statement
+# The window grows until the declaration or statement fits in it, so this only needs to cover most of them
+PARSE_WINDOW = 64
+
+# Entry class
+# An entry of a Sequence, which is a node of a treap: a binary tree kept in the order of the sequence, and kept balanced by giving every entry a random priority higher than those of its children
+# count and total are the number of entries and the sum of the weights of the entries in the subtree under the entry,
+# so an entry can be found by its index or by the weight before it, and its own index and the weight before it worked out, by walking a single path of the tree
+class Entry:
+    __slots__ = ('left', 'right', 'parent', 'priority', 'count', 'total', 'weight')
+
+    # Entry class constructor
+    def __init__(self, weight = 0):
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.priority = random()
+        self.count = 1
+        self.total = weight
+        self.weight = weight
+
+    # Recompute the count and total of the subtree under the entry from those of its children
+    def update(self):
+        count = 1
+        total = self.weight
+        if self.left is not None:
+            count += self.left.count
+            total += self.left.total
+        if self.right is not None:
+            count += self.right.count
+            total += self.right.total
+        self.count = count
+        self.total = total
+
+    # Return the index of the entry in its sequence
+    def index(self):
+        index = 0 if self.left is None else self.left.count
+        entry = self
+        while entry.parent is not None:
+            if entry is entry.parent.right:
+                index += 1 + (0 if entry.parent.left is None else entry.parent.left.count)
+            entry = entry.parent
+        return index
+
+    # Return the sum of the weights of the entries before the entry in its sequence
+    def start(self):
+        start = 0 if self.left is None else self.left.total
+        entry = self
+        while entry.parent is not None:
+            if entry is entry.parent.right:
+                start += entry.parent.weight + (0 if entry.parent.left is None else entry.parent.left.total)
+            entry = entry.parent
+        return start
+
+    # Return the entry after this one in its sequence, or None if it is the last
+    def following(self):
+        entry = self.right
+        if entry is not None:
+            while entry.left is not None:
+                entry = entry.left
+            return entry
+        entry = self
+        while entry.parent is not None and entry is entry.parent.right:
+            entry = entry.parent
+        return entry.parent
+
+# Sequence class
+# A list of Entries, stored as a treap so that finding an entry by its index or weight, and replacing a range of entries, take time that grows with the logarithm of the number of entries
+class Sequence:
+
+    # Sequence class constructor
+    def __init__(self, entries = ()):
+        self.root = buildTreap(list(entries))
+
+    # Return the number of entries
+    def __len__(self):
+        return 0 if self.root is None else self.root.count
+
+    # Iterate through the entries in order
+    def __iter__(self):
+        entry = self.root
+        if entry is None:
+            return
+        while entry.left is not None:
+            entry = entry.left
+        while entry is not None:
+            yield entry
+            entry = entry.following()
+
+    # Return the sum of the weights of all entries
+    def total(self):
+        return 0 if self.root is None else self.root.total
+
+    # Return the entry at an index
+    def at(self, index):
+        entry = self.root
+        while entry is not None:
+            leftCount = 0 if entry.left is None else entry.left.count
+            if index < leftCount:
+                entry = entry.left
+            elif index == leftCount:
+                return entry
+            else:
+                index -= leftCount + 1
+                entry = entry.right
+        raise IndexError('Sequence index out of range')
+
+    # Return the first entry whose weight ends after the given weight, along with the weight before it, or None if there is none
+    # For lines weighed by their tokens, this is the line that holds the token at that index
+    def find(self, weight):
+        entry = self.root
+        found = None
+        base = 0
+        while entry is not None:
+            start = base + (0 if entry.left is None else entry.left.total)
+            if start + entry.weight > weight:
+                found = (entry, start)
+                entry = entry.left
+            else:
+                base = start + entry.weight
+                entry = entry.right
+        return found
+
+    # Return the first entry whose weight starts at or after the given weight, along with the weight before it, or None if there is none
+    def findStart(self, weight):
+        entry = self.root
+        found = None
+        base = 0
+        while entry is not None:
+            start = base + (0 if entry.left is None else entry.left.total)
+            if start >= weight:
+                found = (entry, start)
+                entry = entry.left
+            else:
+                base = start + entry.weight
+                entry = entry.right
+        return found
+
+    # Replace the entries from the start index up to the stop index with new entries
+    def replace(self, start, stop, entries):
+        left, rest = splitTreap(self.root, start)
+        right = splitTreap(rest, stop - start)[1]
+        self.root = mergeTreaps(mergeTreaps(left, buildTreap(list(entries))), right)
+        if self.root is not None:
+            self.root.parent = None
+
+    # Change the weight of an entry of the sequence
+    def reweigh(self, entry, weight):
+        entry.weight = weight
+        while entry is not None:
+            entry.update()
+            entry = entry.parent
+
+# Build a treap of a list of new entries in their order, giving every entry children of lower priority in linear time
+# Returns the root of the treap, or None if there are no entries
+def buildTreap(entries):
+    stack = []                                                  # Entries on the right edge of the treap built so far
+    for entry in entries:
+        entry.left = entry.right = entry.parent = None
+        last = None
+        while len(stack) > 0 and stack[-1].priority < entry.priority:
+            last = stack.pop()
+        if last is not None:
+            entry.left = last
+            last.parent = entry
+        if len(stack) > 0:
+            stack[-1].right = entry
+            entry.parent = stack[-1]
+        stack.append(entry)
+    if len(stack) == 0:
+        return None
+
+    # Every entry is updated after its children, which come after it in preorder
+    order = []
+    pending = [stack[0]]
+    while len(pending) > 0:
+        entry = pending.pop()
+        order.append(entry)
+        if entry.left is not None:
+            pending.append(entry.left)
+        if entry.right is not None:
+            pending.append(entry.right)
+    for entry in reversed(order):
+        entry.update()
+    return stack[0]
+
+# Split a treap into the treaps of its first count entries and of the rest
+def splitTreap(entry, count):
+    if entry is None:
+        return None, None
+    leftCount = 0 if entry.left is None else entry.left.count
+    if count <= leftCount:
+        first, second = splitTreap(entry.left, count)
+        entry.left = second
+        if second is not None:
+            second.parent = entry
+        entry.update()
+        entry.parent = None
+        return first, entry
+    first, second = splitTreap(entry.right, count - leftCount - 1)
+    entry.right = first
+    if first is not None:
+        first.parent = entry
+    entry.update()
+    entry.parent = None
+    return entry, second
+
+# Join two treaps into one that holds the entries of the first followed by those of the second
+def mergeTreaps(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first.priority > second.priority:
+        first.right = mergeTreaps(first.right, second)
+        first.right.parent = first
+        first.update()
+        return first
+    second.left = mergeTreaps(first, second.left)
+    second.left.parent = second
+    second.update()
+    return second
+
+# Line class
+# A line of an edited document, weighed by the number of its tokens
+# Tokens refer to the line that they appear on instead of storing its number, and the number is worked out from the line's place in the document, so lines can be inserted or removed without changing the lines after them
+# comment is whether the line starts inside a block comment that was opened on an earlier line
+class Line(Entry):
+    __slots__ = ('text', 'comment', 'tokens')
+
+    # Line class constructor
+    def __init__(self, text, comment = False):
+        super().__init__()
+        self.text = text
+        self.comment = comment
+        self.tokens = []
+
+    # Return the number of the line, counting from 1
+    def number(self):
+        return self.index() + 1
+
+# Item class
+# A part of a program after its header, as the parser met it: a declaration or statement, or an attempt at one that failed, weighed by the number of tokens the parser consumed for it
+# node is the tree of the declaration or statement, or None if it failed, and stray are the trees that alternatives of it which failed part-way left in the tree of the program before it
+# declaration is whether it was parsed as a declaration, errors are the errors recorded while parsing it, and exhausted is whether the tokens ran out while it was being parsed, which ends the parse of the whole program
+class Item(Entry):
+    __slots__ = ('node', 'stray', 'declaration', 'errors', 'exhausted')
+
+    # Item class constructor
+    def __init__(self, size, node, stray, declaration, errors, exhausted = False):
+        super().__init__(size)
+        self.node = node
+        self.stray = stray
+        self.declaration = declaration
+        self.errors = errors
+        self.exhausted = exhausted
+
+# LineToken class
+# A Token whose line number is read from the Line it appears on
+class LineToken(Token):
+    __slots__ = ('__line',)
+
+    # LineToken class constructor
+    def __init__(self, category, line, word, kind):
+        super().__init__(category, None, word, kind)
+        self.__line = line
+
+    # Return the number of the line that the token appears on
+    def lineNumber(self):
+        return self.__line.number()
+
+# Scan a single line of a document into a list of LineTokens
+# Returns the tokens and whether the line ends inside a block comment
+def scanLine(line):
+    cache = wordCategories
+    tokens = []
+    position = 0
+    if line.comment:
+        position = line.text.find('*/') + 2
+        if position == 1:                                       # The whole line is inside the comment
+            return tokens, True
+
+    for word in SCANNING_PATTERN.findall(line.text, position):
+        classes = cache.get(word)
+        if classes is None:
+            if word[:2] == '//' or word[:2] == '/*':            # Discard comments, as they are not true tokens. They are never cached
+                if word[1] == '/' or opensComment(word):
+                    return tokens, word[1] == '*'
+                continue
+            classes = classify(word)
+
+        tokens.append(LineToken(classes[0], line, classes[2], classes[1]))
+    return tokens, False
+
+# Scan new lines of a document that are not yet in its sequence of lines, starting inside a block comment or not, and return whether the last line ends inside a block comment
+# The state, tokens, and weight of every line are recorded on the line as it is scanned
+def scanLines(lines, inComment = False):
+    for line in lines:
+        line.comment = inComment
+        line.tokens, inComment = scanLine(line)
+        line.weight = line.total = len(line.tokens)
+    return inComment
+
+# TokenReader class
+# Reads the tokens of a document forward from an index, for parsing its parts one after another
+# Tokens that have been read but not yet passed are kept in a buffer, so every token is only copied out of its line once
+class TokenReader:
+
+    # TokenReader class constructor
+    def __init__(self, lines, start):
+        found = lines.find(start)
+        self.start = start                                      # Index of the first token in the buffer
+        self.buffer = [] if found is None else found[0].tokens[start - found[1]:]
+        self.line = None if found is None else found[0].following()     # Next line to read
+
+    # Return a list of the tokens from the start index up to the end index, which must not be before the start of the last call
+    def read(self, start, end):
+        buffer = self.buffer
+        del buffer[:start - self.start]
+        self.start = start
+        while len(buffer) < end - start and self.line is not None:
+            buffer.extend(self.line.tokens)
+            self.line = self.line.following()
+        return buffer[:end - start]
+
+# Document class
+# Holds the text, tokens, and syntax tree of a source file that is edited over time
+# The lines are kept in a Sequence weighed by their tokens, and the declarations and statements of the program in a Sequence weighed by the tokens the parser consumed for them,
+# so finding the tokens and parts of the program that an edit touches takes time that grows with the logarithm of the size of the document
+# An edit only re-lexes the lines that it touches, and only re-parses the smallest declaration, block, or statement that encloses it
+# When no node encloses it, the program is parsed again from the first part whose parse looked at an edited token, until a part ends where an old one started, after the edit
+# The parse of each part only depends on the tokens from its start, so the old parts from there on are kept, and the tree and error stack are always the same as those of a fresh parse
+class Document:
+
+    # Document class constructor
+    def __init__(self, text):
+        lines = [Line(lineText) for lineText in text.split('\n')]
+        scanLines(lines)
+        self.__lines = Sequence(lines)
+        self.__parser = Parser(buildTree = True)
+        self.__header = None                                    # Number of tokens in the program header, or None if the tokens ran out in it
+        self.__items = Sequence()
+        self.__ending = None                                    # Error recorded at the end of the program, if its closing brace is not its last token
+        self.__root = None
+        self.__errors = None                                    # Errors of the whole document, gathered from its parts when they are first asked for after an edit
+        self.parseAll()
+
+    # Return the text of the document
+    def text(self):
+        return '\n'.join(line.text for line in self.__lines)
+
+    # Return all tokens of the document as a list
+    def tokens(self):
+        return list(chain.from_iterable(line.tokens for line in self.__lines))
+
+    # Return the root of the syntax tree of the document
+    # The tree is put together from the trees of the declarations and statements the first time it is asked for after an edit
+    def tree(self):
+        if self.__errors is None:
+            self.gather()
+        return self.__root
+
+    # Return the error stack of the last parse of the whole document
+    def errorStack(self):
+        if self.__errors is None:
+            self.gather()
+        return deque(self.__errors)
+
+    # Put together the tree and errors of the whole document from those of its header and parts, as a single parse of the whole document would give them
+    # A document that is being edited is often incomplete, so running out of tokens is recorded as an error on the last token instead of being raised
+    def gather(self):
+        items = self.__items
+        last = items.at(len(items) - 1) if len(items) > 0 else None
+        if self.__header is None or last.exhausted:
+            total = self.__lines.total()
+            found = self.__lines.find(total - 1) if total > 0 else None
+            self.__root = None
+            self.__errors = [ParseError('End of file', found[0].tokens[total - 1 - found[1]] if found is not None else None)]
+            return
+        nodes = tuple(chain.from_iterable(item.stray + (item.node,) for item in items if item.node is not None))
+        self.__root = Node(PROGRAM, None, nodes, self.__header + items.total())
+        self.__errors = list(chain.from_iterable(item.errors for item in items if len(item.errors) > 0))
+        if self.__ending is not None:
+            self.__errors.append(self.__ending)
+
+    # Parse the whole document
+    # Returns the number of tokens that were parsed
+    def parseAll(self):
+        self.__header = None
+        self.__items = Sequence()
+        return self.resume(0, 0, 0)
+
+    # Replace the text between two positions with new text, then bring the tokens and the tree up to date
+    # Lines are numbered from 1, as they are in tokens, and columns are counted from 0
+    # Returns the number of tokens that were parsed again
+    def edit(self, startLine, startColumn, endLine, endColumn, replacement):
+        lines = self.__lines
+        firstLine = lines.at(startLine - 1)
+        lastLine = lines.at(endLine - 1)
+        start = firstLine.start()                               # Index of the first token on the re-lexed lines
+        oldCount = lastLine.start() + lastLine.weight - start
+
+        # Re-lex every line that the edit touches
+        text = firstLine.text[:startColumn] + replacement + lastLine.text[endColumn:]
+        newLines = [Line(lineText) for lineText in text.split('\n')]
+        inComment = scanLines(newLines, firstLine.comment)
+        newCount = sum(line.weight for line in newLines)
+
+        # Opening or closing a block comment changes how the lines after the edit are read, so they are re-lexed as well, up to the first line that starts in the same state as before
+        line = lastLine.following()
+        while line is not None and line.comment != inComment:
+            oldCount += line.weight
+            line.comment = inComment
+            line.tokens, inComment = scanLine(line)
+            lines.reweigh(line, len(line.tokens))
+            newCount += line.weight
+            line = line.following()
+
+        lines.replace(startLine - 1, endLine, newLines)
+        self.__errors = None
+        return self.reparse(start, start + oldCount, newCount - oldCount)
+
+    # Re-parse the tokens that replaced the old tokens from start to end, which changed the number of tokens by delta
+    # The smallest node that encloses them is parsed again first, then the nodes around it, and then the program from the first part whose parse looked at them
+    def reparse(self, start, end, delta):
+        header = self.__header
+        found = None if header is None or start <= header else self.__items.find(start - header - 1)
+        if found is None or found[0].node is None or end > header + found[1] + found[0].weight:
+            return self.resume(start, end, delta)
+
+        # Try the enclosing nodes from the innermost outward
+        item = found[0]
+        itemStart = header + found[1]
+        path = self.enclosingPath(item.node, itemStart + item.weight - item.node.size(), start, end)     # The trees of alternatives that failed part-way may come before the node
+        parser = self.__parser
+        while len(path) > 0:
+            node, nodeStart = path[-1]
+            size = node.size() + delta
+            if len(path) == 1:
+                nodeStart = itemStart
+                size = item.weight + delta
+            tokens = self.tokenRange(nodeStart, nodeStart + size + 1)     # One more token is passed, since the parser looks one token ahead
+
+            # The new node can only take the place of the old one if it used exactly the tokens of the old node, and only a whole part of the program may record errors
+            # Running out of tokens means the node continued past the end of the document, which the parse of the program has to report
+            rule = 'declaration' if item.declaration else 'statement'
+            try:
+                errors = parser.parse(tokens, rule)
+            except IndexError:
+                errors = None
+            if errors is not None and parser.tree() is not None and parser.position() == size and (len(path) == 1 or len(errors) == 0):
+                if len(path) == 1:
+                    item.errors = tuple(errors)
+                    item.stray = parser.strayNodes()
+                item.node = self.replaceNode(path, parser.tree(), delta)
+                self.__items.reweigh(item, item.weight + delta)
+                return size
+
+            path.pop()
+
+        return self.resume(start, end, delta)
+
+    # Parse the program again from the first part whose parse looked at any of the tokens from start onward, given that the tokens from start to end were replaced by delta more tokens
+    # Each new part is parsed in the phase of the program that the parts before it leave, declarations or statements
+    # Once a new part ends where an old part started, at a token after the edit and in the same phase, every old part from there on is kept
+    # Returns the number of tokens that were parsed
+    def resume(self, start, end, delta):
+        items = self.__items
+        parsed = 0
+        oldHeader = self.__header
+        if oldHeader is None or start <= oldHeader:
+            self.__header = self.parseHeader()
+            if self.__header is None:
+                items.replace(0, len(items), ())
+                return self.__lines.total()
+            first = 0
+            position = self.__header
+            declaration = True
+            parsed = self.__header
+        else:
+            found = items.find(start - oldHeader - 1)           # The first part that ends at or after start, and so looked at the token at start
+            if found is None:
+                self.__ending = self.checkEnding(oldHeader + items.total())
+                return 0
+            first = found[0].index()
+            position = oldHeader + found[1]
+            declaration = found[0].declaration
+
+        reader = TokenReader(self.__lines, position)
+        newItems = []
+        while True:
+            if position >= end + delta and oldHeader is not None:
+                old, oldStart = items.findStart(position - delta - oldHeader) or (None, None)
+                while old is not None and oldHeader + oldStart == position - delta:
+                    if old.declaration == declaration:
+                        items.replace(first, old.index(), newItems)
+                        return parsed
+                    oldStart += old.weight
+                    old = old.following()
+
+            item = self.parseItem(reader, position, declaration)
+            newItems.append(item)
+            parsed += item.weight
+            position += item.weight
+            if item.exhausted:
+                break
+            if item.node is None:
+                if not declaration:
+                    break
+                declaration = False                             # The declarations end at the first one that fails, and the statements start where it stopped
+
+        items.replace(first, len(items), newItems)
+        if not newItems[-1].exhausted:
+            self.__ending = self.checkEnding(position)
+        return parsed
+
+    # Parse the program header as Parser.program() does, consuming tokens up to and including the first one that does not match
+    # Returns the number of tokens consumed, or None if the tokens ran out first
+    def parseHeader(self):
+        tokens = self.tokenRange(0, len(HEADER_KINDS))
+        for count, kind in enumerate(HEADER_KINDS, 1):
+            if count > len(tokens):
+                return None
+            if tokens[count - 1].kind() != kind:
+                print('Bad program header')
+                return count
+        return len(HEADER_KINDS)
+
+    # Parse a declaration or statement that starts at a token, reading its tokens from a TokenReader, and return it as an Item
+    # The parser is given a window of tokens that grows until the part fits in it, so the work done is proportional to the size of the part
+    def parseItem(self, reader, position, declaration):
+        parser = self.__parser
+        total = self.__lines.total()
+        size = PARSE_WINDOW
+        while True:
+            tokens = reader.read(position, position + size)
+            try:
+                errors = parser.parse(tokens, 'declaration' if declaration else 'statement')
+            except IndexError:
+                if position + size < total:
+                    size *= 4
+                    continue
+                return Item(total - position, None, (), declaration, (), True)
+            node = parser.tree()
+            return Item(parser.position(), node, parser.strayNodes() if node is not None else (), declaration, tuple(errors))
+
+    # Return the error that the program records at its end, given the index of the token after its last part, or None if that token is its closing brace and its last token
+    def checkEnding(self, position):
+        tokens = self.tokenRange(position, position + 2)
+        if len(tokens) == 1 and tokens[0].kind() == RIGHT_BRACE:
+            return None
+        return ParseError('Program', tokens[0] if len(tokens) > 0 else None)
+
+    # Return the list of nodes, and the index of their first tokens, from a declaration or statement of the program down to the smallest statement inside it that contains the tokens from start to end
+    def enclosingPath(self, node, nodeStart, start, end):
+        path = [(node, nodeStart)]
+        while True:
+            for child, childStart in self.childPositions(*path[-1]):
+                if childStart <= start and end <= childStart + child.size():
+                    path.append((child, childStart))
+                    break
+            else:
+                return path
+
+    # Return the statements that are children of a node, along with the index of their first tokens
+    # Nodes only record their own sizes, so the positions are worked out from the sizes of the children and the shape of the node
+    def childPositions(self, node, nodeStart):
+        kind = node.kind()
+        children = node.children()
+        if kind == BLOCK:
+            positions = []
+            position = nodeStart + 1
+            for child in children:
+                positions.append((child, position))
+                position += child.size()
+            return positions
+        elif kind == IF:
+            end = nodeStart + node.size()
+            if len(children) == 3:
+                elseStart = end - children[2].size()
+                return [(children[1], elseStart - 1 - children[1].size()), (children[2], elseStart)]
+            return [(children[1], end - children[1].size())]
+        elif kind == WHILE:
+            return [(children[1], nodeStart + node.size() - children[1].size())]
+        return []
+
+    # Return a new tree in which the last node of the path is replaced, along with new copies of its ancestors, which grow by delta tokens
+    def replaceNode(self, path, newNode, delta):
+        for i in range(len(path) - 2, -1, -1):
+            parent = path[i][0]
+            oldNode = path[i + 1][0]
+            children = tuple(newNode if child is oldNode else child for child in parent.children())
+            newNode = Node(parent.kind(), parent.token(), children, parent.size() + delta)
+        return newNode
+
+    # Return a list of the tokens from the start index up to the end index
+    def tokenRange(self, start, end):
+        tokens = []
+        found = self.__lines.find(start)
+        if found is None:
+            return tokens
+        line, lineStart = found
+        offset = start - lineStart
+        while line is not None and len(tokens) < end - start:
+            tokens.extend(line.tokens[offset:offset + end - start - len(tokens)])
+            offset = 0
+            line = line.following()
+        return tokens
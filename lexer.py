@@ -1,52 +1,379 @@
+import mmap
 import re               # Regular Expression Library
-
-
-from token import Token
+import sys
+
+
+from tokens import Token, TriviaToken, TokenBuffer, LineIndex, CATEGORY_IDS, kindOf
+
+# Dictionary containing all reserved words, operators, and punctuation in the language to be tokenized
+# The table is built once when the module is imported and shared by every Lexer
+LEX_TABLE = {
+    'main': 'keyword',
+    'int': 'keyword',
+    'float': 'keyword',
+    'char': 'keyword',
+    'bool': 'keyword',
+    'if': 'keyword',
+    'while': 'keyword',
+    'for': 'keyword',
+    'else': 'keyword',
+    'true': 'keyword',
+    'false': 'keyword',
+    '{': 'left_brace',
+    '}': 'right_brace',
+    '(': 'left_parenthesis',
+    ')': 'right_parenthesis',
+    '[': 'left_bracket',
+    ']': 'right_bracket',
+    ';': 'semicolon',
+    ',': 'comma',
+    "'": 'apostrophe',
+    '+': 'addition_op',
+    '-': 'subtraction_op',
+    '*': 'multiplication_op',
+    '/': 'division_op',
+    '%': 'modulo_op',
+    '!': 'negation_op',
+    '>': 'greater_op',
+    '>=': 'greater_or_equal_op',
+    '<': 'less_op',
+    '<=': 'less_or_equal_op',
+    '||': 'blocking_or_op',
+    '&&': 'blocking_and_op',
+    '=': 'assignment_op',
+    '//': 'comment'
+}
+
+# The regular expression splits on many different operators and punctuations, as well as all whitespace characters
+# This pattern was provided by Dr. Al-Haj as an example of regular expressions, and is kept for findWords()
+SPLITTING_PATTERN = re.compile( "\\s+|"
+                                "([ \\;\\,\\}\\{\\(\\)\\[\\]\\: ])|"
+                                "(\\<\\=)|(\\>\\=)|(\\=\\=)|(\\/\\/)|(\\+\\+)|([\\+\\-\\*\\/\\!\\%\\<\\>\\=])|(\\|\\|)|(\\&\\&) "
+                              )
+
+# Patterns used to categorize words that are not in the table
+IDENTIFIER_PATTERN = re.compile("^[a-zA-Z_]\\w*$")               # A letter or underscore, then any sequence of letters and numbers
+INTEGER_PATTERN = re.compile("^\\d+$")                           # One or more decimal digits
+REAL_NUMBER_PATTERN = re.compile("^\\d+(.\\d+)?$")               # One or more digits and an optional period with trailing digits
+
+# Master pattern used by the scanner
+# Every alternative matches one token that the splitting pattern above would produce, so a whole line can be tokenized with a single findall()
+# Whitespace is the only thing that none of the alternatives match, so it is skipped without any Python-level work
+# 1. comments: line comments run to the end of the line, and block comments run to the closing */, or to the end of the line if it is not on the same line
+# 2. the && operator, which the splitting pattern only separates when it is followed by a space
+# 3. operators and punctuation, with two-character operators tried before their one-character prefixes
+# 4. words, which are runs of characters that do not begin any of the separators
+TOKEN_PATTERN = ( "&&(?= )|<=|>=|==|\\+\\+|\\|\\||[;,{}()\\[\\]:+\\-*/!%<>=]|"
+                  "(?:[^\\s;,{}()\\[\\]:+\\-*/!%<>=|&]|\\|(?!\\|)|&(?!& ))+"
+                )
+SCANNING_PATTERN = re.compile("//[^\\n]*|/\\*.*?\\*/|/\\*.*|" + TOKEN_PATTERN)
+
+# Pattern used by the scanner when it runs over the bytes of a memory-mapped file
+# The whole file is scanned at once instead of line by line, so line breaks are matched as well and counted by the scanner
+# \r\n and \r are line breaks too, since they are translated to \n when a file is read as text
+# A block comment is matched across line breaks in one piece, and runs to the end of the file if it is never closed
+MAPPED_SCANNING_PATTERN = re.compile(b"\\r\\n|[\\r\\n]|//[^\\r\\n]*|/\\*[\\s\\S]*?\\*/|/\\*[\\s\\S]*|" + TOKEN_PATTERN.encode('ascii'))
+
+# Bytes that are scanned differently as bytes than as text: \s matches \x1c to \x1f in text but not in bytes, and anything above \x7f is part of a multi-byte character
+# Files that contain them are decoded and scanned as text instead
+UNMAPPABLE_PATTERN = re.compile(b"[\\x1c-\\x1f\\x80-\\xff]")
+
+# Cache of the category ids and kinds of words and symbols that have already been seen
+# Source code repeats the same identifiers over and over, so most words only need a single dictionary lookup
+# The cache is cleared once it grows past its limit to keep memory flat on unusual inputs
+wordCategories = {}
+mappedWordCategories = {}                                       # The same cache for words scanned from bytes
+WORD_CACHE_LIMIT = 65536
+
+# Get the category of a word, first by matching it against the table and then by using the regular expressions
+def categorize(word):
+    category = LEX_TABLE.get(word)
+    if category is None:
+        if IDENTIFIER_PATTERN.match(word) is not None:
+            category = 'identifier'
+        elif INTEGER_PATTERN.match(word) is not None:
+            category = 'integer'
+        elif REAL_NUMBER_PATTERN.match(word) is not None:
+            category = 'float'
+        else:
+            category = 'unknown'
+    return category
+
+# Get the category id, kind, and interned string of a word, and remember them in the cache
+# The scanners give every token the interned string instead of the word they matched, so every occurrence of a word shares one string
+# Tables keyed by words, such as the symbol table of semantic.py, then compare identical strings, and the token list holds one copy of each word
+def classify(word):
+    cache = wordCategories
+    if len(cache) >= WORD_CACHE_LIMIT:
+        cache.clear()
+    categoryId = CATEGORY_IDS[categorize(word)]
+    classes = cache[word] = (categoryId, kindOf(word, categoryId), sys.intern(word))
+    return classes
+
+# Return whether a comment matched by the scanning pattern is a block comment that is not closed on the same line
+def opensComment(word):
+    return word[:2] == '/*' and (len(word) < 4 or word[-2:] != '*/')
+
+# Scan a buffer of source code and yield its tokens in order
+# lineNumber is the number of the first line in the buffer, and inComment is whether the buffer starts inside a block comment
+# offset is the offset of the buffer in the whole source, so the tokens of a buffer that is scanned in pieces carry their offsets in the whole source
+# Returns whether the buffer ends inside a block comment, so a buffer that is scanned in pieces can carry an open comment from one piece to the next
+def scan(text, lineNumber = 1, inComment = False, offset = 0):
+    cache = wordCategories
+    findWords = SCANNING_PATTERN.findall
+    lineStart = offset
+    for line in text.split('\n'):
+        position = 0
+        if inComment:
+            position = line.find('*/') + 2
+            if position == 1:                                   # The whole line is inside the comment
+                lineNumber += 1
+                lineStart += len(line) + 1
+                continue
+            inComment = False
+
+        # Only whitespace is skipped between words, so every word starts at the first place it is found after the word before it
+        # Finding it again is faster than asking the pattern for the span of every match
+        find = line.find
+        for word in findWords(line, position):
+            start = find(word, position)
+            position = start + len(word)
+            classes = cache.get(word)
+            if classes is None:
+                if word[0] == '/' and (word[:2] == '//' or word[:2] == '/*'):     # Discard comments, as they are not true tokens. They are never cached
+                    if word[1] == '/' or opensComment(word):
+                        inComment = word[1] == '*'
+                        break
+                    continue
+                classes = classify(word)
+
+            yield Token(classes[0], lineNumber, classes[2], classes[1], lineStart + start)
+        lineNumber += 1
+        lineStart += len(line) + 1
+    return inComment
+
+# Scan a buffer of source code like scan(), but keep its comments as trivia attached to the neighbouring tokens
+# Comments are attached to the token that follows them, and comments after the last token are attached to the last token, so yields TriviaTokens
+# A buffer without any tokens has nothing to attach its comments to, so they are dropped
+def scanTrivia(text, lineNumber = 1):
+    cache = wordCategories
+    findWords = SCANNING_PATTERN.findall
+    comments = []                                               # Comments that have been seen since the last token
+    openComment = None                                          # Lines of a block comment that is not closed yet
+    previous = None                                             # The last token is held back until it is known whether any comments follow it
+    lineStart = 0
+    for line in text.split('\n'):
+        position = 0
+        if openComment is not None:
+            position = line.find('*/') + 2
+            if position == 1:
+                openComment.append(line)
+                lineNumber += 1
+                lineStart += len(line) + 1
+                continue
+            openComment.append(line[:position])
+            comments.append('\n'.join(openComment))
+            openComment = None
+
+        find = line.find
+        for word in findWords(line, position):
+            start = find(word, position)                        # Found the same way as in scan()
+            position = start + len(word)
+            if word[:2] == '//' or word[:2] == '/*':
+                if opensComment(word):
+                    openComment = [word]
+                else:
+                    comments.append(word)
+                continue
+
+            classes = cache.get(word)
+            if classes is None:
+                classes = classify(word)
+            if previous is not None:
+                yield previous
+            previous = TriviaToken(classes[0], lineNumber, classes[2], classes[1], tuple(comments), (), lineStart + start)
+            comments.clear()
+        lineNumber += 1
+        lineStart += len(line) + 1
+
+    if openComment is not None:
+        comments.append('\n'.join(openComment))
+    if previous is not None:
+        if len(comments) > 0:
+            previous = TriviaToken(previous.categoryId(), previous.lineNumber(), previous.word(), previous.kind(), previous.leadingTrivia(), tuple(comments), previous.start())
+        yield previous
+
+# Scan a buffer of source code into a columnar TokenBuffer instead of creating a Token object for every token
+# The buffer records each token's offsets into the source text, so no word strings are kept either
+def scanBuffer(text):
+    cache = wordCategories
+    findWords = SCANNING_PATTERN.finditer
+    tokens = TokenBuffer(text)
+    categories, lineNumbers, starts, ends = tokens.columns()
+    lineNumber = 1
+    lineStart = 0
+    inComment = False
+    for line in text.split('\n'):
+        position = 0
+        if inComment:
+            position = line.find('*/') + 2
+            inComment = position == 1
+
+        if not inComment:
+            for match in findWords(line, position):
+                word = match.group()
+                classes = cache.get(word)
+                if classes is None:
+                    if word[0] == '/' and (word[:2] == '//' or word[:2] == '/*'):     # Discard comments, as they are not true tokens. They are never cached
+                        if word[1] == '/' or opensComment(word):
+                            inComment = word[1] == '*'
+                            break
+                        continue
+                    classes = classify(word)
+
+                categories.append(classes[0])
+                lineNumbers.append(lineNumber)
+                start, end = match.span()
+                starts.append(lineStart + start)
+                ends.append(lineStart + end)
+        lineNumber += 1
+        lineStart += len(line) + 1
+    return tokens
+
+# Scan the bytes of a memory-mapped file into a TokenBuffer that refers to the bytes directly
+# No word is copied out of the file for the tokens, and words are only decoded when they are accessed
+def scanMapped(data):
+    cache = mappedWordCategories
+    tokens = TokenBuffer(data)
+    categories, lineNumbers, starts, ends = tokens.columns()
+    lineNumber = 1
+    for match in MAPPED_SCANNING_PATTERN.finditer(data):
+        word = match.group()
+        classes = cache.get(word)
+        if classes is None:
+            if word[0] == 13 or word[0] == 10:                  # Line breaks are counted, and are never cached
+                lineNumber += 1
+                continue
+            if word[:2] == b'//':                               # Discard comments, as they are not true tokens. They are never cached
+                continue
+            if word[:2] == b'/*':                               # The line breaks inside a block comment are still counted
+                lineNumber += word.count(b'\n') + word.count(b'\r') - word.count(b'\r\n')
+                continue
+            if len(cache) >= WORD_CACHE_LIMIT:
+                cache.clear()
+            classes = cache[word] = classify(word.decode('ascii'))
+
+        categories.append(classes[0])
+        lineNumbers.append(lineNumber)
+        start, end = match.span()
+        starts.append(start)
+        ends.append(end)
+    return tokens
+
+# Memory-map a file and scan it with scanMapped()
+# Files that cannot be mapped (e.g. empty files, or streams that are not backed by a file) and files that are not plain ASCII are read and scanned as text instead
+def scanFile(file):
+    try:
+        data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError):
+        return scanBuffer(file.read())
+
+    if UNMAPPABLE_PATTERN.search(data) is not None:
+        text = data[:].decode(file.encoding if hasattr(file, 'encoding') else 'utf-8')
+        data.close()
+        return scanBuffer(text.replace('\r\n', '\n').replace('\r', '\n'))
+    return scanMapped(data)
 
 # Lexer class
 # Takes a text file and tokenizes its contents according to a list of common operators, reserved words, and data types in programming languages
 class Lexer:
-    counter = 0
-    tokens = []
 
     # Lexer class constructor
-    def __init__(self, file):    
+    # In compact mode the tokens are stored in a TokenBuffer, and Token objects are only created as they are accessed
+    # Every lexer has its own tokens and position, so lexers never see each other's tokens
+    # If no file is given, the lexer starts out empty, and lex() can then be called any number of times
+    # In mapped mode a file is memory-mapped and scanned as bytes into a TokenBuffer, so the file is neither read into a string nor copied into words
+    # instrumentation is an object with a scan(text) method that replaces the module's scan(), such as a profiler.Profiler
+    # With trivia, comments are kept on the tokens next to them instead of being discarded, and the tokens are TriviaTokens
+    # In vectorized mode the source is scanned into a TokenBuffer by the NumPy array operations of vectorized.py, or by scanBuffer() if NumPy is not installed
+    def __init__(self, file = None, compact = False, mapped = False, instrumentation = None, trivia = False, vectorized = False):
+        if instrumentation is not None and (compact or mapped or vectorized):
+            raise ValueError('Instrumentation can only be used to produce a list of Tokens')
+        if trivia and (compact or mapped or vectorized or instrumentation is not None):
+            raise ValueError('Trivia can only be kept in a list of Tokens without instrumentation')
+        if mapped and vectorized:
+            raise ValueError('Vectorized scanning reads the source as text, so it cannot be combined with mapped mode')
+        self.compact = compact
+        self.mapped = mapped
+        self.vectorized = vectorized
+        self.instrumentation = instrumentation
+        self.trivia = trivia
+        self.counter = 0
+        self.tokens = []
+        self.source = ''
+        self.index = None
+        if file is not None:
+            self.lex(file)
+
+    # Tokenize a string or a file, replacing the tokens of anything that was tokenized before, and return the tokens
+    def lex(self, source):
+        self.counter = 0
+        self.index = None
+        if self.mapped and not isinstance(source, str):
+            self.tokens = scanFile(source)
+            self.source = self.tokens.source()
+            return self.tokens
+        if not isinstance(source, str):
+            source = source.read()
+        self.source = source
+
+        # Tokenize the whole source in a single pass
+        # The scanner records the line on which each token appears
+        if self.vectorized:
+            from vectorized import scanVectorized                  # Imported only when it is used, since it imports NumPy, which takes longer than the lexer's whole startup budget
+            self.tokens = scanVectorized(source)
+        elif self.compact:
+            self.tokens = scanBuffer(source)
+        elif self.instrumentation is not None:
+            self.tokens = list(self.instrumentation.scan(source))
+        elif self.trivia:
+            self.tokens = list(scanTrivia(source))
+        else:
+            self.tokens = list(scan(source))
+        return self.tokens
 
-        # Read individual lines of the file
-        # Record the line on which each token appears     
-        lineNumber = 0
+    # Lazily tokenize a file, yielding tokens as they are scanned instead of storing them in the lexer
+    # The file is read in chunks of whole lines, so only one chunk is held in memory at a time
+    # A block comment that is still open at the end of a chunk carries over into the next chunk
+    # The offsets of the tokens are offsets in the whole text of the file, as they would be if it was tokenized at once
+    @staticmethod
+    def stream(file, chunkSize = 65536):
+        lineNumber = 1
+        inComment = False
+        offset = 0
         while True:
-            # Read one line at a time
-            lineNumber += 1
-            data = file.readline()
+            lines = file.readlines(chunkSize)
 
-            # Once all lines have been read, the last line will be empty, so break out of the loop
-            if len(data) == 0:
+            # Once all lines have been read, there will be no lines left, so stop yielding tokens
+            if len(lines) == 0:
                 break
 
-            # Split the line apart into individual words
-            myWords = self.findWords(data)
-
-            # Attempt to categorize each word
-            for word in myWords:
-                category = self.getTokenCategory(word)              # This method conducts a table matching to attempt to match reserved words and operators
-                if category == 'comment':                           # Discard comments, as they are not true tokens
-                    break
-                if category == 'unknown':                           # Try to categorize the word using individual regex-based methods if the table matching failed
-                    if self.isIdentifier(word):
-                        category = 'identifier'
-                    elif self.isInteger(word):
-                        category = 'integer'
-                    elif self.isRealNumber(word):
-                        category = 'float'
-                # Crease a new token and save it to the list of tokens
-                newToken = Token(category, lineNumber, word)
-                self.tokens.append(newToken)
+            text = ''.join(lines)
+            inComment = yield from scan(text, lineNumber, inComment, offset)
+            lineNumber += len(lines)
+            offset += len(text)
 
     # Return all tokens as a list
     def getAll(self):
         return self.tokens
 
+    # Return a LineIndex of the source that was last tokenized, which maps the offsets of its tokens to line and column numbers
+    # The index is only built the first time it is asked for, and is kept until another source is tokenized
+    def lineIndex(self):
+        if self.index is None:
+            self.index = LineIndex(self.source)
+        return self.index
+
     # Iterate through the list of tokens, one token at a time
     def next(self):
         if self.counter < len(self.tokens):
@@ -55,6 +382,12 @@ class Lexer:
             return nextToken
         return None
 
+    # Return all tokens that have yet to be iterated through, and iterate past them
+    def nextAll(self):
+        remaining = self.tokens if self.counter == 0 else self.tokens[self.counter:]
+        self.counter = len(self.tokens)
+        return remaining
+
     # Return the number of tokens that have yet to be iterated through
     def remaining(self):
         return len(self.tokens) - self.counter
@@ -74,102 +407,27 @@ class Lexer:
     # This method was provided by Dr. Al-Haj as an example of regular expressions
     def findWords(self, data):
 
-        #How do we split the string?
-        # 1. whitespaces
-        # 2. punctuations
-        # 3. operators
-
-        # The regular expression splits on many different operators and punctuations, as well as all whitespace characters
-        splitters = ( "\s+|"
-                      "([ \;\,\}\{\(\)\[\]\: ])|"
-                      "(\<\=)|(\>\=)|(\=\=)|(\/\/)|(\+\+)|([\+\-\*\/\!\%\<\>\=])|(\|\|)|(\&\&) "
-                    )
-
-        # combine all in one string and compile it into a pattern
-        splittingPattern = re.compile(splitters)
-
         # use split() function to split the input data using the compiled pattern
         # filter out the None tokens from the list
-        listOfWords = list(filter(None, splittingPattern.split(data)))
+        listOfWords = list(filter(None, SPLITTING_PATTERN.split(data)))
 
         return listOfWords
 
-    # Get teh category of a given word by matching it against a table of reserved words and symbols
+    # Get the category of a given word by matching it against a table of reserved words and symbols
     def getTokenCategory(self, word):
 
-        # Dictionary containing all reserved words, operators, and punctuation in the language to be tokenized
-        lexDict = {
-            'main': 'keyword',
-            'int': 'keyword',
-            'float': 'keyword',
-            'char': 'keyword',
-            'bool': 'keyword',
-            'if': 'keyword',
-            'while': 'keyword',
-            'for': 'keyword',
-            'else': 'keyword',
-            'true': 'keyword',
-            'false': 'keyword',
-            '{': 'left_brace',
-            '}': 'right_brace',
-            '(': 'left_parenthesis',
-            ')': 'right_parenthesis',
-            '[': 'left_bracket',
-            ']': 'right_bracket',
-            ';': 'semicolon',
-            ',': 'comma',
-            "'": 'apostrophe',
-            '+': 'addition_op',
-            '-': 'subtraction_op',
-            '*': 'multiplication_op',
-            '/': 'division_op',
-            '%': 'modulo_op',
-            '!': 'negation_op',
-            '>': 'greater_op',
-            '>=': 'greater_or_equal_op',
-            '<': 'less_op',
-            '<=': 'less_or_equal_op',
-            '||': 'blocking_or_op',
-            '&&': 'blocking_and_op',
-            '=': 'assignment_op',
-            '//': 'comment'
-        }
-
         # Attempt to match the word to a dictionary entry and return unknown if there is no match
-        if word in lexDict:
-            return lexDict[word]
-        else:
-            return 'unknown'
+        return LEX_TABLE.get(word, 'unknown')
 
     # Determine if a word is an identifier using a regular expression
     def isIdentifier(self, word):
-
-        # Match a letter or underscore, then any sequence of letters and numbers
-        identifierPattern = re.compile("^[a-zA-Z_]\w*$")
-
-        if identifierPattern.match(word) is not None:
-            return True
-        return False
+        return IDENTIFIER_PATTERN.match(word) is not None
 
     # Determine if a word is an integer using a regular expression
     # Provided by Dr.Al-Haj
     def isInteger(self, word):
-
-        # Match one of more decimal digits
-        integerNumbersPattern = re.compile("^\d+$")
-
-        if integerNumbersPattern.match(word) is not None:
-            return True
-
-        return False
+        return INTEGER_PATTERN.match(word) is not None
 
     # Determine if a word is a real (decimal/float) number using a regular expression
     def isRealNumber(self, word):
-
-        # Match one or more digits and an optional period with trailing digits
-        realNumbersPattern = re.compile("^\d+(.\d+)?$")
-        
-        if realNumbersPattern.match(word) is not None:
-            return True
-
-        return False
+        return REAL_NUMBER_PATTERN.match(word) is not None
@@ -0,0 +1,395 @@
+from math import fmod
+import sys
+
+from tree import Node, DECLARATION, BINARY, UNARY, CAST, VARIABLE, LITERAL, formatTree
+from tokens import (Token, INTEGER_LITERAL, FLOAT_LITERAL, OTHER, INT, FLOAT, CHAR, BOOL, TRUE, FALSE,
+                   PLUS, MINUS, TIMES, DIVIDE, MODULO, NOT, GREATER, GREATER_OR_EQUAL, LESS, LESS_OR_EQUAL, EQUAL, NOT_EQUAL, OR, AND)
+from vm import literalValue, parseProgram
+
+# Constant folding and expression simplification
+# Rewrites the expressions of a syntax tree into smaller trees that compute the same values, so that evaluating or compiling them does less work
+# Operators whose operands are all literals are computed ahead of time, algebraic identities such as x + 0 and x * 1 are removed, && and || are short-circuited when one side is a literal, and literals are moved to the right of commutative operators and comparisons
+# Every rewrite follows the semantics of the virtual machine in vm.py: the same types, conversions, and C-style integer division, and a rewrite that could change a value or its type is not made
+# Nothing that could raise an error when it is run, such as a division by zero, and no variable that semantic analysis or the compiler would report, is ever removed
+
+# Comparison operators that give the same result with their operands swapped, with the category and word of the swapped operator
+MIRRORED_COMPARISONS = {LESS: ('greater_op', '>', GREATER), LESS_OR_EQUAL: ('greater_or_equal_op', '>=', GREATER_OR_EQUAL),
+                        GREATER: ('less_op', '<', LESS), GREATER_OR_EQUAL: ('less_or_equal_op', '<=', LESS_OR_EQUAL)}
+COMPARISONS = (LESS, LESS_OR_EQUAL, GREATER, GREATER_OR_EQUAL, EQUAL, NOT_EQUAL)
+
+# Optimizer class
+# Rewrites the expressions of a syntax tree bottom up, in a single walk with an explicit stack, so deeply nested programs do not run out of recursion depth
+# The type of every expression, and whether it can be removed without losing an error, is worked out as it is rewritten, from the declarations of the program
+# The number of nodes before and after, and the number of rewrites of each sort, are kept for report()
+class Optimizer:
+
+    # Optimizer class constructor
+    def __init__(self):
+        self.declarations = {}
+        self.facts = {}
+        self.nodesBefore = 0
+        self.nodesAfter = 0
+        self.folded = 0
+        self.simplified = 0
+
+    # Return an optimized copy of the tree of a program, leaving the original tree unchanged
+    # Subtrees that are not changed are shared with the original tree
+    def optimize(self, root):
+        self.declarations = {}
+        self.facts = {}
+        self.folded = 0
+        self.simplified = 0
+        self.nodesBefore = countNodes(root)
+        if root is None:
+            self.nodesAfter = 0
+            return None
+
+        # A node is pushed again as a tuple under its children, and is rewritten from their rewritten forms once they are done
+        results = []
+        stack = [root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.__class__ is tuple:
+                node = node[0]
+                count = len(node.children())
+                children = tuple(results[-count:])
+                del results[-count:]
+                results.append(self.rewrite(node, children))
+            elif node.kind() == VARIABLE:
+                results.append(self.variable(node))
+            elif node.kind() == LITERAL:
+                value, typeKind = literalValue(node.token())
+                self.facts[node] = (typeKind, True)
+                results.append(node)
+            elif len(node.children()) == 0:
+                results.append(node)
+            else:
+                stack.append((node,))
+                stack.extend(node.children()[::-1])
+        root = results.pop()
+        self.nodesAfter = countNodes(root)
+        return root
+
+    # Return the text of a report of how much the last tree optimized was shrunk
+    def report(self):
+        removed = self.nodesBefore - self.nodesAfter
+        percent = 100.0 * removed / self.nodesBefore if self.nodesBefore > 0 else 0.0
+        return 'Optimized {} nodes to {} nodes ({:.1f}% smaller): {} constants folded, {} expressions simplified'.format(self.nodesBefore, self.nodesAfter, percent, self.folded, self.simplified)
+
+    # Record the type of a variable, and whether it can be removed, which it cannot if the compiler would report an error for it
+    def variable(self, node):
+        declaration = self.declarations.get(node.token().word())
+        if declaration is None:
+            self.facts[node] = (None, False)
+            return node
+        typeKind, size = declaration
+        children = node.children()
+        if size is None:
+            valid = len(children) == 0
+        else:
+            valid = len(children) > 0 and children[0].token().kind() == INTEGER_LITERAL and int(children[0].token().word()) < size
+        self.facts[node] = (typeKind, valid)
+        return node
+
+    # Return the rewritten form of a node whose children have been rewritten
+    def rewrite(self, node, children):
+        kind = node.kind()
+        if kind == BINARY:
+            return self.binary(node, children[0], children[1])
+        if kind == UNARY:
+            return self.unary(node, children[0])
+        if kind == CAST:
+            return self.cast(node, children[0])
+        if kind == DECLARATION:
+            for declarator in children:
+                size = int(declarator.children()[0].token().word()) if len(declarator.children()) > 0 else None
+                self.declarations[declarator.token().word()] = (node.token().kind(), size)
+        if all(child is original for child, original in zip(children, node.children())):
+            return node
+        return Node(kind, node.token(), children, node.size())
+
+    # Return a new node with the given parts, recording its type and whether it can be removed
+    def newNode(self, kind, token, children, typeKind, removable):
+        node = Node(kind, token, children)
+        self.facts[node] = (typeKind, removable)
+        return node
+
+    # Return a literal node of a value of a type, at the position of a token
+    def literal(self, value, typeKind, token):
+        if typeKind == BOOL:
+            literal = Token('keyword', token.lineNumber(), 'true' if value else 'false', TRUE if value else FALSE, token.start())
+        elif typeKind == FLOAT:
+            literal = Token('float', token.lineNumber(), repr(float(value)), FLOAT_LITERAL, token.start())
+        elif typeKind == CHAR:
+            literal = Token('unknown', token.lineNumber(), chr(value), OTHER, token.start())
+        else:
+            literal = Token('integer', token.lineNumber(), str(int(value)), INTEGER_LITERAL, token.start())
+        return self.newNode(LITERAL, literal, (), typeKind, True)
+
+    # Return a node that converts an expression to a bool, which is the expression itself if it is already a bool
+    def toBool(self, node, token):
+        typeKind, removable = self.facts[node]
+        if typeKind == BOOL:
+            return node
+        return self.newNode(CAST, Token('keyword', token.lineNumber(), 'bool', BOOL, token.start()), (node,), BOOL, removable)
+
+    # Rewrite a binary expression
+    def binary(self, node, left, right):
+        token = node.token()
+        operator = token.kind()
+        leftType, leftRemovable = self.facts[left]
+        rightType, rightRemovable = self.facts[right]
+        if operator == AND or operator == OR:
+            return self.logical(node, left, right)
+
+        if operator in COMPARISONS:
+            typeKind = BOOL
+        else:
+            typeKind = FLOAT if leftType == FLOAT or rightType == FLOAT else INT
+        removable = leftRemovable and rightRemovable and typeKind != FLOAT
+        if operator == DIVIDE or operator == MODULO:
+            removable = removable and right.kind() == LITERAL and literalValue(right.token())[0] != 0
+
+        if left.kind() == LITERAL and right.kind() == LITERAL:
+            value = computeBinary(operator, literalValue(left.token())[0], literalValue(right.token())[0], typeKind == FLOAT)
+            if value is not None:
+                self.folded += 1
+                return self.literal(value, typeKind, left.token())
+
+        # Literals are moved to the right, where the compiler can read them straight from the constant pool
+        if left.kind() == LITERAL and right.kind() != LITERAL:
+            if operator == PLUS or operator == TIMES or operator == EQUAL or operator == NOT_EQUAL:
+                left, right = right, left
+                leftType, rightType = rightType, leftType
+                self.simplified += 1
+            elif operator in MIRRORED_COMPARISONS:
+                category, word, kind = MIRRORED_COMPARISONS[operator]
+                token = Token(category, token.lineNumber(), word, kind, token.start())
+                left, right = right, left
+                self.simplified += 1
+                operator = kind
+
+        if right.kind() == LITERAL and operator not in COMPARISONS:
+            rightValue = literalValue(right.token())[0]
+            simpler = self.identity(operator, left, leftType, rightValue, rightType, typeKind, token)
+            if simpler is not None:
+                self.simplified += 1
+                return simpler
+            simpler = self.reassociate(operator, left, rightValue, rightType, token)
+            if simpler is not None:
+                self.simplified += 1
+                return simpler
+
+        if left is node.children()[0] and right is node.children()[1] and token is node.token():
+            self.facts[node] = (typeKind, removable)
+            return node
+        return self.newNode(BINARY, token, (left, right), typeKind, removable)
+
+    # Return the simpler form of an arithmetic expression with a literal right operand that an algebraic identity removes, or None if there is none
+    # Adding zero is only removed for integers, since -0.0 + 0 is 0.0, and multiplying by zero only for integers that can be removed
+    def identity(self, operator, left, leftType, rightValue, rightType, typeKind, token):
+        sameType = compatible(leftType, typeKind)
+        isInteger = leftType == INT or leftType == CHAR
+        if rightValue == 0 and rightType != FLOAT:
+            if operator == MINUS and sameType or operator == PLUS and isInteger:
+                return left
+            if operator == TIMES and leftType != FLOAT and self.facts[left][1]:
+                return self.literal(0, INT, token)
+        if rightValue == 1 and (operator == TIMES or operator == DIVIDE) and sameType:
+            return left
+        if rightValue == 1 and rightType != FLOAT and operator == MODULO and isInteger and self.facts[left][1]:
+            return self.literal(0, INT, token)
+        return None
+
+    # Return a single operation in place of two integer operations with literal right operands, as in x + 1 + 2 or x * 2 * 3, or None if the expression is not one
+    def reassociate(self, operator, left, rightValue, rightType, token):
+        if left.kind() != BINARY or rightType == FLOAT or rightType == BOOL or self.facts[left][0] != INT:
+            return None
+        inner = left.token().kind()
+        inside, constant = left.children()
+        if constant.kind() != LITERAL:
+            return None
+        constantValue, constantType = literalValue(constant.token())
+        if constantType == FLOAT or constantType == BOOL or self.facts[inside][0] is None:
+            return None
+        insideType = self.facts[inside][0]
+        if (operator == PLUS or operator == MINUS) and (inner == PLUS or inner == MINUS):
+            offset = (constantValue if inner == PLUS else -constantValue) + (rightValue if operator == PLUS else -rightValue)
+            if offset == 0 and compatible(insideType, INT):
+                return inside
+            if offset < 0:
+                return self.newNode(BINARY, Token('subtraction_op', token.lineNumber(), '-', MINUS, token.start()), (inside, self.literal(-offset, INT, constant.token())), INT, self.facts[left][1])
+            return self.newNode(BINARY, Token('addition_op', token.lineNumber(), '+', PLUS, token.start()), (inside, self.literal(offset, INT, constant.token())), INT, self.facts[left][1])
+        if operator == TIMES and inner == TIMES:
+            product = constantValue * rightValue
+            if product == 1 and compatible(insideType, INT):
+                return inside
+            return self.newNode(BINARY, token, (inside, self.literal(product, INT, constant.token())), INT, self.facts[left][1])
+        return None
+
+    # Rewrite an && or || expression, whose value is always a bool
+    # An operand is only removed when the other one decides the result and it cannot raise an error, or when it is a literal
+    def logical(self, node, left, right):
+        token = node.token()
+        isAnd = token.kind() == AND
+        leftRemovable = self.facts[left][1]
+        rightRemovable = self.facts[right][1]
+        if left.kind() == LITERAL and right.kind() == LITERAL:
+            leftValue = bool(literalValue(left.token())[0])
+            rightValue = bool(literalValue(right.token())[0])
+            self.folded += 1
+            return self.literal(leftValue and rightValue if isAnd else leftValue or rightValue, BOOL, left.token())
+        if left.kind() == LITERAL:
+            truth = bool(literalValue(left.token())[0])
+            if truth == isAnd:
+                self.simplified += 1
+                return self.toBool(right, token)
+            if rightRemovable:
+                self.simplified += 1
+                return self.literal(truth, BOOL, left.token())
+        elif right.kind() == LITERAL:
+            truth = bool(literalValue(right.token())[0])
+            if truth == isAnd:
+                self.simplified += 1
+                return self.toBool(left, token)
+            if leftRemovable:
+                self.simplified += 1
+                return self.literal(truth, BOOL, token)
+        if left is node.children()[0] and right is node.children()[1]:
+            self.facts[node] = (BOOL, leftRemovable and rightRemovable)
+            return node
+        return self.newNode(BINARY, token, (left, right), BOOL, leftRemovable and rightRemovable)
+
+    # Rewrite a unary expression
+    def unary(self, node, operand):
+        token = node.token()
+        isNot = token.kind() == NOT
+        operandType, removable = self.facts[operand]
+        typeKind = BOOL if isNot else FLOAT if operandType == FLOAT else INT
+        if operand.kind() == LITERAL:
+            value = literalValue(operand.token())[0]
+            self.folded += 1
+            return self.literal(not value if isNot else -value, typeKind, token)
+
+        # Two negations, or two nots of a bool, cancel out
+        if operand.kind() == UNARY and operand.token().kind() == token.kind():
+            inner = operand.children()[0]
+            if compatible(self.facts[inner][0], typeKind):
+                self.simplified += 1
+                return inner
+        if operand is node.children()[0]:
+            self.facts[node] = (typeKind, removable and typeKind != FLOAT)
+            return node
+        return self.newNode(UNARY, token, (operand,), typeKind, removable and typeKind != FLOAT)
+
+    # Rewrite a cast, which is removed if the value already has the type it casts to
+    def cast(self, node, operand):
+        token = node.token()
+        typeKind = token.kind()
+        operandType, removable = self.facts[operand]
+        if operand.kind() == LITERAL:
+            value = convertValue(literalValue(operand.token())[0], operandType, typeKind)
+            if value is not None:
+                self.folded += 1
+                return self.literal(value, typeKind, token)
+        if compatible(operandType, typeKind):
+            self.simplified += 1
+            return operand
+        if operand is node.children()[0]:
+            self.facts[node] = (typeKind, removable and typeKind != FLOAT)
+            return node
+        return self.newNode(CAST, token, (operand,), typeKind, removable and typeKind != FLOAT)
+
+# Return whether a value of one type can stand in for a value of another without any change in how it is run
+# Chars are held as ints, so a char can stand in for an int, but not the other way round, since a char is converted into the range of a byte
+def compatible(source, target):
+    return source is not None and (source == target or source == CHAR and target == INT)
+
+# Return the value of a binary operator applied to two constants as the virtual machine would compute it, or None if it would raise an error, which is left to happen when the program is run
+def computeBinary(operator, left, right, isFloat):
+    try:
+        if operator == PLUS:
+            return left + right
+        if operator == MINUS:
+            return left - right
+        if operator == TIMES:
+            return left * right
+        if operator == DIVIDE:
+            if isFloat:
+                return left / right
+            quotient = left // right
+            if quotient < 0 and quotient * right != left:
+                quotient += 1
+            return quotient
+        if operator == MODULO:
+            if isFloat:
+                return fmod(left, right) if right != 0 else None
+            remainder = left % right
+            if remainder != 0 and (remainder < 0) != (left < 0):
+                remainder -= right
+            return remainder
+        if operator == LESS:
+            return left < right
+        if operator == LESS_OR_EQUAL:
+            return left <= right
+        if operator == GREATER:
+            return left > right
+        if operator == GREATER_OR_EQUAL:
+            return left >= right
+        if operator == EQUAL:
+            return left == right
+        return left != right
+    except (ZeroDivisionError, OverflowError):
+        return None
+
+# Return a constant converted from one type to another as the virtual machine would convert it, or None if the conversion would raise an error
+def convertValue(value, source, target):
+    if source == target or target == INT and source == CHAR:
+        return value
+    try:
+        if target == INT:
+            return int(value)
+        if target == FLOAT:
+            return float(value)
+        if target == CHAR:
+            return int(value) & 0xFF
+        return bool(value)
+    except (OverflowError, ValueError):
+        return None
+
+# Return the number of nodes in a tree
+def countNodes(root):
+    if root is None:
+        return 0
+    count = 0
+    stack = [root]
+    while len(stack) > 0:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children())
+    return count
+
+# Return an optimized copy of the tree of a program
+def optimizeTree(root):
+    return Optimizer().optimize(root)
+
+# Main method for optimizing a program
+# Prints the optimized syntax tree, followed by how much it was shrunk
+def main(arguments = None):
+    arguments = sys.argv[1:] if arguments is None else arguments
+    if len(arguments) != 1:
+        print('Usage: python optimizer.py <source file>')
+        return 2
+
+    root = parseProgram(arguments[0])                             # None for a program with a syntax error, or one that stops before its closing brace
+    if root is None:
+        return 1
+    optimizer = Optimizer()
+    root = optimizer.optimize(root)
+    print(formatTree(root))
+    print(optimizer.report())
+    return 0
+
+# Execute the main method of the optimizer
+if __name__ == "__main__":
+    sys.exit(main())
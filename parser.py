@@ -1,574 +1,953 @@
-from collections import deque
-import re
-
-class Parser:
-    tokens = None
-    errors = deque()
-    debug = False
-
-    # Parser class constructor
-    def __init__(self, tokenList, debug = False):
-        self.debug = debug                                        # Debug mode prints all called functions to the terminal
-        self.tokens = deque(tokenList)                            # Python's double-ended queue is very useful for both queue and stack operations, and it is critical in this implementation
-        self.tokens = self.removeComments(self.tokens)        # The parser ignores comments in the source code, so if they exist within the token list, they should be removed before parsing
-        
-        # Start the parsing by looking for a program
-        self.program()
-
-    # Push an error to the syntax error stack
-    # This method is called by most of the parsing methods
-    def appendError(self, token, message):
-        newError = ParseError(message, token)
-        self.errors.append(newError)
-
-    # Return the error stack
-    def errorStack(self):
-        return self.errors
-
-    # Remove all comment tokens from the token queue, as they should not affect the syntax of the program
-    def removeComments(self, tokenQueue):
-        count = len(tokenQueue)
-        for i in range(count):
-            if tokenQueue[0].category() == 'comment':
-                tokenQueue.popleft()
-            else:
-                tokenQueue.append(tokenQueue.popleft())
-        return tokenQueue
-
-
-    ## ------ Methods for parsing blocks of tokens ------
-
-    # Identify the addition of one or more terms
-    def addition(self):
-        if self.debug == True:
-            print('addition')
-
-        # Look for one or more terms with addition operations separating them
-        # Record a syntax error is there is not at least one term or there is a hanging addition operator at the end of the addition
-        while True:
-            if not self.term():
-                self.appendError(self.tokens[0], 'Addition')
-                return False
-            
-            if not self.addOp():
-                break
-
-        return True
-
-    # Identify an addition operator
-    def addOp(self):
-        if self.debug == True:
-            print('addOp')
-
-        # Look at the next token in the queue and see if it is an addition or subtraction sign
-        nextToken = self.tokens[0]
-        if not (nextToken.word() == '+' or nextToken.word() == '-'):
-            return False
-        self.tokens.popleft()                                     # Dequeue an operator once it has been identified
-
-        return True
-    
-    # Identify an assignment statement
-    def assignment(self):
-        if self.debug == True:
-            print('assignment')
-
-        if not self.identifier():
-            return False
-
-        # Handle the assignment of an array element
-        if (self.tokens[0].word() == '['):
-            self.tokens.popleft().word()
-            if not (self.integer() and self.tokens[0].word() == ']'):
-                self.appendError(self.tokens[0], 'Assignment')
-                return False
-            self.tokens.popleft().word()
-
-        # Look for the equals sign in the assignment
-        if not self.tokens[0].word() == '=':
-            self.appendError(self.tokens[0], 'Assignment')
-            return False
-        self.tokens.popleft()
-
-        # Look for the right-hand expression in the assignment
-        if not self.expression():
-            self.appendError(self.tokens[0], 'Assignment')
-            return False
-
-        return True                                                 # Only return True if all components of an assignment are present
-
-    # Parse a block of statements enclosed within braces
-    def block(self):
-        if self.debug == True:
-            print('block')
-
-        # Look for an opening brace, which indicates that a block exists
-        if not self.tokens[0].word() == '{':
-            return False
-        self.tokens.popleft()
-
-        # Parse through any statements in the block, but let the statements function worry about how to do so
-        self.statements()
-
-        # Look for the closing brace of the block and record an error if it doesn't exist
-        if not self.tokens[0].word() == '}':
-            self.appendError(self.tokens[0], 'Block')
-            return False
-        self.tokens.popleft()
-
-        return True
-        
-    # Idenfity a Boolean value
-    def boolean(self):
-        if self.debug == True:
-            print('boolean')
-
-        # Look for the words 'true' and 'false'
-        if not (self.tokens[0].word() == 'true' or self.tokens[0].word() == 'false'):
-            return False
-        self.tokens.popleft()
-        return True
-
-    # Identify a character literal
-    def char(self):
-        if self.debug == True:
-            print('char')
-
-        # The length of a character should always be 1
-        if len(self.tokens[0].word()) != 1:
-            return False
-
-        # The order of an ASCII character (its corresponding integer value) is within the range [0, 127]
-        if ord(self.tokens[0].word()) > 127:
-            self.appendError(self.tokens[0], 'Char')
-            return False
-        self.tokens.popleft()
-
-        # If both tests are passed, the word is a character
-        return True
-
-    # Parse a conjunction of one or more equalities
-    def conjunction(self):
-        if self.debug == True:
-            print('conjunction')
-
-        # Iterate through as many equalities as can be found in the statement
-        while True:
-            if not self.equality():
-                self.appendError(self.tokens[0], 'Conjunction')
-                return False
-
-            # If there is no conjunction operator to join another equality to the end of the statement, assume the conjunction is over
-            if not self.tokens[0].word() == '&&':
-                break
-            self.tokens.popleft().word()                          # Dequeue the conjunction operator if it exists
-
-        return True
-
-    # Parse through a variable declaration (or multiple declarations within the same statement)
-    def declaration(self):
-        if self.debug == True:
-            print('declaration')
-
-        # Consume the type of the declaration
-        if not self.type():
-            return False
-
-        # Handle the individual variable identifier(s)
-        while True:
-            if not self.identifier():
-                self.appendError(self.tokens[0], 'Declaration')
-
-            # Deal with the declaration of an array
-            if (self.tokens[0].word() == '['):
-                self.tokens.popleft().word()
-                if not (self.integer() and self.tokens[0].word() == ']'):
-                    self.appendError(self.tokens[0], 'Declaration')
-                    return False
-                self.tokens.popleft().word()
-            
-            # Check if there is another variable being declared in the same statement
-            if not self.tokens[0].word() == ',':
-                break
-            self.tokens.popleft().word()
-
-        # Deal with the semicolon at the end of a declaration
-        if not self.tokens[0].word() == ';':
-            self.appendError(self.tokens[0], 'Declaration')
-            return False
-        self.tokens.popleft().word()
-
-        return True
-
-    # Parse through a sequence of one or more declarations
-    def declarations(self):
-        if self.debug == True:
-            print('declarations')
-
-        numDecl = 0
-
-        while (True):
-            if not self.declaration():
-                break
-            numDecl += 1
-
-        # Ensure there is at least one declaration before confirming that there are declarations in the program
-        if numDecl < 1:
-            return False
-        return True
-
-    # Check whether there is an equality within a given expression. An equality is made up of one or two relations
-    def equality(self):
-        if self.debug == True:
-            print('equality')
-
-        # Check for the first relation
-        if not self.relation():
-            self.appendError(self.tokens[0], 'Equality')
-            return False
-
-        # Check for an equality operator, which indicates that there is another relation in this equality
-        if self.equOp():
-            if not self.relation():
-                self.appendError(self.tokens[0], 'Equality')
-                return False
-
-        return True
-
-    # Check for an equality operator, which is either == or !=
-    def equOp(self):
-        if self.debug == True:
-            print('equOp')
-
-        nextToken = self.tokens[0]
-        if not (nextToken.word() == '==' or nextToken.word() == '!='):
-            return False
-        self.tokens.popleft().word()
-
-        return True
-
-    # Parse through an expression, which is made up of one or more conjunctions, connected by the || symbol
-    def expression(self):
-        if self.debug == True:
-            print('expression')
-
-        # Loop to consume one or more conjunctions that make up this expression
-        while True:
-            if not self.conjunction():
-                self.appendError(self.tokens[0], 'Expression')
-                return False
-
-            # Check for a || symbol, which indicates there will be another conjunction in the expression
-            if not self.tokens[0].word() == '||':
-                break
-            self.tokens.popleft().word()
-
-        return True
-
-    # Parse a factor, which is made up of an optional unary operator and a primary value or variable
-    def factor(self):
-        if self.debug == True:
-            print('factor')
-
-        self.unaryOp()                                            # Consume a unary operator if it exists, but don't generate any errors if it is not present
-
-        # Consume the primary
-        if not self.primary():
-            self.appendError(self.tokens[0], 'Factor')
-            return False
-
-        return True
-
-    # Check whether a token is a float. This is simple because the lexer categorizes float values with the category 'float' already
-    def float(self):
-        if self.debug == True:
-            print('float')
-
-        if not self.tokens[0].category() == 'float':
-            return False
-
-        return True
-                
-    # Check if there is an identifier. This is simple because the lexer assigns identifiers to the category 'identifier'
-    def identifier(self):
-        if self.debug == True:
-            print('identifier')
-
-        if not self.tokens[0].category() == 'identifier':
-            return False
-        self.tokens.popleft().word()
-        return True
-
-    # Parse through an if statement and ensure it contains the correct keyword, punctuation, expression, and statement
-    def ifStatement(self):
-        if self.debug == True:
-            print('ifStatement')
-
-        if not self.tokens[0].word() == 'if':
-            return False
-        self.tokens.popleft().word()
-
-        if not self.tokens[0].word() == '(':
-            self.appendError(self.tokens[0], 'If statement')
-            return False
-        self.tokens.popleft().word()
-
-        if not self.expression():
-            self.appendError(self.tokens[0], 'If statement')
-            return False
-        
-        if not self.tokens[0].word() == ')':
-            self.appendError(self.tokens[0], 'If statement')
-            return False
-        self.tokens.popleft().word()
-
-        if not self.statement():
-            self.appendError(self.tokens[0], 'If statement')
-            return False
-
-        # Deal with an else statement following the if statement
-        if self.tokens[0].word() == 'else':
-            self.tokens.popleft()
-            if not self.statement():
-                self.appendError(self.tokens[0], 'If statement')
-                return False
-
-        return True
-
-    # Check if the next token is an integer
-    def integer(self):
-        if self.debug == True:
-            print('integer')
-
-        if not self.tokens[0].category() == 'integer':
-            return False
-        self.tokens.popleft().word()
-        return True
-
-    # Check if a token is a literal, which could be an integer, float, boolean, or char value
-    def literal(self):
-        if self.debug == True:
-            print('literal')
-
-        if not (self.float() or self.integer() or self.boolean() or self.char()):
-            self.appendError(self.tokens[0], 'Literal')
-            return False
-        return True
-
-    # Parse a multiplication operation
-    def mulOp(self):
-        if self.debug == True:
-            print('mulOp')
-
-        nextToken = self.tokens[0]
-        if not (nextToken.word() == '*' or nextToken.word() == '/' or nextToken.word() == '%'):
-            return False
-        self.tokens.popleft().word()
-
-        return True
-
-    # Parse a primary, which can be a variable, literal, or expression wihin parentheses
-    def primary(self):
-        if self.debug == True:
-            print('primary')
-
-        if self.identifier():
-
-            # Deal with the indexing of an array
-            if (self.tokens[0].word() == '['):
-                self.tokens.popleft().word()
-
-                if not (self.integer() and self.tokens[0].word() == ']'):
-                    self.appendError(self.tokens[0], 'Primary')
-                    return False
-                self.tokens.popleft().word()
-
-            return True
-        elif self.literal():
-            return True
-        elif self.tokens[0].word() == '(':
-            self.tokens.popleft().word()
-
-            if not (self.expression() and self.tokens[0].word() == ')'):
-                self.appendError(self.tokens[0], 'Primary')
-                return False
-            self.tokens.popleft().word()
-
-            return True
-        elif self.type():                                         # Parse an expression that is being cast to another data type
-            if not self.tokens[0].word() == '(':
-                self.appendError(self.tokens[0], 'Primary')
-                return False
-            self.tokens.popleft().word()
-
-            if not (self.expression() and self.tokens[0].word() == ')'):
-                self.appendError(self.tokens[0], 'Primary')
-                return False
-            self.tokens.popleft().word()
-
-            return True
-
-        self.appendError(self.tokens[0], 'Primary')
-        return False
-
-    # Parse a program, which is the topmost component of the source code and contains a very specific header
-    def program(self):
-        if self.debug == True:
-            print('program')
-
-        # Consume the header, which must consist of the tokens 'int', 'main', '(', ')', '{'
-        if not (self.tokens.popleft().word() == 'int' and self.tokens.popleft().word() == 'main' and self.tokens.popleft().word() == '(' and self.tokens.popleft().word() == ')' and self.tokens.popleft().word() == '{'):            
-            print('Bad program header')
-        self.declarations()
-        self.statements()
-
-    # Parse a relation, which is one or two additions, separated by a relation operator
-    def relation(self):
-        if self.debug == True:
-            print('relation')
-
-        # Consume the first addition
-        if not self.addition():
-            self.appendError(self.tokens[0], 'Relation')
-            return False
-
-        # Check if there is a relation operator, which indicates there is another addition
-        if self.relOp():
-            if not self.addition():
-                self.appendError(self.tokens[0], 'Relation')
-                return False
-
-        return True
-
-    # Check for the presence of a relativity operator
-    def relOp(self):
-        if self.debug == True:
-            print('relOp')
-
-        nextToken = self.tokens[0]
-        if not (nextToken.word() == '>' or nextToken.word() == '>=' or nextToken.word() == '<' or nextToken.word() == '<='):
-            return False
-        self.tokens.popleft().word()
-
-        return True
-
-    # Parse a code statement, consisting of an assignment, if statement, while statement, or semicolon
-    def statement(self):
-        if self.debug == True:
-            print('statement')
-
-        if len(self.tokens) < 1:
-            return False
-
-        if self.tokens[0].word() == ';':
-            self.tokens.popleft().word()
-            return True
-        elif (self.block() or self.assignment() or self.ifStatement() or self.whileStatement()):
-            return True
-
-        return False
-
-    # Parse a sequence of one or more statements
-    def statements(self):
-        if self.debug == True:
-            print('statements')
-
-        numStat = 0
-
-        while (True):
-            if not self.statement():
-                break
-            numStat += 1
-
-        if numStat < 1:
-            return False
-        return True
-    
-    # Parse a term in an expression, which consists of one or more factors
-    def term(self):
-        if self.debug == True:
-            print('term')
-
-        while True:
-            if not self.factor():
-                self.appendError(self.tokens[0], 'Term')
-                return False
-
-            if not self.mulOp():
-                break
-
-        return True
-
-    # Check for the presence of a data type, of which int, bool, float, and char are recognized
-    def type(self):
-        if self.debug == True:
-            print('type')
-
-        nextToken = self.tokens[0]
-        if (nextToken.category() == 'keyword' and (nextToken.word() == 'int' or nextToken.word() == 'bool' or nextToken.word() == 'float' or nextToken.word() == 'char')):
-            self.tokens.popleft().word()
-            return True
-        return False
-
-    # Check for a unary operator, which is either the unary negative for numeric values or unary negation for logical values
-    def unaryOp(self):
-        if self.debug == True:
-            print('unaryOp')
-
-        nextToken = self.tokens[0]
-        if not (nextToken.word() == '-' or nextToken.word() == '!'):
-            return False
-        self.tokens.popleft().word()
-        
-        return True
-
-    # Parse a while statement, which has a specific order of reserved words, punctuation, and an expression
-    def whileStatement(self):
-        if self.debug == True:
-            print('whileStatement')
-
-        if not self.tokens[0].word() == 'while':
-            return False
-        self.tokens.popleft().word()
-
-        if not self.tokens[0].word() == '(':
-            self.appendError(self.tokens[0], 'While statement')
-            return False
-        self.tokens.popleft().word()
-
-        if not self.expression():
-            self.appendError(self.tokens[0], 'While statement')
-            return False
-        
-        if not self.tokens[0].word() == ')':
-            self.appendError(self.tokens[0], 'While statement')
-            return False
-        self.tokens.popleft().word()
-
-        if not self.statement():
-            self.appendError(self.tokens[0], 'While statement')
-            return False
-        self.tokens.popleft().word()
-
-
-
-# IMPORTANT
-# ParseError has been included in this file because the Moodle submission box will only permit 8 files to be uploaded.
-# ParseError.py is not needed, but is available upon request from Nathan Hagerdorn (n-hagerdorn@onu.edu).
-
-# ParseError class
-# Stores information about a syntax error found while parsing source code
-class ParseError:
-    message = None
-    token = None
-
-    def init(self, message, token):
-        self.message = message
-        self.token = token
-
-    def message(self):
-        return self.message
-
-    def token(self):
-        return self.token
+from collections import deque
+from itertools import islice
+import gc
+
+from tree import Node, PROGRAM, DECLARATION, DECLARATOR, BLOCK, EMPTY, ASSIGNMENT, IF as IF_NODE, WHILE as WHILE_NODE, BINARY, UNARY, CAST, VARIABLE, LITERAL
+from tokens import (IDENTIFIER, INTEGER_LITERAL, FLOAT_LITERAL, INT, MAIN, FLOAT, CHAR, BOOL, IF, ELSE, WHILE, TRUE, FALSE,
+                   LEFT_BRACE, RIGHT_BRACE, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACKET, RIGHT_BRACKET, SEMICOLON, COMMA,
+                   ASSIGN, PLUS, MINUS, TIMES, DIVIDE, MODULO, NOT, GREATER, GREATER_OR_EQUAL, LESS, LESS_OR_EQUAL, EQUAL, NOT_EQUAL, OR, AND)
+
+# Sets of token kinds that the parsing methods test for membership in
+ADDITION_OPERATORS = frozenset((PLUS, MINUS))
+MULTIPLICATION_OPERATORS = frozenset((TIMES, DIVIDE, MODULO))
+RELATION_OPERATORS = frozenset((GREATER, GREATER_OR_EQUAL, LESS, LESS_OR_EQUAL))
+EQUALITY_OPERATORS = frozenset((EQUAL, NOT_EQUAL))
+UNARY_OPERATORS = frozenset((MINUS, NOT))
+BOOLEANS = frozenset((TRUE, FALSE))
+TYPES = frozenset((INT, BOOL, FLOAT, CHAR))
+
+# Sets of token kinds where parsing can resume after a syntax error in recovery mode
+# A semicolon ends the construct that failed and is always consumed, and these tokens begin or end a construct and are left for the next one
+STATEMENT_SYNC = frozenset((LEFT_BRACE, RIGHT_BRACE, IF, WHILE))
+DECLARATION_SYNC = STATEMENT_SYNC | TYPES
+
+# Precedence levels of the binary operators, from the loosest-binding || to the tightest-binding multiplication operators
+OR_LEVEL, AND_LEVEL, EQUALITY_LEVEL, RELATION_LEVEL, ADDITION_LEVEL, MULTIPLICATION_LEVEL = range(6)
+OPERATOR_LEVELS = {
+    OR: OR_LEVEL,
+    AND: AND_LEVEL,
+    EQUAL: EQUALITY_LEVEL,
+    NOT_EQUAL: EQUALITY_LEVEL,
+    GREATER: RELATION_LEVEL,
+    GREATER_OR_EQUAL: RELATION_LEVEL,
+    LESS: RELATION_LEVEL,
+    LESS_OR_EQUAL: RELATION_LEVEL,
+    PLUS: ADDITION_LEVEL,
+    MINUS: ADDITION_LEVEL,
+    TIMES: MULTIPLICATION_LEVEL,
+    DIVIDE: MULTIPLICATION_LEVEL,
+    MODULO: MULTIPLICATION_LEVEL
+}
+
+# Names of the parsing methods, which are the methods that debug mode and instrumentation wrap
+RULES = ('addition', 'addOp', 'assignment', 'block', 'boolean', 'char', 'conjunction', 'declaration', 'declarations', 'equality', 'equOp',
+         'expression', 'factor', 'float', 'identifier', 'ifStatement', 'integer', 'literal', 'mulOp', 'primary', 'program', 'relation', 'relOp',
+         'statement', 'statements', 'term', 'type', 'unaryOp', 'whileStatement', 'climbExpression')
+
+# Errors recorded by the recursive expression methods, from factor() up to expression(), as a failure unwinds through them
+EXPRESSION_CONTEXTS = ('Factor', 'Term', 'Addition', 'Relation', 'Equality', 'Conjunction', 'Expression')
+
+# Combine the operands of an expression tree with every pending operator whose level is at least the given level
+# Operators are combined from the right, so operators of the same level are left-associative
+def reduceOperators(operands, operators, level):
+    while len(operators) > 0 and operators[-1][0] >= level:
+        operator = operators.pop()[1]
+        right = operands.pop()
+        operands[-1] = Node(BINARY, operator, (operands[-1], right))
+
+# Return a function that prints the name of a parsing method every time before calling it
+def traceRule(method):
+    name = method.__name__
+    def traced():
+        print(name)
+        return method()
+    return traced
+
+class Parser:
+    tokens = None
+    tokenCount = None
+    debug = False
+    buildTree = False
+    root = None
+
+    # Parser class constructor
+    # expressionEngine selects how expressions are parsed: 'recursive' uses one method per level of the grammar, and 'climbing' uses climbExpression()
+    # If buildTree is True, the parser also builds an abstract syntax tree of the program, which is returned by tree()
+    # Expression trees are built by climbExpression(), so the climbing engine is used by default when a tree is built
+    # rule is the name of the parsing method to start with, so that a single statement or declaration can be parsed on its own
+    # If no token list is given, the parser is only set up, and parse() can then be called any number of times
+    # instrumentation is an object with an instrument(parser) method, such as a profiler.Profiler, which is given the parser to wrap its parsing methods
+    # Debug mode and instrumentation replace the parsing methods of this parser when it is constructed, so a parser without them runs the plain methods and pays nothing for either
+    # In recovery mode, a syntax error in a declaration or statement is recorded and skipped, and parsing carries on with the next one, so a single parse finds every error
+    def __init__(self, tokenList = None, debug = False, expressionEngine = None, buildTree = False, rule = 'program', instrumentation = None, recover = False):
+        self.debug = debug                                        # Debug mode prints all called functions to the terminal
+        self.buildTree = buildTree
+        self.recover = recover
+        self.errors = deque()                                     # Every parser has its own error stack, so parsers never see each other's errors
+        self.stackEnds = []                                       # Indexes into the error stack where the errors of each recovered syntax error end
+        self.nodes = []                                           # Stack of the trees of the constructs that have been parsed but not yet added to their parent
+        self.queue = deque()                                      # Queue that token lists are copied into, which is kept from one parse to the next
+
+        if expressionEngine is None:
+            expressionEngine = 'climbing' if buildTree else 'recursive'
+        if buildTree and expressionEngine != 'climbing':
+            raise ValueError('Syntax trees can only be built with the climbing expression engine')
+
+        if expressionEngine == 'climbing':
+            self.expression = self.climbExpression                # Every method that parses an expression calls self.expression(), so replacing it switches the whole parser over
+        elif expressionEngine != 'recursive':
+            raise ValueError('Unknown expression engine: ' + str(expressionEngine))
+
+        if debug:
+            self.traceRules()
+        if instrumentation is not None:
+            instrumentation.instrument(self)
+
+        if tokenList is not None:
+            self.parse(tokenList, rule)
+
+    # Parse a list or iterator of tokens, starting with the given rule, and return the error stack
+    # Every call starts with a new error stack and tree, so nothing is carried over from the tokens that were parsed before
+    def parse(self, tokenList, rule = 'program'):
+        self.errors = deque()
+        self.stackEnds = []
+        self.nodes.clear()
+        self.root = None
+
+        # An iterator of tokens (such as Lexer.stream) is consumed lazily through a small lookahead buffer, so the whole token stream is never held in memory
+        # The scanners discard comments, so the tokens are parsed as they are given, without a separate pass over them for comments
+        if iter(tokenList) is tokenList:
+            self.tokens = TokenStream(tokenList)
+            self.tokenCount = None
+        else:
+            self.tokens = self.queue                              # Python's double-ended queue is very useful for both queue and stack operations, and it is critical in this implementation
+            self.tokens.clear()
+            self.tokens.extend(tokenList)
+            self.tokenCount = len(self.tokens)
+
+        # Start the parsing by looking for a program, unless another rule was requested
+        # Building a tree allocates a node for nearly every token, which would otherwise set off the cyclic garbage collector over and over
+        # Trees never contain reference cycles, so the collector is paused while the tree is built
+        # In recovery mode, running out of tokens in the middle of a construct is recorded as an error on the last token instead of being raised, so the errors found before it are not lost
+        parse = getattr(self, rule)
+        try:
+            if self.buildTree and gc.isenabled():
+                gc.disable()
+                try:
+                    parsed = parse()
+                finally:
+                    gc.enable()
+            else:
+                parsed = parse()
+        except IndexError:
+            if not self.recover:
+                raise
+            if self.tokenCount is None:
+                last = self.tokens.last                             # A stream has been consumed, so its last token is the last one it pulled
+            else:
+                last = tokenList[-1] if self.tokenCount > 0 else None
+            self.appendError(last, 'End of file')
+            self.closeErrorStack()
+            return self.errors
+
+        # The program method sets the root itself, but any other rule leaves its tree on the node stack
+        if self.buildTree and rule != 'program' and parsed:
+            self.root = self.nodes.pop()
+
+        return self.errors
+
+    # Push an error to the syntax error stack
+    # This method is called by most of the parsing methods
+    def appendError(self, token, message):
+        newError = ParseError(message, token)
+        self.errors.append(newError)
+
+    # Return the error stack
+    # In recovery mode, the errors of every syntax error are on the stack, one after another in the order they were found
+    def errorStack(self):
+        return self.errors
+
+    # Return a list of error stacks, one for every independent syntax error, in the order they were found
+    # Without recovery mode, parsing stops at the first syntax error, so there is at most one
+    def errorStacks(self):
+        errors = list(self.errors)
+        stacks = []
+        start = 0
+        for end in self.stackEnds + [len(errors)]:
+            if end > start:
+                stacks.append(deque(errors[start:end]))
+            start = end
+        return stacks
+
+    # Return the root of the abstract syntax tree, or None if the parser was not asked to build one
+    def tree(self):
+        return self.root
+
+    # Return the trees that a parse starting with a rule other than program left behind its own tree
+    # An alternative of a statement that fails part-way leaves the trees it built, and the next alternative is tried, so a parse of the whole program keeps them among the statements
+    def strayNodes(self):
+        return tuple(self.nodes)
+
+    # Replace every parsing method of this parser with one that prints the method's name before calling it
+    def traceRules(self):
+        for name in RULES:
+            setattr(self, name, traceRule(getattr(self, name)))
+
+    # Return the number of tokens that have been consumed so far
+    def position(self):
+        if self.tokenCount is None:
+            return self.tokens.position()
+        return self.tokenCount - len(self.tokens)
+
+    # Replace the trees on the node stack above mark with a single node that has them as its children
+    # start is the position of the first token of the node
+    def collectNode(self, kind, token, mark, start):
+        children = tuple(self.nodes[mark:])
+        del self.nodes[mark:]
+        self.nodes.append(Node(kind, token, children, self.position() - start))
+
+    # End the error stack of a syntax error that has been recovered from, so the next error starts a stack of its own
+    def closeErrorStack(self):
+        if len(self.errors) > (self.stackEnds[-1] if len(self.stackEnds) > 0 else 0):
+            self.stackEnds.append(len(self.errors))
+
+    # Skip tokens after a syntax error up to the next token where parsing can safely resume
+    # A semicolon is consumed, and any token of the given kinds is left for the next construct
+    # Returns whether the skipping ended by consuming a semicolon
+    def synchronize(self, kinds):
+        tokens = self.tokens
+        while len(tokens) > 0:
+            kind = tokens[0].kind()
+            if kind == SEMICOLON:
+                tokens.popleft()
+                return True
+            if kind in kinds:
+                return False
+            tokens.popleft()
+        return False
+
+    # Parse a statement in recovery mode, recording and skipping any syntax error in it
+    # Returns False once there are no statements left, at a closing brace or the end of the tokens
+    # The body of an if or while statement whose header had an error is parsed and thrown away along with the header, as is an else that belongs to it, so they do not cause errors of their own
+    def recoverStatement(self):
+        tokens = self.tokens
+        mark = len(self.errors)
+        first = tokens[0] if len(tokens) > 0 else None
+        if self.statement():
+            return True
+
+        # A token that cannot start a statement is an error of its own, and is skipped so the parser always moves forward
+        if len(self.errors) == mark:
+            if len(tokens) == 0 or tokens[0].kind() == RIGHT_BRACE:
+                return False
+            self.appendError(tokens[0], 'Statement')
+            tokens.popleft()
+        self.closeErrorStack()
+
+        ended = self.synchronize(STATEMENT_SYNC)
+        if first.kind() == IF or first.kind() == WHILE:
+            mark = len(self.nodes)
+            if not ended and len(tokens) > 0 and tokens[0].kind() != RIGHT_BRACE:
+                self.recoverStatement()
+            if first.kind() == IF and len(tokens) > 0 and tokens[0].kind() == ELSE:
+                tokens.popleft()
+                self.recoverStatement()
+            del self.nodes[mark:]
+        return True
+
+    # Record every closing brace that ends the program before its last token, and parse the statements after it, in recovery mode
+    # The last closing brace of the program is left in place, as program() does not consume it
+    def recoverProgram(self):
+        tokens = self.tokens
+        while len(tokens) > 0:
+            brace = tokens.popleft()
+            if len(tokens) == 0:
+                tokens.appendleft(brace)
+                break
+            self.appendError(brace, 'Program')
+            self.closeErrorStack()
+            self.statements()
+
+    # Return whether the only token left is the closing brace of the program
+    # The brace is taken off and put back, so that a TokenStream pulls the next token from its iterator, if there is one
+    def endOfProgram(self):
+        tokens = self.tokens
+        if len(tokens) == 0 or tokens[0].kind() != RIGHT_BRACE:
+            return False
+        brace = tokens.popleft()
+        ended = len(tokens) == 0
+        tokens.appendleft(brace)
+        return ended
+
+    # Return a queue of the tokens of a token queue that are not comments, as they should not affect the syntax of the program
+    # parse() no longer calls this, since the scanners never produce comment tokens; it is kept for token lists that are built by other means
+    def removeComments(self, tokenQueue):
+        return deque(token for token in tokenQueue if token.category() != 'comment')
+
+
+    ## ------ Methods for parsing blocks of tokens ------
+
+    # Identify the addition of one or more terms
+    def addition(self):
+        # Look for one or more terms with addition operations separating them
+        # Record a syntax error is there is not at least one term or there is a hanging addition operator at the end of the addition
+        while True:
+            if not self.term():
+                self.appendError(self.tokens[0], 'Addition')
+                return False
+            
+            if not self.addOp():
+                break
+
+        return True
+
+    # Identify an addition operator
+    def addOp(self):
+        # Look at the next token in the queue and see if it is an addition or subtraction sign
+        if not self.tokens[0].kind() in ADDITION_OPERATORS:
+            return False
+        self.tokens.popleft()                                     # Dequeue an operator once it has been identified
+
+        return True
+    
+    # Identify an assignment statement
+    def assignment(self):
+        start = self.position() if self.buildTree else 0
+        name = self.tokens[0]
+        if not self.identifier():
+            return False
+
+        # Handle the assignment of an array element
+        index = None
+        if self.tokens[0].kind() == LEFT_BRACKET:
+            self.tokens.popleft()
+            index = self.tokens[0]
+            if not (self.integer() and self.tokens[0].kind() == RIGHT_BRACKET):
+                self.appendError(self.tokens[0], 'Assignment')
+                return False
+            self.tokens.popleft()
+
+        # Look for the equals sign in the assignment
+        equals = self.tokens[0]
+        if not equals.kind() == ASSIGN:
+            self.appendError(self.tokens[0], 'Assignment')
+            return False
+        self.tokens.popleft()
+
+        # Look for the right-hand expression in the assignment
+        if not self.expression():
+            self.appendError(self.tokens[0], 'Assignment')
+            return False
+
+        if self.buildTree:
+            variable = Node(VARIABLE, name, () if index is None else (Node(LITERAL, index),))
+            self.nodes.append(Node(ASSIGNMENT, equals, (variable, self.nodes.pop()), self.position() - start))
+
+        return True                                                 # Only return True if all components of an assignment are present
+
+    # Parse a block of statements enclosed within braces
+    def block(self):
+        # Look for an opening brace, which indicates that a block exists
+        start = self.position() if self.buildTree else 0
+        brace = self.tokens[0]
+        if not brace.kind() == LEFT_BRACE:
+            return False
+        self.tokens.popleft()
+
+        # Parse through any statements in the block, but let the statements function worry about how to do so
+        mark = len(self.nodes)
+        self.statements()
+
+        # Look for the closing brace of the block and record an error if it doesn't exist
+        if not self.tokens[0].kind() == RIGHT_BRACE:
+            self.appendError(self.tokens[0], 'Block')
+            return False
+        self.tokens.popleft()
+
+        if self.buildTree:
+            self.collectNode(BLOCK, brace, mark, start)
+
+        return True
+        
+    # Idenfity a Boolean value
+    def boolean(self):
+        # Look for the words 'true' and 'false'
+        if not self.tokens[0].kind() in BOOLEANS:
+            return False
+        self.tokens.popleft()
+        return True
+
+    # Identify a character literal
+    def char(self):
+        # The length of a character should always be 1
+        if len(self.tokens[0].word()) != 1:
+            return False
+
+        # The order of an ASCII character (its corresponding integer value) is within the range [0, 127]
+        if ord(self.tokens[0].word()) > 127:
+            self.appendError(self.tokens[0], 'Char')
+            return False
+        self.tokens.popleft()
+
+        # If both tests are passed, the word is a character
+        return True
+
+    # Parse a conjunction of one or more equalities
+    def conjunction(self):
+        # Iterate through as many equalities as can be found in the statement
+        while True:
+            if not self.equality():
+                self.appendError(self.tokens[0], 'Conjunction')
+                return False
+
+            # If there is no conjunction operator to join another equality to the end of the statement, assume the conjunction is over
+            if not self.tokens[0].kind() == AND:
+                break
+            self.tokens.popleft()                                 # Dequeue the conjunction operator if it exists
+
+        return True
+
+    # Parse through a variable declaration (or multiple declarations within the same statement)
+    def declaration(self):
+        # Consume the type of the declaration
+        start = self.position() if self.buildTree else 0
+        typeToken = self.tokens[0]
+        if not self.type():
+            return False
+        mark = len(self.nodes)
+
+        # Handle the individual variable identifier(s)
+        while True:
+            name = self.tokens[0]
+            if not self.identifier():
+                self.appendError(self.tokens[0], 'Declaration')
+                name = None
+
+            # Deal with the declaration of an array
+            size = None
+            if self.tokens[0].kind() == LEFT_BRACKET:
+                self.tokens.popleft()
+                size = self.tokens[0]
+                if not (self.integer() and self.tokens[0].kind() == RIGHT_BRACKET):
+                    self.appendError(self.tokens[0], 'Declaration')
+                    return False
+                self.tokens.popleft()
+
+            if self.buildTree and name is not None:
+                self.nodes.append(Node(DECLARATOR, name, () if size is None else (Node(LITERAL, size),)))
+            
+            # Check if there is another variable being declared in the same statement
+            if not self.tokens[0].kind() == COMMA:
+                break
+            self.tokens.popleft()
+
+        # Deal with the semicolon at the end of a declaration
+        if not self.tokens[0].kind() == SEMICOLON:
+            self.appendError(self.tokens[0], 'Declaration')
+            return False
+        self.tokens.popleft()
+
+        if self.buildTree:
+            self.collectNode(DECLARATION, typeToken, mark, start)
+
+        return True
+
+    # Parse through a sequence of one or more declarations
+    def declarations(self):
+        numDecl = 0
+
+        while (True):
+            mark = len(self.nodes)
+            errors = len(self.errors)
+            if not self.declaration():
+                del self.nodes[mark:]                             # Discard the trees of any declarators of a declaration that failed
+
+                # In recovery mode, a declaration with a syntax error is skipped instead of ending the declarations
+                if not self.recover or len(self.errors) == errors:
+                    break
+                self.closeErrorStack()
+                self.synchronize(DECLARATION_SYNC)
+                continue
+            numDecl += 1
+            if self.recover:
+                self.closeErrorStack()                            # A declaration with a missing name still succeeds, but its error is kept apart from the next one
+
+        # Ensure there is at least one declaration before confirming that there are declarations in the program
+        if numDecl < 1:
+            return False
+        return True
+
+    # Check whether there is an equality within a given expression. An equality is made up of one or two relations
+    def equality(self):
+        # Check for the first relation
+        if not self.relation():
+            self.appendError(self.tokens[0], 'Equality')
+            return False
+
+        # Check for an equality operator, which indicates that there is another relation in this equality
+        if self.equOp():
+            if not self.relation():
+                self.appendError(self.tokens[0], 'Equality')
+                return False
+
+        return True
+
+    # Check for an equality operator, which is either == or !=
+    def equOp(self):
+        if not self.tokens[0].kind() in EQUALITY_OPERATORS:
+            return False
+        self.tokens.popleft()
+
+        return True
+
+    # Parse through an expression, which is made up of one or more conjunctions, connected by the || symbol
+    def expression(self):
+        # Loop to consume one or more conjunctions that make up this expression
+        while True:
+            if not self.conjunction():
+                self.appendError(self.tokens[0], 'Expression')
+                return False
+
+            # Check for a || symbol, which indicates there will be another conjunction in the expression
+            if not self.tokens[0].kind() == OR:
+                break
+            self.tokens.popleft()
+
+        return True
+
+    # Parse a factor, which is made up of an optional unary operator and a primary value or variable
+    def factor(self):
+        self.unaryOp()                                            # Consume a unary operator if it exists, but don't generate any errors if it is not present
+
+        # Consume the primary
+        if not self.primary():
+            self.appendError(self.tokens[0], 'Factor')
+            return False
+
+        return True
+
+    # Check whether a token is a float. This is simple because the lexer categorizes float values with the category 'float' already
+    def float(self):
+        if not self.tokens[0].kind() == FLOAT_LITERAL:
+            return False
+        self.tokens.popleft()
+        return True
+                
+    # Check if there is an identifier. This is simple because the lexer assigns identifiers to the category 'identifier'
+    def identifier(self):
+        if not self.tokens[0].kind() == IDENTIFIER:
+            return False
+        self.tokens.popleft()
+        return True
+
+    # Parse through an if statement and ensure it contains the correct keyword, punctuation, expression, and statement
+    def ifStatement(self):
+        start = self.position() if self.buildTree else 0
+        keyword = self.tokens[0]
+        if not keyword.kind() == IF:
+            return False
+        self.tokens.popleft()
+        mark = len(self.nodes)
+
+        if not self.tokens[0].kind() == LEFT_PARENTHESIS:
+            self.appendError(self.tokens[0], 'If statement')
+            return False
+        self.tokens.popleft()
+
+        if not self.expression():
+            self.appendError(self.tokens[0], 'If statement')
+            return False
+        
+        if not self.tokens[0].kind() == RIGHT_PARENTHESIS:
+            self.appendError(self.tokens[0], 'If statement')
+            return False
+        self.tokens.popleft()
+
+        if not self.statement():
+            self.appendError(self.tokens[0], 'If statement')
+            return False
+
+        # Deal with an else statement following the if statement
+        if self.tokens[0].kind() == ELSE:
+            self.tokens.popleft()
+            if not self.statement():
+                self.appendError(self.tokens[0], 'If statement')
+                return False
+
+        if self.buildTree:
+            self.collectNode(IF_NODE, keyword, mark, start)
+
+        return True
+
+    # Check if the next token is an integer
+    def integer(self):
+        if not self.tokens[0].kind() == INTEGER_LITERAL:
+            return False
+        self.tokens.popleft()
+        return True
+
+    # Check if a token is a literal, which could be an integer, float, boolean, or char value
+    def literal(self):
+        if not (self.float() or self.integer() or self.boolean() or self.char()):
+            self.appendError(self.tokens[0], 'Literal')
+            return False
+        return True
+
+    # Parse a multiplication operation
+    def mulOp(self):
+        if not self.tokens[0].kind() in MULTIPLICATION_OPERATORS:
+            return False
+        self.tokens.popleft()
+
+        return True
+
+    # Parse a primary, which can be a variable, literal, or expression wihin parentheses
+    def primary(self):
+        if self.identifier():
+
+            # Deal with the indexing of an array
+            if self.tokens[0].kind() == LEFT_BRACKET:
+                self.tokens.popleft()
+
+                if not (self.integer() and self.tokens[0].kind() == RIGHT_BRACKET):
+                    self.appendError(self.tokens[0], 'Primary')
+                    return False
+                self.tokens.popleft()
+
+            return True
+        elif self.type():                                         # Parse an expression that is being cast to another data type. Types are checked before literals so that a cast does not record a Literal error
+            if not self.tokens[0].kind() == LEFT_PARENTHESIS:
+                self.appendError(self.tokens[0], 'Primary')
+                return False
+            self.tokens.popleft()
+
+            if not (self.expression() and self.tokens[0].kind() == RIGHT_PARENTHESIS):
+                self.appendError(self.tokens[0], 'Primary')
+                return False
+            self.tokens.popleft()
+
+            return True
+        elif self.literal():
+            return True
+        elif self.tokens[0].kind() == LEFT_PARENTHESIS:
+            self.tokens.popleft()
+
+            if not (self.expression() and self.tokens[0].kind() == RIGHT_PARENTHESIS):
+                self.appendError(self.tokens[0], 'Primary')
+                return False
+            self.tokens.popleft()
+
+            return True
+
+        self.appendError(self.tokens[0], 'Primary')
+        return False
+
+    # Parse a program, which is the topmost component of the source code and contains a very specific header
+    def program(self):
+        # Consume the header, which must consist of the tokens 'int', 'main', '(', ')', '{'
+        if not (self.tokens.popleft().kind() == INT and self.tokens.popleft().kind() == MAIN and self.tokens.popleft().kind() == LEFT_PARENTHESIS and self.tokens.popleft().kind() == RIGHT_PARENTHESIS and self.tokens.popleft().kind() == LEFT_BRACE):
+            print('Bad program header')
+        self.declarations()
+        self.statements()
+        if self.recover:
+            self.recoverProgram()
+
+        # The statements must end at the closing brace of the program, and it must be the last token, so a program that stops early is never taken as complete
+        if not self.endOfProgram():
+            self.appendError(self.tokens[0] if len(self.tokens) > 0 else None, 'Program')
+            self.closeErrorStack()
+
+        if self.buildTree:
+            self.collectNode(PROGRAM, None, 0, 0)
+            self.root = self.nodes.pop()
+
+    # Parse a relation, which is one or two additions, separated by a relation operator
+    def relation(self):
+        # Consume the first addition
+        if not self.addition():
+            self.appendError(self.tokens[0], 'Relation')
+            return False
+
+        # Check if there is a relation operator, which indicates there is another addition
+        if self.relOp():
+            if not self.addition():
+                self.appendError(self.tokens[0], 'Relation')
+                return False
+
+        return True
+
+    # Check for the presence of a relativity operator
+    def relOp(self):
+        if not self.tokens[0].kind() in RELATION_OPERATORS:
+            return False
+        self.tokens.popleft()
+
+        return True
+
+    # Parse a code statement, consisting of an assignment, if statement, while statement, or semicolon
+    def statement(self):
+        if len(self.tokens) < 1:
+            return False
+
+        mark = len(self.nodes)
+        if self.tokens[0].kind() == SEMICOLON:
+            semicolon = self.tokens.popleft()
+            if self.buildTree:
+                self.nodes.append(Node(EMPTY, semicolon, (), 1))
+            return True
+        elif (self.block() or self.assignment() or self.ifStatement() or self.whileStatement()):
+            return True
+
+        del self.nodes[mark:]                                     # Discard the trees of any parts of a statement that failed
+        return False
+
+    # Parse a sequence of one or more statements
+    # In recovery mode, a statement with a syntax error is skipped instead of ending the sequence
+    def statements(self):
+        numStat = 0
+        statement = self.recoverStatement if self.recover else self.statement
+
+        while (True):
+            if not statement():
+                break
+            numStat += 1
+
+        if numStat < 1:
+            return False
+        return True
+    
+    # Parse a term in an expression, which consists of one or more factors
+    def term(self):
+        while True:
+            if not self.factor():
+                self.appendError(self.tokens[0], 'Term')
+                return False
+
+            if not self.mulOp():
+                break
+
+        return True
+
+    # Check for the presence of a data type, of which int, bool, float, and char are recognized
+    def type(self):
+        if self.tokens[0].kind() in TYPES:
+            self.tokens.popleft()
+            return True
+        return False
+
+    # Check for a unary operator, which is either the unary negative for numeric values or unary negation for logical values
+    def unaryOp(self):
+        if not self.tokens[0].kind() in UNARY_OPERATORS:
+            return False
+        self.tokens.popleft()
+        
+        return True
+
+    # Parse a while statement, which has a specific order of reserved words, punctuation, and an expression
+    def whileStatement(self):
+        start = self.position() if self.buildTree else 0
+        keyword = self.tokens[0]
+        if not keyword.kind() == WHILE:
+            return False
+        self.tokens.popleft()
+        mark = len(self.nodes)
+
+        if not self.tokens[0].kind() == LEFT_PARENTHESIS:
+            self.appendError(self.tokens[0], 'While statement')
+            return False
+        self.tokens.popleft()
+
+        if not self.expression():
+            self.appendError(self.tokens[0], 'While statement')
+            return False
+        
+        if not self.tokens[0].kind() == RIGHT_PARENTHESIS:
+            self.appendError(self.tokens[0], 'While statement')
+            return False
+        self.tokens.popleft()
+
+        if not self.statement():
+            self.appendError(self.tokens[0], 'While statement')
+            return False
+
+        if self.buildTree:
+            self.collectNode(WHILE_NODE, keyword, mark, start)
+
+        return True
+
+
+
+    ## ------ Precedence-climbing expression engine ------
+
+    # Parse an expression by precedence climbing instead of descending through expression, conjunction, equality, relation, addition, term, factor, and primary
+    # Chains of binary operators are consumed in a loop, and casts and parentheses push the state of the enclosing expression onto a stack instead of recursing
+    # It accepts and rejects exactly the same expressions as expression(), and records the same errors on the error stack
+    # When a tree is being built, operands and pending operators are kept on stacks and combined as soon as an operator of a lower or equal level is reached
+    def climbExpression(self):
+        tokens = self.tokens
+        build = self.buildTree
+        nesting = []                                              # State of the expressions enclosing each open cast or parenthesis
+        equality = False                                          # Whether the current equality already has its equality operator
+        relation = False                                          # Whether the current relation already has its relation operator
+        operands = []                                             # Trees of the operands of the innermost expression
+        operators = []                                            # Levels and tokens of the operators of the innermost expression that are waiting for their right operand
+
+        while True:
+
+            # Consume a factor, which is an optional unary operator and a primary
+            unary = tokens[0]
+            if not self.unaryOp():
+                unary = None
+            token = tokens[0]
+            if self.identifier():
+
+                # Deal with the indexing of an array
+                index = None
+                if tokens[0].kind() == LEFT_BRACKET:
+                    tokens.popleft()
+                    index = tokens[0]
+                    if not (self.integer() and tokens[0].kind() == RIGHT_BRACKET):
+                        return self.unwindExpression(len(nesting), 'Primary')
+                    tokens.popleft()
+                if build:
+                    node = Node(VARIABLE, token, () if index is None else (Node(LITERAL, index),))
+            elif self.type():
+
+                # Open an expression being cast to another data type
+                # Types are checked before literals so that a cast does not record a Literal error
+                if not tokens[0].kind() == LEFT_PARENTHESIS:
+                    return self.unwindExpression(len(nesting), 'Primary')
+                tokens.popleft()
+                nesting.append((equality, relation, operands, operators, unary, token))
+                equality = relation = False
+                if build:
+                    operands = []
+                    operators = []
+                continue
+            elif self.literal():
+                if build:
+                    node = Node(LITERAL, token)
+            elif tokens[0].kind() == LEFT_PARENTHESIS:
+
+                # Open a parenthesized expression
+                tokens.popleft()
+                nesting.append((equality, relation, operands, operators, unary, None))
+                equality = relation = False
+                if build:
+                    operands = []
+                    operators = []
+                continue
+            else:
+                return self.unwindExpression(len(nesting), 'Primary')
+
+            if build:
+                if unary is not None:
+                    node = Node(UNARY, unary, (node,))
+                operands.append(node)
+
+            # Consume the operator that joins this factor to the next one
+            # The equality and relation levels only allow a single operator, so a second one ends the expression, just as it does in the recursive methods
+            while True:
+                level = OPERATOR_LEVELS.get(tokens[0].kind())
+                if level is None or (level == EQUALITY_LEVEL and equality) or (level == RELATION_LEVEL and relation):
+
+                    # The innermost expression is complete, so either the whole expression is finished or a cast or parenthesis must be closed
+                    if build:
+                        reduceOperators(operands, operators, OR_LEVEL)
+                        node = operands.pop()
+                    if len(nesting) == 0:
+                        if build:
+                            self.nodes.append(node)
+                        return True
+                    equality, relation, operands, operators, unary, cast = nesting.pop()
+                    if not tokens[0].kind() == RIGHT_PARENTHESIS:
+                        return self.unwindExpression(len(nesting), 'Primary')
+                    tokens.popleft()
+                    if build:
+                        if cast is not None:
+                            node = Node(CAST, cast, (node,))
+                        if unary is not None:
+                            node = Node(UNARY, unary, (node,))
+                        operands.append(node)
+                    continue
+
+                operator = tokens.popleft()
+                if level == EQUALITY_LEVEL:
+                    equality = True
+                    relation = False
+                elif level == RELATION_LEVEL:
+                    relation = True
+                elif level < EQUALITY_LEVEL:
+                    equality = relation = False
+                if build:
+                    reduceOperators(operands, operators, level)
+                    operators.append((level, operator))
+                break
+
+    # Record the errors that the recursive expression methods would record while unwinding from a failed primary
+    # depth is the number of casts and parentheses that enclose the failed primary
+    def unwindExpression(self, depth, message):
+        self.appendError(self.tokens[0], message)
+        for i in range(depth + 1):
+            if i > 0:
+                self.appendError(self.tokens[0], 'Primary')
+            for context in EXPRESSION_CONTEXTS:
+                self.appendError(self.tokens[0], context)
+        return False
+
+
+
+# TokenStream class
+# A double-ended queue that is filled lazily from an iterator of tokens
+# The parser only ever looks at the first token and removes tokens from the front, so the queue is refilled from the iterator whenever it runs empty
+# The number of tokens held in memory is bounded by the lookahead depth instead of the size of the source file
+class TokenStream(deque):
+
+    # TokenStream class constructor
+    def __init__(self, tokenIterator, lookahead = 256):
+        super().__init__()
+        self.source = iter(tokenIterator)
+        self.lookahead = lookahead
+        self.pulled = 0                                           # Number of tokens pulled from the iterator so far
+        self.last = None                                          # Last token pulled from the iterator, which running out of tokens is reported on
+        self.fill()
+
+    # Pull up to lookahead tokens from the iterator into the queue
+    def fill(self):
+        count = len(self)
+        self.extend(islice(self.source, self.lookahead - count))
+        if len(self) > count:
+            self.last = self[-1]
+        self.pulled += len(self) - count
+
+    # Return the number of tokens that have been removed from the front of the queue so far
+    def position(self):
+        return self.pulled - len(self)
+
+    # Remove the first token from the queue, refilling it once it is empty
+    def popleft(self):
+        token = super().popleft()
+        if len(self) == 0:
+            self.fill()
+        return token
+
+
+
+# IMPORTANT
+# ParseError has been included in this file because the Moodle submission box will only permit 8 files to be uploaded.
+# ParseError.py is not needed, but is available upon request from Nathan Hagerdorn (n-hagerdorn@onu.edu).
+
+# ParseError class
+# Stores information about a syntax error found while parsing source code
+class ParseError:
+
+    def __init__(self, message, token):
+        self.__message = message
+        self.__token = token
+
+    def message(self):
+        return self.__message
+
+    def token(self):
+        return self.__token
         
\ No newline at end of file
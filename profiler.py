@@ -0,0 +1,129 @@
+import sys
+import time
+
+from lexer import Lexer, SCANNING_PATTERN, wordCategories, classify, opensComment
+from parser import Parser, RULES
+from tokens import Token, CATEGORIES
+
+# Profiler class
+# Records how much work each grammar rule of a Parser does, and how much time the lexer spends on each token category
+# A profiler is attached to a Parser or Lexer when it is constructed, by passing it as their instrumentation argument
+# Only the parsers and lexers that are given a profiler are slowed down by it
+class Profiler:
+
+    # Profiler class constructor
+    def __init__(self, clock = time.perf_counter):
+        self.clock = clock
+        self.reset()
+
+    # Forget everything that has been recorded
+    def reset(self):
+        self.rules = {}                                           # Calls, cumulative seconds, and tokens consumed for every rule, by name
+        self.categories = {}                                      # Tokens and seconds for every token category, by name
+
+    # Replace every parsing method of a parser with one that records its calls, time, and tokens consumed
+    def instrument(self, parser):
+        for name in RULES:
+            setattr(parser, name, self.instrumentRule(parser, getattr(parser, name)))
+
+    # Return a function that records the calls, time, and tokens consumed of a parsing method every time it calls the method
+    # Time and tokens are only added by the outermost call of a rule, so a rule that calls itself through other rules (e.g. expression through primary) is not counted twice
+    def instrumentRule(self, parser, method):
+        clock = self.clock
+        position = parser.position
+        record = self.rules.setdefault(method.__name__, [0, 0.0, 0, 0])     # Calls, seconds, tokens, and the number of calls that are currently running
+        def instrumented():
+            record[0] += 1
+            record[3] += 1
+            start = clock()
+            before = position()
+            try:
+                return method()
+            finally:
+                record[3] -= 1
+                if record[3] == 0:
+                    record[1] += clock() - start
+                    record[2] += position() - before
+        return instrumented
+
+    # Scan a buffer of source code like lexer.scan(), recording the number of tokens and the time spent on each token category
+    # The time of a token runs from the end of the previous token, so it includes matching the token, skipping the whitespace before it, and categorizing it
+    # Tokens are matched one at a time instead of a line at a time, so that every token is charged for its own match
+    # Time spent skipping a comment is charged to the token after it, as skipping whitespace is
+    def scan(self, text, lineNumber = 1):
+        clock = self.clock
+        cache = wordCategories
+        counts = [0] * len(CATEGORIES)
+        seconds = [0.0] * len(CATEGORIES)
+        inComment = False
+        lineStart = 0
+        try:
+            for line in text.split('\n'):
+                previous = clock()
+                position = 0
+                if inComment:
+                    position = line.find('*/') + 2
+                    if position == 1:
+                        lineNumber += 1
+                        lineStart += len(line) + 1
+                        continue
+                    inComment = False
+
+                for match in SCANNING_PATTERN.finditer(line, position):
+                    word = match.group()
+                    classes = cache.get(word)
+                    if classes is None:
+                        if word[:2] == '//' or word[:2] == '/*':
+                            if word[1] == '/' or opensComment(word):
+                                inComment = word[1] == '*'
+                                break
+                            continue
+                        classes = classify(word)
+                    token = Token(classes[0], lineNumber, classes[2], classes[1], lineStart + match.start())
+                    now = clock()
+                    counts[classes[0]] += 1
+                    seconds[classes[0]] += now - previous
+                    previous = now
+                    yield token
+                    previous = clock()                            # Time spent by the consumer of the tokens is not counted
+                lineNumber += 1
+                lineStart += len(line) + 1
+        finally:
+            for categoryId, category in enumerate(CATEGORIES):
+                if counts[categoryId] > 0:
+                    record = self.categories.setdefault(category, [0, 0.0])
+                    record[0] += counts[categoryId]
+                    record[1] += seconds[categoryId]
+
+    # Return a table of the recorded rules, from the most to the least time spent, and the recorded token categories
+    def report(self):
+        lines = ['{:<20} {:<12} {:<12} {:<12}'.format('Rule', 'Calls', 'Seconds', 'Tokens')]
+        lines.append('--------------------------------------------------------')
+        for name, record in sorted(self.rules.items(), key = lambda item: -item[1][1]):
+            if record[0] > 0:
+                lines.append('{:<20} {:<12} {:<12.6f} {:<12}'.format(name, record[0], record[1], record[2]))
+        if len(self.categories) > 0:
+            lines.append('')
+            lines.append('{:<20} {:<12} {:<12} {:<12}'.format('Category', 'Tokens', 'Seconds', 'ns/token'))
+            lines.append('--------------------------------------------------------')
+            for category, record in sorted(self.categories.items(), key = lambda item: -item[1][1]):
+                lines.append('{:<20} {:<12} {:<12.6f} {:<12.0f}'.format(category, record[0], record[1], record[1] / record[0] * 1e9))
+        return '\n'.join(lines)
+
+# Profile the lexing and parsing of a file and print the report
+def main(arguments = None):
+    arguments = sys.argv[1:] if arguments is None else arguments
+    if len(arguments) != 1:
+        print('Usage: python profiler.py <source file>')
+        return 2
+
+    profiler = Profiler()
+    with open(arguments[0], 'r') as file:
+        tokens = Lexer(file, instrumentation = profiler).getAll()
+    Parser(tokens, instrumentation = profiler)
+    print(profiler.report())
+    return 0
+
+# Execute the main method of the profiler
+if __name__ == "__main__":
+    sys.exit(main())
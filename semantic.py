@@ -0,0 +1,117 @@
+from parser import ParseError
+from tokens import INTEGER_LITERAL
+from tree import BLOCK, DECLARATOR, VARIABLE, LITERAL
+
+# Semantic analysis of a syntax tree
+# Checks that every variable is declared before it is used, that no variable is declared twice in the same scope, and that no constant array index is outside the bounds of its array
+# The whole tree is checked in a single walk, so analysis is linear in the size of the tree and can run after every parse
+
+# Messages of the semantic errors
+UNDECLARED = 'Undeclared variable'
+REDECLARED = 'Redeclaration'
+OUT_OF_BOUNDS = 'Array index out of bounds'
+
+# SemanticError class
+# An error found by semantic analysis, with the message and token of a ParseError, so it can be reported the same way as a syntax error
+class SemanticError(ParseError):
+    pass
+
+# Symbol class
+# A declared variable
+# size is the number of elements of an array, or None for a variable that is not an array
+# depth is the depth of the scope the variable is declared in, and shadowed is the symbol of the same name in an outer scope that this one hides, if there is one
+class Symbol:
+    __slots__ = ('token', 'size', 'depth', 'shadowed')
+
+    # Symbol class constructor
+    def __init__(self, token, size, depth, shadowed):
+        self.token = token
+        self.size = size
+        self.depth = depth
+        self.shadowed = shadowed
+
+# SymbolTable class
+# A scoped symbol table kept in a single dictionary from name to the innermost symbol of that name
+# Every scope remembers the names declared in it, and leaving a scope puts back the symbols that they shadowed, so a lookup is a single dictionary lookup however deeply scopes are nested
+# The table starts with one scope open, which holds the declarations of the program
+class SymbolTable:
+
+    # SymbolTable class constructor
+    def __init__(self):
+        self.symbols = {}
+        self.scopes = [[]]
+
+    # Open a new scope inside the current one
+    def enterScope(self):
+        self.scopes.append([])
+
+    # Close the current scope, forgetting its declarations and restoring the symbols that they shadowed
+    def exitScope(self):
+        symbols = self.symbols
+        for name in self.scopes.pop():
+            shadowed = symbols[name].shadowed
+            if shadowed is None:
+                del symbols[name]
+            else:
+                symbols[name] = shadowed
+
+    # Return the number of open scopes
+    def depth(self):
+        return len(self.scopes)
+
+    # Declare a variable in the current scope from the token of its name and its array size
+    # Returns the symbol of an earlier declaration of the name in the same scope, which is kept, or None if the declaration is new
+    def declare(self, token, size = None):
+        name = token.word()
+        previous = self.symbols.get(name)
+        depth = len(self.scopes)
+        if previous is not None and previous.depth == depth:
+            return previous
+        self.symbols[name] = Symbol(token, size, depth, previous)
+        self.scopes[-1].append(name)
+        return None
+
+    # Return the innermost symbol of a name, or None if it is not declared in any open scope
+    def lookup(self, name):
+        return self.symbols.get(name)
+
+# Check a syntax tree and return a list of the semantic errors in it, in the order they appear in the source
+# Blocks open a scope of their own, and a variable must be declared before it is used
+# The tree is walked with an explicit stack, so deeply nested programs do not run out of recursion depth
+def analyze(root):
+    errors = []
+    if root is None:
+        return errors
+    table = SymbolTable()
+    lookup = table.lookup
+    stack = [root]
+    pop = stack.pop
+    while len(stack) > 0:
+        node = pop()
+        if node is None:                                        # Marks the end of a block
+            table.exitScope()
+            continue
+        kind = node.kind()
+        if kind == VARIABLE:
+            token = node.token()
+            symbol = lookup(token.word())
+            if symbol is None:
+                errors.append(SemanticError(UNDECLARED, token))
+            elif symbol.size is not None and len(node.children()) > 0:
+                index = node.children()[0].token()
+                if index.kind() == INTEGER_LITERAL and int(index.word()) >= symbol.size:
+                    errors.append(SemanticError(OUT_OF_BOUNDS, index))
+        elif kind == DECLARATOR:
+            token = node.token()
+            children = node.children()
+            size = None
+            if len(children) > 0 and children[0].token().kind() == INTEGER_LITERAL:
+                size = int(children[0].token().word())
+            if table.declare(token, size) is not None:
+                errors.append(SemanticError(REDECLARED, token))
+        elif kind != LITERAL:
+            if kind == BLOCK:
+                table.enterScope()
+                stack.append(None)
+            stack.extend(node.children()[::-1])
+    return errors
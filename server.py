@@ -0,0 +1,353 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+
+from batch import cachedResult
+from cache import ParseCache
+from semantic import analyze
+
+# Service front-end for checking source code from long-running programs, such as editors and linters
+# Requests and responses are JSON-RPC 2.0 messages, read from standard input and written to standard output, or exchanged over a local Unix socket
+# Every message is either one line of JSON, or a body framed by a Content-Length header, as the Language Server Protocol frames it; responses are framed the same way as the requests of their connection
+# Lexing and parsing are handed to a pool of worker processes that are started once, so a request costs neither interpreter startup nor the import of the lexer and parser
+
+# Error codes of JSON-RPC, and the code that the Language Server Protocol uses for a cancelled request
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+REQUEST_CANCELLED = -32800
+
+# Largest number of bytes in a line of JSON, which holds the whole text of a source
+MESSAGE_LIMIT = 256 * 1024 * 1024
+
+# Largest number of bytes of source that each worker process keeps the results of, so a source that is checked again without changes is answered from memory
+WORKER_CACHE_BYTES = 64 * 1024 * 1024
+
+# Caches of parse results in this process, one for each value of recover and semantic, used by checkSource()
+sourceCaches = {}
+
+# Lex and parse source text, or a file if no text is given, and return the results in the same form as batch.checkFile()
+# This is the work that is handed to the worker processes
+# The parser prints a bad program header, which would be mixed into the responses on standard output, so its output is discarded
+# With semantic, the syntax tree is kept in the cache and checked by semantic.analyze(), and the result also holds a list of semanticErrors
+def checkSource(text, fileName = None, recover = False, semantic = False):
+    cache = sourceCaches.get((recover, semantic))
+    if cache is None:
+        cache = sourceCaches[(recover, semantic)] = ParseCache(memoryLimit = WORKER_CACHE_BYTES, buildTree = semantic, recover = recover)
+
+    result = {'bytes': 0, 'tokens': 0, 'errors': []}
+    if semantic:
+        result['semanticErrors'] = []
+    try:
+        with redirect_stdout(io.StringIO()):
+            parseResult = cache.check(fileName) if text is None else cache.checkText(text)
+            cachedResult(result, parseResult)
+        result['bytes'] = os.path.getsize(fileName) if text is None else len(text.encode())
+    except (OSError, UnicodeDecodeError) as error:
+        result['errors'].append({'line': None, 'word': None, 'message': 'Unreadable file: ' + str(error)})
+        return result
+    # A source with syntax errors has an incomplete tree, which would miss semantic errors and report some that are not there, so its semanticErrors are None instead
+    if semantic and len(result['errors']) > 0:
+        result['semanticErrors'] = None
+    elif semantic:
+        for error in analyze(parseResult.tree()):
+            result['semanticErrors'].append({'line': error.token().lineNumber(), 'word': error.token().word(), 'message': error.message()})
+    return result
+
+# Return the process id of a worker, which is submitted to every worker when the server starts so that all of them are running before the first request
+def warmUp():
+    return os.getpid()
+
+# RequestError class
+# An error that is sent back to the client as the error of a response
+class RequestError(Exception):
+
+    # RequestError class constructor
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+# StandardOutput class
+# Writes messages to standard output with the same methods as an asyncio StreamWriter
+# Responses are small and written whole, so they are written directly instead of through a pipe transport
+class StandardOutput:
+
+    # Write bytes to standard output
+    def write(self, data):
+        sys.stdout.buffer.write(data)
+
+    # Flush standard output, so the client receives the message at once
+    async def drain(self):
+        sys.stdout.buffer.flush()
+
+    # Standard output is left open for the rest of the process
+    def close(self):
+        pass
+
+# Server class
+# Checks source code for the sessions of its clients on a shared pool of worker processes
+# With no workers, sources are checked in the server's own process, between messages
+class Server:
+
+    # Server class constructor
+    def __init__(self, workers = None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers = workers) if workers > 0 else None
+        self.closed = None
+        self.idle = None
+        self.sessions = set()                                     # Tasks that are serving a client
+
+    # Start every worker process, and wait until all of them are ready
+    async def start(self):
+        self.closed = asyncio.Event()
+        self.idle = asyncio.Semaphore(max(1, self.workers))
+        if self.executor is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self.executor, warmUp) for i in range(self.workers)))
+
+    # Check source text or a file in a worker process and return its results
+    # A check is only handed to the pool once a worker is idle, so a request that is cancelled while it waits is never checked; a check that has started runs to the end, and its results are discarded
+    async def check(self, text, fileName, recover, semantic = False):
+        async with self.idle:
+            if self.executor is None:
+                return checkSource(text, fileName, recover, semantic)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, checkSource, text, fileName, recover, semantic)
+
+    # Serve one client, reading messages from reader and writing responses to writer, until the client disconnects or the server is shut down
+    async def serve(self, reader, writer):
+        session = Session(self, reader, writer)
+        self.sessions.add(asyncio.current_task())
+        try:
+            await session.run()
+        finally:
+            session.cancelAll()
+            writer.close()
+            self.sessions.discard(asyncio.current_task())
+
+    # Serve a single client over standard input and standard output
+    async def serveStdio(self):
+        await self.start()
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit = MESSAGE_LIMIT)
+        try:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except ValueError:                                        # Standard input is redirected from a regular file, which cannot be read through a pipe, so the whole file is fed to the reader
+            reader.feed_data(await loop.run_in_executor(None, sys.stdin.buffer.read))
+            reader.feed_eof()
+        await self.serve(reader, StandardOutput())
+
+    # Serve any number of clients at once over a Unix socket at the given path, until one of them shuts the server down
+    # Every session ends once the server is shut down, and the server waits for them before it closes the socket
+    async def serveSocket(self, path):
+        await self.start()
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(self.serve, path, limit = MESSAGE_LIMIT)
+        try:
+            await self.closed.wait()
+            await asyncio.gather(*self.sessions, return_exceptions = True)
+        finally:
+            server.close()
+            await server.wait_closed()
+            os.remove(path)
+
+    # Stop the worker processes
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures = True)
+
+# Session class
+# The connection of one client to a server
+# Every request is checked in a task of its own, so many requests can be checked at once, and their responses are sent as soon as they are ready, in any order
+# A request can be cancelled with a $/cancelRequest notification, and a check of a document is cancelled when a newer check of the same document arrives, since its results would already be stale
+class Session:
+
+    # Session class constructor
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.framed = False                                       # Whether the client frames its messages with Content-Length headers
+        self.requests = {}                                        # Tasks of the requests that have yet to be answered, by id
+        self.documents = {}                                       # Id of the latest check of every document, by its uri
+
+    # Read and dispatch messages until the client disconnects or the server is shut down
+    # When the client stops sending, the requests it has already sent are still answered
+    async def run(self):
+        reading = asyncio.ensure_future(self.readMessage())
+        closing = asyncio.ensure_future(self.server.closed.wait())
+        try:
+            while True:
+                await asyncio.wait((reading, closing), return_when = asyncio.FIRST_COMPLETED)
+                if closing.done():
+                    break
+                body = reading.result()
+                if body is None:
+                    await self.finish()
+                    break
+                reading = asyncio.ensure_future(self.readMessage())
+                await self.dispatch(body)
+        finally:
+            reading.cancel()
+            closing.cancel()
+
+    # Read the body of the next message, or return None when the client disconnects
+    # A message is framed by headers if it starts with a Content-Length header, and is a single line of JSON otherwise
+    async def readMessage(self):
+        while True:
+            line = await self.reader.readline()
+            if len(line) == 0:
+                return None
+            if line.strip() == b'':
+                continue
+            if line[:15].lower() != b'content-length:':
+                return line
+
+            self.framed = True
+            try:
+                length = int(line[15:])
+            except ValueError:
+                length = -1
+            while line.strip() != b'':                            # Skip any other headers, up to the empty line that ends them
+                line = await self.reader.readline()
+                if len(line) == 0:
+                    return None
+
+            # Without a valid length, the end of the body cannot be found, so the frame is dropped and answered as a message that could not be parsed, as bad JSON is
+            if length < 0:
+                await self.sendError(None, PARSE_ERROR, 'Parse error: invalid Content-Length header')
+                continue
+            try:
+                return await self.reader.readexactly(length)
+            except asyncio.IncompleteReadError:
+                return None
+
+    # Send a message to the client
+    async def send(self, message):
+        body = json.dumps(message, separators = (',', ':')).encode('utf-8')
+        if self.framed:
+            self.writer.write(b'Content-Length: ' + str(len(body)).encode('ascii') + b'\r\n\r\n' + body)
+        else:
+            self.writer.write(body + b'\n')
+        await self.writer.drain()
+
+    # Send the error of a request to the client
+    async def sendError(self, requestId, code, message):
+        await self.send({'jsonrpc': '2.0', 'id': requestId, 'error': {'code': code, 'message': message}})
+
+    # Decode a message and act on it
+    # Checks are started in tasks of their own, so the next message is read while they run; every other message is handled at once
+    async def dispatch(self, body):
+        try:
+            message = json.loads(body)
+        except ValueError as error:
+            await self.sendError(None, PARSE_ERROR, 'Parse error: ' + str(error))
+            return
+        if not isinstance(message, dict) or not isinstance(message.get('method'), str):
+            await self.sendError(message.get('id') if isinstance(message, dict) else None, INVALID_REQUEST, 'Invalid request')
+            return
+
+        method = message['method']
+        requestId = message.get('id')
+        params = message.get('params') or {}
+        if method == 'check':
+            if requestId is not None:
+                self.requests[requestId] = asyncio.ensure_future(self.checkRequest(requestId, params))
+        elif method == '$/cancelRequest':
+            self.cancel(params.get('id') if isinstance(params, dict) else None)
+        elif method == 'shutdown':
+            await self.finish()
+            if requestId is not None:
+                await self.send({'jsonrpc': '2.0', 'id': requestId, 'result': None})
+            self.server.closed.set()
+        elif method == 'exit':
+            self.server.closed.set()
+        elif requestId is not None:
+            await self.sendError(requestId, METHOD_NOT_FOUND, 'Method not found: ' + method)
+
+    # Check the text or file of a request and send its results, or the reason it failed
+    # params holds either the text or the file name of a source, an optional uri that names the document, whether to parse in recovery mode, and whether to run semantic analysis
+    async def checkRequest(self, requestId, params):
+        uri = None
+        try:
+            try:
+                text, fileName, recover, semantic = self.checkParams(params)
+                uri = params.get('uri', fileName)
+                if uri is not None:
+                    self.cancel(self.documents.get(uri))          # The results of an older check of the same document would already be stale
+                    self.documents[uri] = requestId
+                result = await self.server.check(text, fileName, recover, semantic)
+            except asyncio.CancelledError:
+                await self.sendError(requestId, REQUEST_CANCELLED, 'Request cancelled')
+                return
+            except RequestError as error:
+                await self.sendError(requestId, error.code, str(error))
+                return
+            await self.send({'jsonrpc': '2.0', 'id': requestId, 'result': result})
+        except OSError:
+            pass                                                  # The client has disconnected or the server is shutting down, so there is no one to answer
+        finally:
+            if self.requests.get(requestId) is asyncio.current_task():
+                del self.requests[requestId]
+            if uri is not None and self.documents.get(uri) == requestId:
+                del self.documents[uri]
+
+    # Return the text, file name, recovery mode, and semantic analysis mode of the params of a check request
+    # Raises RequestError if they are not valid
+    def checkParams(self, params):
+        if not isinstance(params, dict):
+            raise RequestError(INVALID_PARAMS, 'Params must be an object')
+        text = params.get('text')
+        fileName = params.get('file')
+        if (text is None) == (fileName is None):
+            raise RequestError(INVALID_PARAMS, 'Exactly one of text and file must be given')
+        if not isinstance(text if text is not None else fileName, str):
+            raise RequestError(INVALID_PARAMS, 'text and file must be strings')
+        return text, fileName, bool(params.get('recover', False)), bool(params.get('semantic', False))
+
+    # Cancel the request with the given id, if it has yet to be answered
+    def cancel(self, requestId):
+        task = self.requests.get(requestId) if requestId is not None else None
+        if task is not None:
+            task.cancel()
+
+    # Wait until every request that has been sent so far is answered
+    async def finish(self):
+        while len(self.requests) > 0:
+            await asyncio.wait(list(self.requests.values()))
+
+    # Cancel every request that has yet to be answered, when the session ends
+    def cancelAll(self):
+        for task in self.requests.values():
+            task.cancel()
+
+# Main method of the service front-end
+def main(arguments = None):
+    argumentParser = argparse.ArgumentParser(description = 'Serve lex and parse requests as JSON-RPC over standard input and output or a Unix socket')
+    argumentParser.add_argument('--socket', default = None, help = 'path of a Unix socket to listen on, instead of standard input and output')
+    argumentParser.add_argument('--workers', type = int, default = None, help = 'number of worker processes; 0 checks sources in the server process')
+    options = argumentParser.parse_args(arguments)
+
+    server = Server(options.workers)
+    try:
+        if options.socket is not None:
+            asyncio.run(server.serveSocket(options.socket))
+        else:
+            asyncio.run(server.serveStdio())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+# Execute the main method of the service front-end
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,55 +1,176 @@
-from collections import deque
-from lexer import Lexer
-from parser import Parser
-
-# Main method for testing the lexer and parser
-def main():
-
-    # Prompt the user for input
-    print('Please enter the name of your source code file, including the file extension')
-    filename = input()
-
-    # Attempt to open a file using the provided file name, and catch the error that is raised when the file cannot be found
-    try:
-        # Open the file and pass it to the lexer to tokenize the contents
-        file = open(filename, "r")
-        lexer = Lexer(file)
-        file.close()
-
-        lexerOutput(lexer)                                          # Output the results of the lexing process
-
-        # Use the parser to parse all of the tokens that the lexer has generated
-        parser = Parser(lexer.getAll())
-        parserOutput(parser)                                        # Output the results of parsing
-
-    except FileNotFoundError:                                       # Handle the error that occurs when the user provides the name of a nonexistent file
-        print('File not found. Please check that the file', filename, 'exists in the project directory')
-
-# Output a formatted version of the lexer's processed tokens
-def lexerOutput(lexer):
-    
-    # Format the output of tokens as a simple table
-    print('{:<10} {:<10} {:<10}'.format('Line #', 'Value', 'Token Category'))
-    print('--------------------------------------------------------')
-    
-    # Print each token using the lexer's next method
-    while lexer.remaining() > 0:
-        token = lexer.next()
-        
-        print('{:<10} {:<10} {:<10}'.format(token.lineNumber(), token.word(), token.category()))
-
-# Output the results of parsing, including the locations and contexts of syntax errors in the provided code
-def parserOutput(parser):
-    errors = parser.errorStack()
-
-    # Indicate if there are no syntax errors detected in the code
-    if len(errors) == 0:
-        print('No syntax errors detected')
-
-    # Print the error stack, which can be used to trace a syntax error to its specific location in the code
-    while len(errors) > 0:
-            print('Syntax error in line', errors[-1].token().lineNumber(), ', encountered', errors[-1].token().word(), 'while parsing a(n)', errors.pop().message())
-
-# Execute the main method of the program
-if __name__ == "__main__":
-    main()
+from itertools import islice
+import argparse
+import sys
+
+from lexer import Lexer
+from parser import Parser
+from semantic import analyze
+from tokens import TokenBuffer, CATEGORIES
+
+# Output formats of the token table and the error stack
+# table is the formatted text that is meant to be read, and tsv and jsonl are meant to be read by other programs
+FORMATS = ('table', 'tsv', 'jsonl')
+
+# Number of lines that are joined and written to the output at a time
+# Writing a large chunk at once is much faster than printing every line, and a bounded chunk keeps memory flat on large files
+CHUNK_LINES = 4096
+
+# Largest number of formatted word cells that are remembered for each token category before they are forgotten
+CELL_CACHE_LIMIT = 65536
+
+# Main method for testing the lexer and parser
+# The file name and output format may be given on the command line; otherwise the file name is prompted for
+def main(arguments = None):
+    argumentParser = argparse.ArgumentParser(description = 'Tokenize and parse a source file, and print its tokens and syntax errors')
+    argumentParser.add_argument('file', nargs = '?', default = None, help = 'source file to check; prompted for if not given')
+    argumentParser.add_argument('--format', choices = FORMATS, default = 'table', help = 'output format of the token table and error stack')
+    options = argumentParser.parse_args(arguments)
+
+    # Prompt the user for input
+    filename = options.file
+    if filename is None:
+        print('Please enter the name of your source code file, including the file extension')
+        filename = input()
+
+    # Attempt to open a file using the provided file name, and catch the error that is raised when the file cannot be found
+    try:
+        # Open the file and pass it to the lexer to tokenize the contents
+        file = open(filename, "r")
+        lexer = Lexer(file)
+        file.close()
+
+        lexerOutput(lexer, format = options.format)                 # Output the results of the lexing process
+
+        # Use the parser to parse all of the tokens that the lexer has generated, building the syntax tree that semantic analysis checks
+        # The parser stops at the first syntax error, so the tree of a program with one is missing everything after it, and semantic analysis is only run on a program without any
+        parser = Parser(lexer.getAll(), buildTree = True)
+        syntaxErrors = len(parser.errorStack())                     # Counted before parserOutput() empties the error stack
+        parserOutput(parser, format = options.format, lineIndex = lexer.lineIndex())    # Output the results of parsing, with the column of every syntax error
+        semanticOutput(analyze(parser.tree()) if syntaxErrors == 0 else None, format = options.format, lineIndex = lexer.lineIndex())  # Output the results of semantic analysis
+
+    except FileNotFoundError:                                       # Handle the error that occurs when the user provides the name of a nonexistent file
+        print('File not found. Please check that the file', filename, 'exists in the project directory')
+
+# Write lines to an output stream in chunks, each followed by a line break
+def writeLines(lines, output):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, CHUNK_LINES))
+        if len(chunk) == 0:
+            break
+        chunk.append('')
+        output.write('\n'.join(chunk))
+
+# Return an iterator of the line number, word, and category id of every token
+# The columns of a TokenBuffer are read directly, so no Token objects are created for it
+def tokenRows(tokens):
+    if isinstance(tokens, TokenBuffer):
+        categories, lineNumbers, starts, ends = tokens.columns()
+        source = tokens.source()
+        if isinstance(source, str):
+            return zip(lineNumbers, (source[start:end] for start, end in zip(starts, ends)), categories)
+        return zip(lineNumbers, (source[start:end].decode('ascii') for start, end in zip(starts, ends)), categories)
+    return ((token.lineNumber(), token.word(), token.categoryId()) for token in tokens)
+
+# Yield a line of text for every token, made of a cell formatted from its line number and a cell formatted from its word and category
+# Tokens arrive in order of their lines, and source code repeats the same words over and over, so each cell is only formatted the first time it is needed
+def formatTokens(rows, lineCell, tokenCell):
+    lastLine = None
+    left = None
+    tokenCells = [{} for category in CATEGORIES]
+    for lineNumber, word, categoryId in rows:
+        if lineNumber != lastLine:
+            lastLine = lineNumber
+            left = lineCell(lineNumber)
+        cells = tokenCells[categoryId]
+        right = cells.get(word)
+        if right is None:
+            if len(cells) >= CELL_CACHE_LIMIT:
+                cells.clear()
+            right = cells[word] = tokenCell(word, CATEGORIES[categoryId])
+        yield left + right
+
+# Output a formatted version of the lexer's processed tokens
+# Every token that has yet to be iterated through is written, and the lexer iterates past them, as it would if next() were called for each one
+def lexerOutput(lexer, output = None, format = 'table'):
+    output = sys.stdout if output is None else output
+    rows = tokenRows(lexer.nextAll())
+
+    # Format the output of tokens as a simple table, or as tab-separated values, or as one JSON object per line
+    if format == 'table':
+        output.write('{:<10} {:<10} {:<10}\n'.format('Line #', 'Value', 'Token Category'))
+        output.write('--------------------------------------------------------\n')
+        writeLines(formatTokens(rows, '{:<10} '.format, '{:<10} {:<10}'.format), output)
+    elif format == 'tsv':
+        output.write('line\tword\tcategory\n')
+        writeLines(formatTokens(rows, '{}\t'.format, '{}\t{}'.format), output)
+    elif format == 'jsonl':
+        import json                                                 # Imported only when it is needed, so the other formats start faster
+        encode = json.JSONEncoder().encode
+        writeLines(formatTokens(rows, '{{"type": "token", "line": {}, '.format, lambda word, category: '"word": {}, "category": "{}"}}'.format(encode(word), category)), output)
+    else:
+        raise ValueError('Unknown output format: ' + str(format))
+
+# Output the results of parsing, including the locations and contexts of syntax errors in the provided code
+# The error stack is written from the top, which can be used to trace a syntax error to its specific location in the code, and is emptied, as it would be by popping every error
+# With the LineIndex of the source, the column of every error is written as well, for errors whose token knows its offset
+def parserOutput(parser, output = None, format = 'table', lineIndex = None):
+    output = sys.stdout if output is None else output
+    errors = parser.errorStack()
+    rows = [(error.token() and error.token().lineNumber(), errorColumn(error.token(), lineIndex), error.token() and error.token().word(), error.message()) for error in reversed(errors)]
+    errors.clear()
+
+    if format == 'table':
+        # Indicate if there are no syntax errors detected in the code
+        if len(rows) == 0:
+            output.write('No syntax errors detected\n')
+        writeLines((('Syntax error in line {} , encountered {} while parsing a(n) {}'.format(lineNumber, word, message) if column is None else
+                     'Syntax error in line {} column {} , encountered {} while parsing a(n) {}'.format(lineNumber, column, word, message)) for lineNumber, column, word, message in rows), output)
+    elif format == 'tsv':
+        output.write('line\tcolumn\tword\tmessage\n')
+        writeLines(('{}\t{}\t{}\t{}'.format('' if lineNumber is None else lineNumber, '' if column is None else column, '' if word is None else word, message) for lineNumber, column, word, message in rows), output)
+    elif format == 'jsonl':
+        import json                                                 # Imported only when it is needed, so the other formats start faster
+        encode = json.JSONEncoder().encode
+        writeLines(('{{"type": "error", "line": {}, "column": {}, "word": {}, "message": {}}}'.format(encode(lineNumber), encode(column), encode(word), encode(message)) for lineNumber, column, word, message in rows), output)
+    else:
+        raise ValueError('Unknown output format: ' + str(format))
+
+# Output the semantic errors of a program, such as undeclared variables, in the order they appear in the source, in the same formats as parserOutput()
+# errors is None if semantic analysis was skipped, which is reported instead of a clean result
+def semanticOutput(errors, output = None, format = 'table', lineIndex = None):
+    output = sys.stdout if output is None else output
+    if errors is None:
+        if format == 'table':
+            output.write('Semantic analysis skipped, since the program has syntax errors\n')
+        elif format == 'jsonl':
+            output.write('{"type": "semantic", "skipped": true}\n')
+        elif format != 'tsv':                                       # tsv has no row for a skipped analysis, so its semantic header is left out
+            raise ValueError('Unknown output format: ' + str(format))
+        return
+    rows = [(error.token().lineNumber(), errorColumn(error.token(), lineIndex), error.token().word(), error.message()) for error in errors]
+
+    if format == 'table':
+        if len(rows) == 0:
+            output.write('No semantic errors detected\n')
+        writeLines((('Semantic error in line {} , encountered {} : {}'.format(lineNumber, word, message) if column is None else
+                     'Semantic error in line {} column {} , encountered {} : {}'.format(lineNumber, column, word, message)) for lineNumber, column, word, message in rows), output)
+    elif format == 'tsv':
+        output.write('line\tcolumn\tword\tsemantic_message\n')
+        writeLines(('{}\t{}\t{}\t{}'.format(lineNumber, '' if column is None else column, word, message) for lineNumber, column, word, message in rows), output)
+    elif format == 'jsonl':
+        import json                                                 # Imported only when it is needed, so the other formats start faster
+        encode = json.JSONEncoder().encode
+        writeLines(('{{"type": "semantic", "line": {}, "column": {}, "word": {}, "message": {}}}'.format(lineNumber, encode(column), encode(word), encode(message)) for lineNumber, column, word, message in rows), output)
+    else:
+        raise ValueError('Unknown output format: ' + str(format))
+
+# Return the column of the token of a syntax or semantic error, or None if there is no token, no line index, or the token does not know its offset
+def errorColumn(token, lineIndex):
+    if token is None or lineIndex is None or token.start() is None:
+        return None
+    return lineIndex.location(token.start())[1]
+
+# Execute the main method of the program
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from operator import sub
+import re
+import struct
+import sys
+
+# Token categories produced by the lexer, in the order of their integer ids
+CATEGORIES = (
+    'keyword',
+    'left_brace',
+    'right_brace',
+    'left_parenthesis',
+    'right_parenthesis',
+    'left_bracket',
+    'right_bracket',
+    'semicolon',
+    'comma',
+    'apostrophe',
+    'addition_op',
+    'subtraction_op',
+    'multiplication_op',
+    'division_op',
+    'modulo_op',
+    'negation_op',
+    'greater_op',
+    'greater_or_equal_op',
+    'less_op',
+    'less_or_equal_op',
+    'blocking_or_op',
+    'blocking_and_op',
+    'assignment_op',
+    'comment',
+    'identifier',
+    'integer',
+    'float',
+    'unknown'
+)
+CATEGORY_IDS = {category: categoryId for categoryId, category in enumerate(CATEGORIES)}
+
+# Token kinds
+# Every reserved word and operator that the parser distinguishes between has its own small integer kind, so the parser can compare integers instead of strings
+# Other identifiers, integers, and floats share one kind per category, and everything else has the kind OTHER
+(OTHER, IDENTIFIER, INTEGER_LITERAL, FLOAT_LITERAL,
+ INT, MAIN, FLOAT, CHAR, BOOL, IF, ELSE, WHILE, TRUE, FALSE,
+ LEFT_BRACE, RIGHT_BRACE, LEFT_PARENTHESIS, RIGHT_PARENTHESIS, LEFT_BRACKET, RIGHT_BRACKET, SEMICOLON, COMMA,
+ ASSIGN, PLUS, MINUS, TIMES, DIVIDE, MODULO, NOT, GREATER, GREATER_OR_EQUAL, LESS, LESS_OR_EQUAL, EQUAL, NOT_EQUAL, OR, AND) = range(37)
+
+# Dictionary mapping each reserved word and operator to its kind
+KINDS = {
+    'int': INT,
+    'main': MAIN,
+    'float': FLOAT,
+    'char': CHAR,
+    'bool': BOOL,
+    'if': IF,
+    'else': ELSE,
+    'while': WHILE,
+    'true': TRUE,
+    'false': FALSE,
+    '{': LEFT_BRACE,
+    '}': RIGHT_BRACE,
+    '(': LEFT_PARENTHESIS,
+    ')': RIGHT_PARENTHESIS,
+    '[': LEFT_BRACKET,
+    ']': RIGHT_BRACKET,
+    ';': SEMICOLON,
+    ',': COMMA,
+    '=': ASSIGN,
+    '+': PLUS,
+    '-': MINUS,
+    '*': TIMES,
+    '/': DIVIDE,
+    '%': MODULO,
+    '!': NOT,
+    '>': GREATER,
+    '>=': GREATER_OR_EQUAL,
+    '<': LESS,
+    '<=': LESS_OR_EQUAL,
+    '==': EQUAL,
+    '!=': NOT_EQUAL,
+    '||': OR,
+    '&&': AND
+}
+
+# Kinds of the words that are not in the table, indexed by category id
+CATEGORY_KINDS = tuple(
+    IDENTIFIER if category == 'identifier' else
+    INTEGER_LITERAL if category == 'integer' else
+    FLOAT_LITERAL if category == 'float' else
+    OTHER
+    for category in CATEGORIES
+)
+
+# Get the kind of a word, given the id of its category
+def kindOf(word, categoryId):
+    kind = KINDS.get(word)
+    if kind is None:
+        kind = CATEGORY_KINDS[categoryId]
+    return kind
+
+class Token:
+    __slots__ = ('__category', '__lineNumber', '__word', '__kind', '__start')   # Tokens are created in large numbers, so they do not carry an instance dictionary
+
+    # The category may be given either by name or by id
+    # The lexer passes the category id and kind that it has already looked up, so they don't need to be looked up again for every token
+    # start is the offset of the token's first character in the source text, or None for a token that was not scanned from a source
+    def __init__(self, category, lineNumber, word, kind = None, start = None):
+        if category.__class__ is str:
+            category = CATEGORY_IDS[category]
+        if kind is None:
+            kind = kindOf(word, category)
+        self.__category = category
+        self.__lineNumber = lineNumber
+        self.__word = word
+        self.__kind = kind
+        self.__start = start
+
+    def category(self):
+        return CATEGORIES[self.__category]
+
+    def categoryId(self):
+        return self.__category
+
+    def kind(self):
+        return self.__kind
+
+    def lineNumber(self):
+        return self.__lineNumber
+
+    def word(self):
+        return self.__word
+
+    # Return the offset of the token's first character in the source text, or None if it is not known
+    def start(self):
+        return self.__start
+
+    # Return the offset just past the token's last character in the source text, or None if it is not known
+    # A word never spans lines or contains escapes, so the end is not stored, and is found from the length of the word
+    def end(self):
+        if self.__start is None:
+            return None
+        return self.__start + len(self.__word)
+
+# TriviaToken class
+# A Token that keeps the comments around it, for tools that need to reproduce or inspect the comments of a program
+# Leading trivia are the comments between the previous token and this one, and trailing trivia are the comments after the last token of a source
+class TriviaToken(Token):
+    __slots__ = ('__leading', '__trailing')
+
+    # TriviaToken class constructor
+    def __init__(self, category, lineNumber, word, kind = None, leading = (), trailing = (), start = None):
+        super().__init__(category, lineNumber, word, kind, start)
+        self.__leading = leading
+        self.__trailing = trailing
+
+    # Return a tuple of the comments before the token
+    def leadingTrivia(self):
+        return self.__leading
+
+    # Return a tuple of the comments after the token, which only the last token of a source can have
+    def trailingTrivia(self):
+        return self.__trailing
+
+# TokenBuffer class
+# Stores a sequence of tokens in columns instead of as individual Token objects
+# Each token costs one entry in each of the category id, line number, start offset, and end offset arrays, and its word is a slice of the shared source text
+# Token objects are only created when a token is accessed
+# The source may also be ASCII bytes, such as a memory-mapped file, in which case the offsets are byte offsets and a word is only decoded when it is accessed
+class TokenBuffer:
+
+    # TokenBuffer class constructor
+    # Offsets are stored as 32-bit integers unless the source text is too large for them
+    # located is whether the text is the source that the tokens were scanned from, so that the offsets of words in it are the offsets of the tokens in the source
+    def __init__(self, source, located = True):
+        offsetType = 'I' if len(source) < 2 ** 32 else 'Q'
+        self.__source = source
+        self.__decode = not isinstance(source, str)
+        self.__located = located
+        self.__categories = array('B')
+        self.__lineNumbers = array('I')
+        self.__starts = array(offsetType)
+        self.__ends = array(offsetType)
+
+    # Add a token to the end of the buffer
+    def append(self, category, lineNumber, start, end):
+        self.__categories.append(CATEGORY_IDS[category])
+        self.__lineNumbers.append(lineNumber)
+        self.__starts.append(start)
+        self.__ends.append(end)
+
+    # Return the category id, line number, start offset, and end offset arrays, for code that fills or reads the buffer in bulk
+    def columns(self):
+        return self.__categories, self.__lineNumbers, self.__starts, self.__ends
+
+    # Return the source text that the tokens' words are sliced from
+    def source(self):
+        return self.__source
+
+    # Return the category of the token at the given index without creating a Token
+    def category(self, index):
+        return CATEGORIES[self.__categories[index]]
+
+    # Return the line number of the token at the given index without creating a Token
+    def lineNumber(self, index):
+        return self.__lineNumbers[index]
+
+    # Return the word of the token at the given index without creating a Token
+    def word(self, index):
+        word = self.__source[self.__starts[index]:self.__ends[index]]
+        if self.__decode:
+            word = word.decode('ascii')
+        return word
+
+    # Create a Token object for the token at the given index
+    def token(self, index):
+        return Token(self.__categories[index], self.__lineNumbers[index], self.word(index), None, self.__starts[index] if self.__located else None)
+
+    def __len__(self):
+        return len(self.__categories)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.token(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        return self.token(index)
+
+    # Iterate through the buffer, creating each Token only as it is reached
+    def __iter__(self):
+        source = self.__source
+        located = self.__located
+        if self.__decode:
+            for categoryId, lineNumber, start, end in zip(self.__categories, self.__lineNumbers, self.__starts, self.__ends):
+                yield Token(categoryId, lineNumber, source[start:end].decode('ascii'), None, start if located else None)
+        else:
+            for categoryId, lineNumber, start, end in zip(self.__categories, self.__lineNumbers, self.__starts, self.__ends):
+                yield Token(categoryId, lineNumber, source[start:end], None, start if located else None)
+
+# Line breaks of a byte source, which are counted the same way as scanMapped() counts them
+LINE_BREAK_PATTERN = re.compile(rb'\r\n|\r|\n')
+
+# LineIndex class
+# Maps the offsets of tokens in a source text to line and column numbers, without reading or splitting the source again for every lookup
+# The offset at which every line starts is found once and stored in an array, and a lookup is a binary search of the array
+# Offsets and columns count characters in a string source and bytes in a byte source, and columns start at 1, as line numbers do
+class LineIndex:
+
+    # LineIndex class constructor
+    # A string source only breaks lines at '\n', as the scanners do, and a byte source also breaks them at '\r\n' and '\r', as scanMapped() does
+    def __init__(self, source):
+        offsetType = 'I' if len(source) < 2 ** 32 else 'Q'
+        if isinstance(source, str):
+            starts = array(offsetType, accumulate((len(line) + 1 for line in source.split('\n')), initial = 0))
+            starts.pop()                                        # The last sum is the start of a line after the end of the source
+        else:
+            starts = array(offsetType, [0])
+            starts.extend(match.end() for match in LINE_BREAK_PATTERN.finditer(source))
+        self.__source = source
+        self.__starts = starts
+
+    # Return the number of lines in the source
+    def __len__(self):
+        return len(self.__starts)
+
+    # Return the line number of an offset
+    def lineNumber(self, offset):
+        return bisect_right(self.__starts, offset)
+
+    # Return the line number and column of an offset as a tuple
+    def location(self, offset):
+        lineNumber = bisect_right(self.__starts, offset)
+        return lineNumber, offset - self.__starts[lineNumber - 1] + 1
+
+    # Return the line number and column of the first character of a token, and of the character just past its end, as a tuple of four numbers
+    # Returns None for a token that does not know its offsets
+    def span(self, token):
+        start = token.start()
+        if start is None:
+            return None
+        return self.location(start) + self.location(token.end())
+
+    # Return the offset at which a line starts
+    def lineStart(self, lineNumber):
+        return self.__starts[lineNumber - 1]
+
+    # Return the offset at which a line ends, not including its line break
+    def lineEnd(self, lineNumber):
+        if lineNumber < len(self.__starts):
+            end = self.__starts[lineNumber] - 1
+            if not isinstance(self.__source, str) and end > 0 and self.__source[end - 1:end + 1] == b'\r\n':
+                end -= 1
+            return end
+        return len(self.__source)
+
+    # Return the text of a line, sliced out of the source, without its line break
+    def line(self, lineNumber):
+        return self.__source[self.lineStart(lineNumber):self.lineEnd(lineNumber)]
+
+# Binary token stream format
+# A versioned, little-endian format for saving the tokens of a lexer, so that lexing and parsing can run as separate stages, in separate processes or on separate machines
+# After the header come five sections, each of which is loaded into an array with a single frombytes() call:
+# 1. the category id of every token, one byte each
+# 2. the line number of every token, as the difference from the line number of the token before it
+# 3. the index of every token's word in the string table
+# 4. the length in characters of every string in the string table
+# 5. the strings of the string table, encoded as UTF-8 and joined together
+# Each word is stored once in the string table however often it appears, and the arrays use the smallest item size that holds their values
+TOKEN_FORMAT_MAGIC = b'TOKS'
+TOKEN_FORMAT_VERSION = 1
+TOKEN_FORMAT_HEADER = struct.Struct('<4sHcccxII')                # Magic, version, type codes of the line, word index, and string length arrays, token count, string count
+
+# Return the smallest unsigned array type code that holds every value, or a signed one if any value is negative
+def smallestTypeCode(values):
+    if len(values) == 0:
+        return 'B'
+    if min(values) < 0:
+        return 'i'
+    largest = max(values)
+    return 'B' if largest < 2 ** 8 else 'H' if largest < 2 ** 16 else 'I' if largest < 2 ** 32 else 'Q'
+
+# Return the bytes of an array in little-endian order
+def littleEndian(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+# Convert a TokenBuffer or any sequence of Tokens into bytes in the binary token stream format
+def dumpTokens(tokens):
+    if isinstance(tokens, TokenBuffer):
+        categories, lineNumbers, starts, ends = tokens.columns()
+        source = tokens.source()
+        words = [source[start:end] for start, end in zip(starts, ends)]
+        if not isinstance(source, str):
+            words = [word.decode('ascii') for word in words]
+    else:
+        categories = array('B', (token.categoryId() for token in tokens))
+        lineNumbers = array('I', (token.lineNumber() for token in tokens))
+        words = [token.word() for token in tokens]
+
+    # Number the distinct words in the order they first appear
+    wordIds = {}
+    for word in words:
+        if word not in wordIds:
+            wordIds[word] = len(wordIds)
+    strings = list(wordIds)
+
+    deltas = list(map(sub, lineNumbers, [0] + list(lineNumbers[:-1])))
+    lines = array(smallestTypeCode(deltas), deltas)
+    indexes = array(smallestTypeCode([len(strings) - 1]), map(wordIds.__getitem__, words))
+    lengths = array(smallestTypeCode(list(map(len, strings))), map(len, strings))
+
+    header = TOKEN_FORMAT_HEADER.pack(TOKEN_FORMAT_MAGIC, TOKEN_FORMAT_VERSION, lines.typecode.encode('ascii'), indexes.typecode.encode('ascii'),
+                                      lengths.typecode.encode('ascii'), len(categories), len(strings))
+    return b''.join((header, bytes(categories), littleEndian(lines), littleEndian(indexes), littleEndian(lengths), ''.join(strings).encode('utf-8')))
+
+# Convert bytes in the binary token stream format back into a TokenBuffer
+# The arrays are loaded straight from the bytes, so no token is parsed one at a time; the words of the TokenBuffer are slices of the joined string table
+# Raises ValueError if the bytes are not in the format, are from another version of it, or are cut short
+def loadTokens(data):
+    data = memoryview(data)
+    if len(data) < TOKEN_FORMAT_HEADER.size:
+        raise ValueError('Not a token stream')
+    magic, version, lineType, indexType, lengthType, tokenCount, stringCount = TOKEN_FORMAT_HEADER.unpack_from(data)
+    if magic != TOKEN_FORMAT_MAGIC:
+        raise ValueError('Not a token stream')
+    if version != TOKEN_FORMAT_VERSION:
+        raise ValueError('Unsupported token stream version: ' + str(version))
+
+    # Load each array from its section of the bytes
+    offset = TOKEN_FORMAT_HEADER.size
+    columns = []
+    for typeCode, count in (('B', tokenCount), (lineType.decode('ascii'), tokenCount), (indexType.decode('ascii'), tokenCount), (lengthType.decode('ascii'), stringCount)):
+        values = array(typeCode)
+        end = offset + count * values.itemsize
+        if end > len(data):
+            raise ValueError('Token stream is cut short')
+        values.frombytes(data[offset:end])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        columns.append(values)
+        offset = end
+    categories, deltas, indexes, lengths = columns
+    strings = str(data[offset:], 'utf-8')
+
+    # Every string of the table starts where the one before it ends, and every token's word is the string at its index
+    stringEnds = array('Q', accumulate(lengths))
+    stringStarts = array('Q', [0]) + stringEnds[:-1] if stringCount > 0 else array('Q')
+    if tokenCount > 0 and max(indexes) >= stringCount:
+        raise ValueError('Token stream refers to a missing string')
+    if stringCount > 0 and stringEnds[-1] > len(strings):
+        raise ValueError('Token stream is cut short')
+    tokens = TokenBuffer(strings, located = False)                 # The words are sliced from the string table, so the tokens do not know their offsets in the source
+    tokenCategories, lineNumbers, starts, ends = tokens.columns()
+    tokenCategories.extend(categories)
+    lineNumbers.extend(accumulate(deltas))
+    starts.extend(map(stringStarts.__getitem__, indexes))
+    ends.extend(map(stringEnds.__getitem__, indexes))
+    return tokens
@@ -0,0 +1,59 @@
+# Node kinds
+(PROGRAM, DECLARATION, DECLARATOR, BLOCK, EMPTY, ASSIGNMENT, IF, WHILE, BINARY, UNARY, CAST, VARIABLE, LITERAL) = range(13)
+
+# Names of the node kinds, indexed by kind
+NODE_KINDS = ('program', 'declaration', 'declarator', 'block', 'empty', 'assignment', 'if', 'while', 'binary', 'unary', 'cast', 'variable', 'literal')
+
+# Node class
+# A node of the abstract syntax tree built by the Parser
+# The kind says which language construct the node is, the token is the token that best identifies it (e.g. the operator of a binary expression), and the children are its sub-trees
+# Program, declaration, and statement nodes also record their size, which is the number of tokens they span. Expression nodes have a size of 0
+#   program:        token None, children are the declarations followed by the statements
+#   declaration:    token is the type, children are the declarators
+#   declarator:     token is the identifier being declared, children are the array size literal, if there is one
+#   block:          token is the opening brace, children are the statements
+#   empty:          token is the semicolon, no children
+#   assignment:     token is the equals sign, children are the variable being assigned to and the expression
+#   if:             token is the if keyword, children are the condition, the statement, and the else statement, if there is one
+#   while:          token is the while keyword, children are the condition and the statement
+#   binary:         token is the operator, children are the left and right operands
+#   unary:          token is the operator, child is the operand
+#   cast:           token is the type, child is the expression being cast
+#   variable:       token is the identifier, children are the array index literal, if there is one
+#   literal:        token is the literal, no children
+class Node:
+    __slots__ = ('__kind', '__token', '__children', '__size')   # Large programs produce a node for nearly every token, so nodes do not carry an instance dictionary
+
+    # Node class constructor
+    def __init__(self, kind, token, children = (), size = 0):
+        self.__kind = kind
+        self.__token = token
+        self.__children = children
+        self.__size = size
+
+    def kind(self):
+        return self.__kind
+
+    def token(self):
+        return self.__token
+
+    def children(self):
+        return self.__children
+
+    def size(self):
+        return self.__size
+
+# Format a tree as indented text, with one node per line
+def formatTree(node, indent = 0):
+    lines = []
+    stack = [(node, indent)]
+    while len(stack) > 0:
+        node, indent = stack.pop()
+        token = node.token()
+        if token is None:
+            lines.append('    ' * indent + NODE_KINDS[node.kind()])
+        else:
+            lines.append('    ' * indent + NODE_KINDS[node.kind()] + ' ' + token.word() + ' (line ' + str(token.lineNumber()) + ')')
+        for child in reversed(node.children()):
+            stack.append((child, indent + 1))
+    return '\n'.join(lines)
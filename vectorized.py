@@ -0,0 +1,151 @@
+import re
+
+from lexer import LEX_TABLE, categorize, scanBuffer
+from tokens import TokenBuffer, CATEGORY_IDS
+
+try:
+    import numpy        # Optional; without it, scanVectorized() falls back to scanBuffer()
+except ImportError:
+    numpy = None
+
+# Vectorized scanner
+# Tokenizes a whole source at once with NumPy array operations instead of a Python loop over its words, for bulk lexing of very large sources
+# The source is read as an array of bytes, every byte is given a character class through lookup tables, and the tokens are found from where the classes change
+# Only comments are found one at a time, since whether a /* is a comment depends on the comments before it
+# The tokens are exactly those of scanBuffer(), including its quirks: && is only an operator when it is followed by a space, a | or & that cannot start a token is part of a word, and an & that is neither is skipped
+
+# Comments as the scanners see them: a line comment runs to the end of its line, and a block comment to the first */ after its /*, on any later line, or to the end of the source
+COMMENT_PATTERN = re.compile('//[^\\n]*|/\\*[\\s\\S]*?\\*/|/\\*[\\s\\S]*')
+
+# Characters of the single-character operators and punctuation, and the two-character operators other than &&
+PUNCTUATION = ';,{}()[]:+-*/!%<>='
+PAIRS = ('<=', '>=', '==', '++', '||')
+
+# Classes of a character, given the character after it
+# A | is part of a word unless another | follows it, and an & unless '& ' follows it, as the lookaheads of the scanning pattern decide, so an & followed by an & is classed by the character after both
+(SKIPPED, WORD, PAIR, SINGLE, AMPERSANDS) = range(5)
+
+# Flags of the characters of a word, from which its category is decided
+NOT_ALPHANUMERIC = 1
+NOT_DIGIT = 2
+
+# Longest word of the lexer's table that the vectorized scanner can recognize, since a word is packed into a 64-bit key together with its length
+LONGEST_TABLE_WORD = 7
+
+# Lookup tables, indexed by a character or by a character and the one after it
+# They are built when the module is imported, and only if NumPy is available
+if numpy is not None:
+    CHARACTER_CLASSES = numpy.repeat(numpy.array([SKIPPED if chr(byte) in ' \t\n\r\f\v' else SINGLE if chr(byte) in PUNCTUATION else WORD for byte in range(256)], dtype = numpy.uint8), 256)
+    for pair in PAIRS:
+        CHARACTER_CLASSES[ord(pair[0]) << 8 | ord(pair[1])] = PAIR
+    CHARACTER_CLASSES[ord('&') << 8 | ord('&')] = AMPERSANDS
+    WORD_FLAGS = numpy.array([(0 if chr(byte).isascii() and (chr(byte).isalnum() or chr(byte) == '_') else NOT_ALPHANUMERIC) |
+                              (0 if chr(byte).isascii() and chr(byte).isdigit() else NOT_DIGIT) for byte in range(256)], dtype = numpy.uint8)
+    IDENTIFIER_START_BYTES = numpy.array([chr(byte).isascii() and (chr(byte).isalpha() or chr(byte) == '_') for byte in range(256)])
+    DIGIT_BYTES = numpy.array([chr(byte).isascii() and chr(byte).isdigit() for byte in range(256)])
+    SINGLE_CATEGORIES = numpy.array([CATEGORY_IDS[categorize(chr(byte))] for byte in range(256)], dtype = numpy.uint8)
+    PAIR_CATEGORIES = numpy.zeros(65536, dtype = numpy.uint8)
+    for pair in PAIRS + ('&&',):
+        PAIR_CATEGORIES[ord(pair[0]) << 8 | ord(pair[1])] = CATEGORY_IDS[categorize(pair)]
+
+    # Keys of the words in the lexer's table, in sorted order, with their category ids
+    TABLE_WORDS = sorted((sum(ord(character) << 8 * index for index, character in enumerate(word)) | len(word) << 56, CATEGORY_IDS[category])
+                         for word, category in LEX_TABLE.items() if len(word) <= LONGEST_TABLE_WORD and word.isascii())
+    TABLE_KEYS = numpy.array([key for key, categoryId in TABLE_WORDS], dtype = numpy.uint64)
+    TABLE_CATEGORIES = numpy.array([categoryId for key, categoryId in TABLE_WORDS], dtype = numpy.uint8)
+
+# Return whether the vectorized scanner can be used, which it can if NumPy is installed
+def available():
+    return numpy is not None
+
+# Scan a source into a TokenBuffer with the same tokens, line numbers, and offsets as scanBuffer()
+# Falls back to scanBuffer() if NumPy is not installed, or the source has characters that are not ASCII, or that \s matches in text but that are not ASCII whitespace (\x1c to \x1f)
+def scanVectorized(text):
+    if numpy is None or not text.isascii():
+        return scanBuffer(text)
+    tokens = TokenBuffer(text)
+    length = len(text)
+    if length == 0:
+        return tokens
+
+    # Every character is looked at along with the two after it, which are line breaks past the end of the source, as a line break ends every lookahead of the scanning pattern
+    padded = numpy.frombuffer(text.encode('ascii') + b'\n\n', dtype = numpy.uint8)
+    characters = padded[:length]
+    if ((characters - 28) < 4).any():
+        return scanBuffer(text)
+    classes = CHARACTER_CLASSES[characters.astype(numpy.uint16) << 8 | padded[1:length + 1]]
+    ampersands = numpy.flatnonzero(classes == AMPERSANDS)
+    classes[ampersands] = numpy.where(padded[ampersands + 2] == 32, PAIR, WORD)
+
+    # Characters inside comments start no token
+    for match in COMMENT_PATTERN.finditer(text):
+        classes[match.start():match.end()] = SKIPPED
+
+    # Two-character operators are matched from left to right, so in a run of overlapping ones, such as ===, every other one starts a token, counting from the first
+    # The second character of every operator that starts a token, which is every other operator of the run, is then no longer the start of anything
+    candidates = numpy.flatnonzero(classes == PAIR)
+    if len(candidates) > 0:
+        runStarts = numpy.ones(len(candidates), dtype = bool)
+        runStarts[1:] = candidates[1:] != candidates[:-1] + 1
+        firstOfRun = candidates[numpy.maximum.accumulate(numpy.where(runStarts, numpy.arange(len(candidates)), 0))]
+        pairStarts = candidates[(candidates - firstOfRun) % 2 == 0]
+    else:
+        pairStarts = candidates
+    classes[pairStarts + 1] = SKIPPED
+
+    # Words are the runs of word characters, which begin and end where the difference between neighbouring characters' classes is found
+    singleStarts = numpy.flatnonzero(classes == SINGLE)
+    edges = numpy.diff((classes == WORD).view(numpy.int8), prepend = 0, append = 0)
+    wordStarts = numpy.flatnonzero(edges == 1)
+    wordEnds = numpy.flatnonzero(edges == -1)
+
+    starts = numpy.concatenate((wordStarts, pairStarts, singleStarts))
+    ends = numpy.concatenate((wordEnds, pairStarts + 2, singleStarts + 1))
+    categories = numpy.concatenate((wordCategories(padded, wordStarts, wordEnds),
+                                    PAIR_CATEGORIES[characters[pairStarts].astype(numpy.uint16) << 8 | padded[pairStarts + 1]],
+                                    SINGLE_CATEGORIES[characters[singleStarts]]))
+    order = numpy.argsort(starts, kind = 'stable')
+    starts = starts[order]
+    lineNumbers = numpy.searchsorted(numpy.flatnonzero(characters == 10), starts) + 1
+
+    # The columns are filled in bulk from the bytes of the arrays, in the item sizes of the TokenBuffer's columns
+    tokenCategories, tokenLines, tokenStarts, tokenEnds = tokens.columns()
+    tokenCategories.frombytes(categories[order].tobytes())
+    tokenLines.frombytes(lineNumbers.astype('u' + str(tokenLines.itemsize)).tobytes())
+    tokenStarts.frombytes(starts.astype('u' + str(tokenStarts.itemsize)).tobytes())
+    tokenEnds.frombytes(ends[order].astype('u' + str(tokenEnds.itemsize)).tobytes())
+    return tokens
+
+# Return the category ids of the words between the given offsets of a padded source, decided the same way as categorize() decides them
+# Words of the lexer's table are found by packing every short word into a key, and the other categories from the flags of the characters of each word
+def wordCategories(padded, starts, ends):
+    categories = numpy.full(len(starts), CATEGORY_IDS['unknown'], dtype = numpy.uint8)
+    if len(starts) == 0:
+        return categories
+    lengths = ends - starts
+    flags = WORD_FLAGS[padded]
+    bounds = numpy.column_stack((starts, ends)).ravel()
+    anyFlags = numpy.bitwise_or.reduceat(flags, bounds)[::2]
+    first = padded[starts]
+    last = padded[ends - 1]
+
+    # A real number is digits, or digits, any one character, and digits, so a word that is not all digits needs its characters that are not digits counted
+    isInteger = anyFlags & NOT_DIGIT == 0
+    mayBeReal = ~isInteger & DIGIT_BYTES[first] & DIGIT_BYTES[last]
+    if mayBeReal.any():
+        notDigits = numpy.add.reduceat(flags >> 1, bounds, dtype = numpy.int64)[::2]
+        mayBeReal &= notDigits == 1
+    categories[isInteger | mayBeReal] = CATEGORY_IDS['float']
+    categories[isInteger] = CATEGORY_IDS['integer']
+    categories[IDENTIFIER_START_BYTES[first] & (anyFlags & NOT_ALPHANUMERIC == 0)] = CATEGORY_IDS['identifier']
+
+    short = numpy.flatnonzero(lengths <= LONGEST_TABLE_WORD)
+    if len(short) > 0 and len(TABLE_KEYS) > 0:
+        positions = numpy.arange(LONGEST_TABLE_WORD)
+        packed = padded.take(starts[short, None] + positions, mode = 'clip').astype(numpy.uint64)
+        packed[positions >= lengths[short, None]] = 0
+        keys = (packed << (8 * positions).astype(numpy.uint64)).sum(axis = 1, dtype = numpy.uint64) | lengths[short].astype(numpy.uint64) << numpy.uint64(56)
+        found = numpy.minimum(numpy.searchsorted(TABLE_KEYS, keys), len(TABLE_KEYS) - 1)
+        matched = TABLE_KEYS[found] == keys
+        categories[short[matched]] = TABLE_CATEGORIES[found[matched]]
+    return categories
@@ -0,0 +1,544 @@
+from array import array
+from math import fmod
+import sys
+import time
+
+from lexer import Lexer
+from parser import Parser, ParseError
+from semantic import analyze
+from tree import PROGRAM, DECLARATION, BLOCK, EMPTY, ASSIGNMENT, IF as IF_NODE, WHILE as WHILE_NODE, BINARY, UNARY, CAST, VARIABLE, LITERAL
+from tokens import (INTEGER_LITERAL, FLOAT_LITERAL, INT, FLOAT, CHAR, BOOL, TRUE, FALSE,
+                   PLUS, MINUS, TIMES, DIVIDE, MODULO, NOT, GREATER, GREATER_OR_EQUAL, LESS, LESS_OR_EQUAL, EQUAL, NOT_EQUAL, OR, AND)
+
+# Bytecode compiler and virtual machine
+# A syntax tree is compiled into a flat array of integers, in which every instruction is an opcode, followed by an operand if the opcode takes one
+# Array indexes are always integer literals, so every variable and array element has a fixed slot, and loads and stores name their slot directly
+# The types of expressions are known when they are compiled, so the compiler chooses integer or float division and inserts the conversions that assignments need, and the machine never checks a type
+# Values are Python ints, floats, and bools, and a char is held as the int of its character code
+
+# Opcodes
+# The opcodes up to JUMP_IF_TRUE_OR_POP take an operand, which is a slot, an index into the constant pool, or the position of an instruction
+# Every binary operator has three opcodes: one that takes its right operand from the stack, one that takes it from the constant pool, and one that takes it from a slot
+# The compiler uses the last two when the right operand is a literal or a variable, which saves the dispatch of a separate load for most operators in a program
+(LOAD, LOAD_CONST, STORE, JUMP, JUMP_IF_FALSE, JUMP_IF_TRUE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP) = range(8)
+(ADD, SUBTRACT, MULTIPLY, DIVIDE_INT, DIVIDE_FLOAT, MODULO_INT, MODULO_FLOAT,
+ LESS_THAN, LESS_OR_EQUAL_TO, GREATER_THAN, GREATER_OR_EQUAL_TO, EQUAL_TO, NOT_EQUAL_TO) = range(8, 21)
+BINARY_OPCODES = 13
+CONSTANT_OPERAND = BINARY_OPCODES                                   # Added to a binary opcode for the opcode that takes its right operand from the constant pool
+VARIABLE_OPERAND = 2 * BINARY_OPCODES                               # Added to a binary opcode for the opcode that takes its right operand from a slot
+(NEGATE, LOGICAL_NOT, TO_INT, TO_FLOAT, TO_CHAR, TO_BOOL, HALT) = range(ADD + 3 * BINARY_OPCODES, ADD + 3 * BINARY_OPCODES + 7)
+
+# Names of the opcodes, indexed by opcode
+BINARY_NAMES = ('ADD', 'SUBTRACT', 'MULTIPLY', 'DIVIDE_INT', 'DIVIDE_FLOAT', 'MODULO_INT', 'MODULO_FLOAT',
+                'LESS_THAN', 'LESS_OR_EQUAL_TO', 'GREATER_THAN', 'GREATER_OR_EQUAL_TO', 'EQUAL_TO', 'NOT_EQUAL_TO')
+OPCODE_NAMES = (('LOAD', 'LOAD_CONST', 'STORE', 'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_TRUE', 'JUMP_IF_FALSE_OR_POP', 'JUMP_IF_TRUE_OR_POP') +
+                BINARY_NAMES + tuple(name + '_CONSTANT' for name in BINARY_NAMES) + tuple(name + '_VARIABLE' for name in BINARY_NAMES) +
+                ('NEGATE', 'LOGICAL_NOT', 'TO_INT', 'TO_FLOAT', 'TO_CHAR', 'TO_BOOL', 'HALT'))
+
+# Opcodes of the operators that are compiled the same way for every type of operand
+ARITHMETIC_OPCODES = {PLUS: ADD, MINUS: SUBTRACT, TIMES: MULTIPLY}
+COMPARISON_OPCODES = {LESS: LESS_THAN, LESS_OR_EQUAL: LESS_OR_EQUAL_TO, GREATER: GREATER_THAN, GREATER_OR_EQUAL: GREATER_OR_EQUAL_TO, EQUAL: EQUAL_TO, NOT_EQUAL: NOT_EQUAL_TO}
+
+# Opcode that converts a value to each type, and the value that a variable of each type starts with
+CONVERSIONS = {INT: TO_INT, FLOAT: TO_FLOAT, CHAR: TO_CHAR, BOOL: TO_BOOL}
+INITIAL_VALUES = {INT: 0, FLOAT: 0.0, CHAR: 0, BOOL: False}
+
+# Names of the types, by the kind of their keyword
+TYPE_NAMES = {INT: 'int', FLOAT: 'float', CHAR: 'char', BOOL: 'bool'}
+
+# Steps of the compiler that run after the parts of a construct have been compiled
+(UNARY_OPERATOR, BINARY_OPERATOR, STORE_VALUE, CONVERT, CONDITION, EMIT_JUMP, LABEL) = range(7)
+
+# Program class
+# The compiled form of a program: its bytecode, its constant pool, and the slots of its variables
+# variables maps the name of every variable to its type, its first slot, and its array size, which is None for a variable that is not an array
+class Program:
+
+    # Program class constructor
+    def __init__(self, code, constants, variables, slotTypes):
+        self.code = code
+        self.constants = constants
+        self.variables = variables
+        self.slotTypes = slotTypes
+
+    # Return the number of instructions in the bytecode
+    def instructionCount(self):
+        count = 0
+        pc = 0
+        while pc < len(self.code):
+            pc += 2 if hasOperand(self.code[pc]) else 1
+            count += 1
+        return count
+
+    # Return a list that holds the ordinal of every instruction at the position of its opcode, counting from 0
+    def ordinals(self):
+        ordinals = [0] * len(self.code)
+        count = 0
+        pc = 0
+        while pc < len(self.code):
+            ordinals[pc] = count
+            pc += 2 if hasOperand(self.code[pc]) else 1
+            count += 1
+        return ordinals
+
+    # Return the bytecode as text, with one instruction per line
+    def disassemble(self):
+        names = {}
+        for name, (typeKind, slot, size) in self.variables.items():
+            for index in range(1 if size is None else size):
+                names[slot + index] = name if size is None else name + '[' + str(index) + ']'
+        lines = []
+        pc = 0
+        code = self.code
+        while pc < len(code):
+            opcode = code[pc]
+            if not hasOperand(opcode):
+                lines.append('{:>6} {}'.format(pc, OPCODE_NAMES[opcode]))
+                pc += 1
+                continue
+            operand = code[pc + 1]
+            if opcode == LOAD_CONST or ADD + CONSTANT_OPERAND <= opcode < ADD + VARIABLE_OPERAND:
+                note = repr(self.constants[operand])
+            elif opcode == LOAD or opcode == STORE or opcode >= ADD + VARIABLE_OPERAND:
+                note = names[operand]
+            else:
+                note = ''
+            lines.append('{:>6} {:<31} {:<6} {}'.format(pc, OPCODE_NAMES[opcode], operand, note).rstrip())
+            pc += 2
+        return '\n'.join(lines)
+
+# Compiler class
+# Compiles the syntax tree of a program into a Program
+# The tree is compiled with an explicit stack of nodes and steps instead of recursion, so deeply nested programs compile without running out of recursion depth
+# A stack of types is kept alongside, which holds the type of every value that the compiled code leaves on the machine's stack
+class Compiler:
+
+    # Compiler class constructor
+    def __init__(self):
+        self.code = None
+        self.constants = None
+        self.constantIndexes = None
+        self.variables = None
+        self.slotTypes = None
+        self.labels = None
+        self.jumps = None
+        self.types = None
+
+    # Compile the tree of a program and return the Program
+    # Raises ValueError if the program has a semantic error, such as an undeclared variable, or indexes a variable that is not an array, or uses an array without an index
+    def compile(self, root):
+        if root is None or root.kind() != PROGRAM:
+            raise ValueError('Only the tree of a whole program can be compiled')
+        errors = analyze(root)
+        if len(errors) > 0:
+            raise ValueError(locate(errors[0].token(), errors[0].message()))
+
+        self.code = array('i')
+        self.constants = []
+        self.constantIndexes = {}
+        self.variables = {}
+        self.slotTypes = []
+        self.labels = []
+        self.jumps = []
+        self.types = []
+
+        steps = [root]
+        while len(steps) > 0:
+            step = steps.pop()
+            if step.__class__ is tuple:
+                self.runStep(step)
+            else:
+                self.compileNode(step, steps)
+        self.code.append(HALT)
+
+        # Every jump was emitted before the position of its label was known, so the positions are filled in now
+        code = self.code
+        labels = self.labels
+        for position, label in self.jumps:
+            code[position] = labels[label]
+        return Program(code, tuple(self.constants), self.variables, tuple(self.slotTypes))
+
+    # Return a new label, whose position is set by a LABEL step
+    def newLabel(self):
+        self.labels.append(None)
+        return len(self.labels) - 1
+
+    # Return the index of a constant in the constant pool, adding it if it is not there yet
+    # Constants are keyed by their type as well as their value, since 1, 1.0, and True are equal in Python
+    def constant(self, value):
+        key = (value.__class__, value)
+        index = self.constantIndexes.get(key)
+        if index is None:
+            index = self.constantIndexes[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    # Emit the instruction that converts the value on top of the stack from one type to another, if they differ
+    # Chars and ints are both held as ints, so an int is only converted to a char, which wraps it into the range of a byte
+    def convert(self, source, target):
+        if source != target and not (target == INT and source == CHAR):
+            self.code.append(CONVERSIONS[target])
+
+    # Return the slot and type of a variable node
+    def variableSlot(self, node):
+        token = node.token()
+        typeKind, slot, size = self.variables[token.word()]
+        children = node.children()
+        if size is None:
+            if len(children) > 0:
+                raise ValueError(locate(token, 'Variable is not an array'))
+            return slot, typeKind
+        if len(children) == 0:
+            raise ValueError(locate(token, 'Array is used without an index'))
+        return slot + int(children[0].token().word()), typeKind
+
+    # Compile a node, either by emitting its instructions at once, or by pushing its parts and the steps that follow them onto the stack of steps
+    # Steps are pushed in reverse, so they run in the order they are listed
+    def compileNode(self, node, steps):
+        kind = node.kind()
+        children = node.children()
+        if kind == VARIABLE:
+            slot, typeKind = self.variableSlot(node)
+            self.code.extend((LOAD, slot))
+            self.types.append(typeKind)
+        elif kind == LITERAL:
+            value, typeKind = literalValue(node.token())
+            self.code.extend((LOAD_CONST, self.constant(value)))
+            self.types.append(typeKind)
+        elif kind == BINARY:
+            operator = node.token().kind()
+            if operator == AND or operator == OR:
+
+                # The right operand is skipped when the left one decides the result, which is then left on the stack as a bool
+                end = self.newLabel()
+                steps.extend(((LABEL, end), (CONVERT, BOOL), children[1], (CONDITION, JUMP_IF_FALSE_OR_POP if operator == AND else JUMP_IF_TRUE_OR_POP, end), children[0]))
+            else:
+                steps.extend(((BINARY_OPERATOR, operator, children[1].kind() == VARIABLE or children[1].kind() == LITERAL), children[1], children[0]))
+        elif kind == UNARY:
+            steps.extend(((UNARY_OPERATOR, node.token().kind()), children[0]))
+        elif kind == CAST:
+            steps.extend(((CONVERT, node.token().kind()), children[0]))
+        elif kind == ASSIGNMENT:
+            slot, typeKind = self.variableSlot(children[0])
+            steps.extend(((STORE_VALUE, slot, typeKind), children[1]))
+        elif kind == IF_NODE:
+            otherwise = self.newLabel()
+            if len(children) == 2:
+                steps.extend(((LABEL, otherwise), children[1], (CONDITION, JUMP_IF_FALSE, otherwise), children[0]))
+            else:
+                end = self.newLabel()
+                steps.extend(((LABEL, end), children[2], (LABEL, otherwise), (EMIT_JUMP, JUMP, end), children[1], (CONDITION, JUMP_IF_FALSE, otherwise), children[0]))
+        elif kind == WHILE_NODE:
+
+            # The condition is compiled after the body, so every iteration costs a single conditional jump
+            body = self.newLabel()
+            condition = self.newLabel()
+            steps.extend(((CONDITION, JUMP_IF_TRUE, body), children[0], (LABEL, condition), children[1], (LABEL, body), (EMIT_JUMP, JUMP, condition)))
+        elif kind == DECLARATION:
+            typeKind = node.token().kind()
+            for declarator in children:
+                size = int(declarator.children()[0].token().word()) if len(declarator.children()) > 0 else None
+                self.variables[declarator.token().word()] = (typeKind, len(self.slotTypes), size)
+                self.slotTypes.extend([typeKind] * (1 if size is None else size))
+        elif kind == PROGRAM or kind == BLOCK:
+            steps.extend(reversed(children))
+        elif kind != EMPTY:
+            raise ValueError('Unknown node kind: ' + str(kind))
+
+    # Emit a binary opcode
+    # If the right operand is a single variable or literal, the load that was just emitted for it is replaced by the opcode that reads the operand itself
+    # Nothing can jump to the position between the load and the operator, so the load can be removed
+    def binary(self, opcode, simple):
+        code = self.code
+        if simple:
+            operand = code.pop()
+            code.append(opcode + (CONSTANT_OPERAND if code.pop() == LOAD_CONST else VARIABLE_OPERAND))
+            code.append(operand)
+        else:
+            code.append(opcode)
+
+    # Run a step that follows the parts of a construct
+    def runStep(self, step):
+        action = step[0]
+        code = self.code
+        types = self.types
+        if action == BINARY_OPERATOR:
+            operator = step[1]
+            right = types.pop()
+            left = types.pop()
+            if operator in COMPARISON_OPCODES:
+                self.binary(COMPARISON_OPCODES[operator], step[2])
+                types.append(BOOL)
+                return
+            isFloat = left == FLOAT or right == FLOAT
+            if operator == DIVIDE:
+                self.binary(DIVIDE_FLOAT if isFloat else DIVIDE_INT, step[2])
+            elif operator == MODULO:
+                self.binary(MODULO_FLOAT if isFloat else MODULO_INT, step[2])
+            else:
+                self.binary(ARITHMETIC_OPCODES[operator], step[2])
+            types.append(FLOAT if isFloat else INT)
+        elif action == UNARY_OPERATOR:
+            operand = types.pop()
+            if step[1] == NOT:
+                code.append(LOGICAL_NOT)
+                types.append(BOOL)
+            else:
+                code.append(NEGATE)
+                types.append(FLOAT if operand == FLOAT else INT)
+        elif action == STORE_VALUE:
+            self.convert(types.pop(), step[2])
+            code.extend((STORE, step[1]))
+        elif action == CONVERT:
+            self.convert(types.pop(), step[1])
+            types.append(step[1])
+        elif action == CONDITION:
+            types.pop()
+            self.jumps.append((len(code) + 1, step[2]))
+            code.extend((step[1], 0))
+        elif action == EMIT_JUMP:
+            self.jumps.append((len(code) + 1, step[2]))
+            code.extend((step[1], 0))
+        else:
+            self.labels[step[1]] = len(code)
+
+# Return whether an opcode is followed by an operand
+def hasOperand(opcode):
+    return opcode <= JUMP_IF_TRUE_OR_POP or ADD + CONSTANT_OPERAND <= opcode < NEGATE
+
+# Return an error message that starts with the line of a token
+def locate(token, message):
+    return 'Line ' + str(token.lineNumber()) + ': ' + message + ' ' + token.word()
+
+# Return the value and type of a literal token
+# Any other single character is a char literal, whose value is its character code
+def literalValue(token):
+    kind = token.kind()
+    if kind == INTEGER_LITERAL:
+        return int(token.word()), INT
+    if kind == FLOAT_LITERAL:
+        return float(token.word()), FLOAT
+    if kind == TRUE or kind == FALSE:
+        return kind == TRUE, BOOL
+    return ord(token.word()), CHAR
+
+# Lex and parse the program in a file, and return its syntax tree, or None after printing its syntax error
+# The parser records an error for a program that stops before its closing brace, so a tree is only returned for a whole program, and running out of tokens is reported on the last token
+def parseProgram(fileName):
+    with open(fileName, 'r') as file:
+        tokens = Lexer(file).getAll()
+    parser = Parser(buildTree = True)
+    try:
+        errors = parser.parse(tokens)
+    except IndexError:
+        errors = [ParseError('End of file', tokens[-1] if len(tokens) > 0 else None)]
+    if len(errors) > 0:
+        token = errors[-1].token()
+        if token is None:
+            print('Syntax error at the end of the file, while parsing a(n)', errors[-1].message())
+        else:
+            print('Syntax error in line', token.lineNumber(), ', encountered', token.word(), 'while parsing a(n)', errors[-1].message())
+        return None
+    return parser.tree()
+
+# Compile the tree of a program and return the Program
+def compileTree(root):
+    return Compiler().compile(root)
+
+# VirtualMachine class
+# Runs the bytecode of a Program
+# Every variable has a slot in a list that is allocated once, with the starting value of its type, and every value is kept on a single operand stack
+# The instructions are run by one loop that tests the opcode against the most frequent opcodes first, with everything it uses held in local variables
+class VirtualMachine:
+
+    # VirtualMachine class constructor
+    def __init__(self, program):
+        self.program = program
+        self.code = program.code.tolist()                         # Indexing a list is faster than indexing an array, which creates a new int for every item it reads
+        self.ordinals = program.ordinals()
+        self.memory = [INITIAL_VALUES[typeKind] for typeKind in program.slotTypes]
+        self.executed = 0
+
+    # Run the program from the beginning until it halts, and return the number of instructions that were run
+    # The variables keep their values from any earlier run, so reset() is called first to run the program again from its starting values
+    # Instructions are not counted one at a time: every time a jump is taken, and when the program halts, the length of the run of instructions since the last jump is added, using the ordinal of every instruction
+    # Raises ZeroDivisionError if the program divides by zero
+    def run(self):
+        code = self.code
+        ordinals = self.ordinals
+        constants = self.program.constants
+        memory = self.memory
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        entry = 0                                                 # Position of the first instruction after the last jump that was taken
+        count = 0
+        while True:
+            opcode = code[pc]
+            if opcode < ADD:
+                if opcode == LOAD:
+                    push(memory[code[pc + 1]])
+                    pc += 2
+                elif opcode == LOAD_CONST:
+                    push(constants[code[pc + 1]])
+                    pc += 2
+                elif opcode == STORE:
+                    memory[code[pc + 1]] = pop()
+                    pc += 2
+                else:
+                    if opcode == JUMP_IF_FALSE:
+                        if pop():
+                            pc += 2
+                            continue
+                    elif opcode == JUMP_IF_TRUE:
+                        if not pop():
+                            pc += 2
+                            continue
+                    elif opcode == JUMP_IF_FALSE_OR_POP:
+                        if stack[-1]:
+                            pop()
+                            pc += 2
+                            continue
+                        stack[-1] = False
+                    elif opcode == JUMP_IF_TRUE_OR_POP:
+                        if not stack[-1]:
+                            pop()
+                            pc += 2
+                            continue
+                        stack[-1] = True
+                    count += ordinals[pc] - ordinals[entry] + 1
+                    pc = entry = code[pc + 1]
+            elif opcode < NEGATE:
+
+                # Find the right operand of a binary operator, and the operator itself
+                if opcode < ADD + CONSTANT_OPERAND:
+                    right = pop()
+                    pc += 1
+                elif opcode < ADD + VARIABLE_OPERAND:
+                    right = constants[code[pc + 1]]
+                    opcode -= CONSTANT_OPERAND
+                    pc += 2
+                else:
+                    right = memory[code[pc + 1]]
+                    opcode -= VARIABLE_OPERAND
+                    pc += 2
+
+                if opcode == ADD:
+                    stack[-1] += right
+                elif opcode == SUBTRACT:
+                    stack[-1] -= right
+                elif opcode == MULTIPLY:
+                    stack[-1] *= right
+                elif opcode == LESS_THAN:
+                    stack[-1] = stack[-1] < right
+                elif opcode == EQUAL_TO:
+                    stack[-1] = stack[-1] == right
+                elif opcode == MODULO_INT:
+
+                    # The remainder has the sign of the dividend, as it does in C, where Python's has the sign of the divisor
+                    left = stack[-1]
+                    remainder = left % right
+                    if remainder != 0 and (remainder < 0) != (left < 0):
+                        remainder -= right
+                    stack[-1] = remainder
+                elif opcode == DIVIDE_INT:
+
+                    # Integer division truncates towards zero, as it does in C, where Python's rounds down
+                    left = stack[-1]
+                    quotient = left // right
+                    if quotient < 0 and quotient * right != left:
+                        quotient += 1
+                    stack[-1] = quotient
+                elif opcode == LESS_OR_EQUAL_TO:
+                    stack[-1] = stack[-1] <= right
+                elif opcode == GREATER_THAN:
+                    stack[-1] = stack[-1] > right
+                elif opcode == GREATER_OR_EQUAL_TO:
+                    stack[-1] = stack[-1] >= right
+                elif opcode == NOT_EQUAL_TO:
+                    stack[-1] = stack[-1] != right
+                elif opcode == DIVIDE_FLOAT:
+                    stack[-1] /= right
+                else:
+                    if right == 0:                                # fmod raises ValueError rather than ZeroDivisionError for a zero divisor
+                        raise ZeroDivisionError('float modulo')
+                    stack[-1] = fmod(stack[-1], right)
+            else:
+                if opcode == NEGATE:
+                    stack[-1] = -stack[-1]
+                elif opcode == LOGICAL_NOT:
+                    stack[-1] = not stack[-1]
+                elif opcode == TO_INT:
+                    stack[-1] = int(stack[-1])
+                elif opcode == TO_FLOAT:
+                    stack[-1] = float(stack[-1])
+                elif opcode == TO_CHAR:
+                    stack[-1] = int(stack[-1]) & 0xFF
+                elif opcode == TO_BOOL:
+                    stack[-1] = bool(stack[-1])
+                else:
+                    count += ordinals[pc] - ordinals[entry] + 1
+                    break
+                pc += 1
+        self.executed += count
+        return count
+
+    # Put every variable back to the starting value of its type
+    def reset(self):
+        self.memory[:] = [INITIAL_VALUES[typeKind] for typeKind in self.program.slotTypes]
+
+    # Return a dictionary of the value of every variable, with the values of an array in a list
+    def variables(self):
+        values = {}
+        for name, (typeKind, slot, size) in self.program.variables.items():
+            values[name] = self.memory[slot] if size is None else self.memory[slot:slot + size]
+        return values
+
+# Main method for running a program
+# Prints the final value of every variable, and the number of instructions that were run and how fast they ran
+# With --optimize, the syntax tree is first rewritten by the constant folding and expression simplification of optimizer.py
+def main(arguments = None):
+    arguments = sys.argv[1:] if arguments is None else arguments
+    disassemble = '--disassemble' in arguments
+    optimize = '--optimize' in arguments
+    arguments = [argument for argument in arguments if argument != '--disassemble' and argument != '--optimize']
+    if len(arguments) != 1:
+        print('Usage: python vm.py [--disassemble] [--optimize] <source file>')
+        return 2
+
+    root = parseProgram(arguments[0])
+    if root is None:
+        return 1
+    if optimize:
+        from optimizer import Optimizer                            # The optimizer imports this module, so it is imported only when it is used
+        optimizer = Optimizer()
+        root = optimizer.optimize(root)
+        print(optimizer.report())
+    try:
+        program = compileTree(root)
+    except ValueError as error:
+        print(error)
+        return 1
+    if disassemble:
+        print(program.disassemble())
+
+    machine = VirtualMachine(program)
+    start = time.perf_counter()
+    try:
+        count = machine.run()
+    except ZeroDivisionError:
+        print('Division by zero')
+        return 1
+    except OverflowError:                                           # An int too large for a float, converted by TO_FLOAT
+        print('Number too large to convert to a float')
+        return 1
+    seconds = time.perf_counter() - start
+    for name, value in machine.variables().items():
+        print('{:<10} {:<6} {}'.format(name, TYPE_NAMES[program.variables[name][0]], value))
+    print('{} instructions in {:.6f} seconds ({:.0f} instructions/sec)'.format(count, seconds, count / seconds if seconds > 0 else 0))
+    return 0
+
+# Execute the main method of the virtual machine
+if __name__ == "__main__":
+    sys.exit(main())